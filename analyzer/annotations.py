@@ -0,0 +1,98 @@
+from parsing.ast import ExpressionVisitor, VariableAssignment, VariableDeclaration
+from symbol.symbol import VarSymbol, FunctionSymbol
+from parsing.source import SourceError
+
+# The annotations a function may have
+ANNOTATIONS = ("pure", "memoize", "inline")
+
+
+def single_expression(declaration):
+    """
+    Return whether the body of the function is a single expression, which an @inline function must have
+    """
+    body = declaration.body
+    return len(body) == 1 and not isinstance(body[0], (VariableDeclaration, VariableAssignment))
+
+
+class AnnotationChecker(ExpressionVisitor):
+    """
+    The AnnotationChecker checks the annotations of each analyzed function:
+        - @pure: the function has no side effect and its value only depends on its arguments: it does not assign
+          a global, does not read a global `var` and only calls @pure or @memoize functions,
+        - @memoize: the function is pure as well, so the engines can keep its values by its arguments,
+        - @inline: the body of the function is a single expression, which the TreeOptimizer expands at its calls.
+    The references of the function must be resolved: the functions it calls are looked up in the GlobalSymbolTable.
+    """
+
+    def __init__(self, global_table):
+        self.global_table = global_table
+        self.errors = []
+        # The annotation and the name of the function whose purity is checked
+        self.annotation = None
+        self.function = None
+
+    def check(self, declaration):
+        """
+        Check the annotations of the FunctionDeclaration
+        """
+        names = set()
+        for annotation in declaration.annotations:
+            if annotation.name not in ANNOTATIONS:
+                self.errors.append(SourceError.at("Unknown annotation: @%s." % annotation.name, annotation))
+            elif annotation.name in names:
+                self.errors.append(SourceError.at("Duplicated annotation: @%s." % annotation.name, annotation))
+            names.add(annotation.name)
+
+        if "inline" in names:
+            if "memoize" in names:
+                self.errors.append(SourceError.at(
+                    "An @inline function cannot be memoized: %s." % declaration.symbol.name, declaration.symbol))
+            if not single_expression(declaration):
+                self.errors.append(SourceError.at(
+                    "The body of an @inline function must be a single expression: %s." % declaration.symbol.name,
+                    declaration.symbol))
+
+        for name in ("pure", "memoize"):
+            if name in names:
+                self.annotation = name
+                self.function = declaration.symbol.name
+                # The default values are computed at each call as well
+                for parameter in declaration.arguments or []:
+                    self.visit(parameter)
+                for statement in declaration.body:
+                    self.visit(statement)
+                break
+
+    def impure(self, message, node):
+        self.errors.append(SourceError.at("The @%s function %s %s" % (self.annotation, self.function, message), node))
+
+    def visit_Num(self, node):
+        pass
+
+    def leave_BinOp(self, node, left, right):
+        pass
+
+    def leave_UnaryOp(self, node, expr):
+        pass
+
+    def leave_Call(self, node, arguments):
+        function = self.global_table.lookup(node.symbol.name)
+        if isinstance(function, FunctionSymbol) and not (
+                function.declaration.annotated("pure") or function.declaration.annotated("memoize")):
+            self.impure("cannot call the function %s, which is not pure." % node.symbol.name, node)
+
+    def visit_Symbol(self, node):
+        # The functions are global: only a global has a depth
+        if node.slot is None or node.depth == 0:
+            return
+        if isinstance(self.global_table.lookup(node.name), VarSymbol):
+            self.impure("cannot read the global var %s." % node.name, node)
+
+    def visit_VariableAssignment(self, node):
+        if node.left.slot is not None and node.left.depth != 0:
+            self.impure("cannot assign the global %s." % node.left.name, node)
+        self.visit(node.right)
+
+    def visit_VariableDeclaration(self, node):
+        if node.expr is not None:
+            self.visit(node.expr)
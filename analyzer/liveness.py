@@ -0,0 +1,154 @@
+from parsing.ast import ExpressionVisitor, Num, Symbol, BinOp, UnaryOp, Call, VariableAssignment, VariableDeclaration
+from parsing.tokens import SLASH
+from parsing.source import SourceError
+
+
+class LivenessAnalyzer(ExpressionVisitor):
+    """
+    The LivenessAnalyzer finds the local variables of a function which are never read, and removes the dead
+    statements of its body, returning a new body: the declarations and assignments of a local variable which is not read before being
+    written again or before the end of the function, and the expression statements, if they cannot raise any error.
+    The body of a function is a sequence of statements without any branch, so a single backward pass finds
+    the variables live after each statement. The last statement is always kept: its value is returned.
+
+    Only an operation on a not initialized variable, a division or a call may raise an error: a variable is known
+    to be initialized once it has been assigned, or declared with a value, and a global if it has a value at the start.
+    A call may also write the globals, so it is never removed.
+    The visit of an expression adds the slots of the local variables it reads to `reads`.
+    """
+
+    def __init__(self, global_table):
+        self.global_table = global_table
+        self.reads = set()
+        # The number of statements removed from all the functions
+        self.removed = 0
+
+    def unused(self, declaration):
+        """
+        Return the warnings about the local variables declared by the FunctionDeclaration and never read
+        """
+        self.reads = set()
+        declared = []
+        for statement in declaration.body:
+            if isinstance(statement, VariableDeclaration):
+                declared.append(statement)
+                if statement.expr is not None:
+                    self.visit(statement.expr)
+            elif isinstance(statement, VariableAssignment):
+                self.visit(statement.right)
+            else:
+                self.visit(statement)
+        return [SourceError.at("Unused variable: %s." % statement.symbol.name, statement.symbol)
+                for statement in declared if statement.slot not in self.reads]
+
+    def eliminate(self, body):
+        """
+        Return the statements of the body of a function without the dead ones, the body itself if none is dead
+        """
+        if not body:
+            return body
+        # The local variables known to be initialized before each statement
+        initialized = set()
+        known = []
+        for statement in body:
+            known.append(set(initialized))
+            if isinstance(statement, VariableDeclaration):
+                if statement.expr is not None and self.initialized(statement.expr, initialized):
+                    initialized.add(statement.slot)
+            elif isinstance(statement, VariableAssignment) and statement.left.depth == 0:
+                # Assigning a not initialized variable raises an error
+                initialized.add(statement.left.slot)
+
+        # The local variables live after the current statement
+        self.reads = set()
+        kept = []
+        for position in range(len(body) - 1, -1, -1):
+            statement = body[position]
+            last = position == len(body) - 1
+            if not last and self.dead(statement, known[position]):
+                self.removed += 1
+                continue
+            if isinstance(statement, VariableDeclaration):
+                self.reads.discard(statement.slot)
+                if statement.expr is not None:
+                    self.visit(statement.expr)
+            elif isinstance(statement, VariableAssignment):
+                if statement.left.depth == 0:
+                    self.reads.discard(statement.left.slot)
+                self.visit(statement.right)
+            else:
+                self.visit(statement)
+            kept.append(statement)
+        if len(kept) == len(body):
+            return body
+        kept.reverse()
+        return kept
+
+    def dead(self, statement, initialized):
+        """
+        Return whether the statement can be removed: it only writes a local variable which is not live,
+        or it is an expression, and it cannot raise any error
+        """
+        if isinstance(statement, VariableDeclaration):
+            return statement.slot not in self.reads and (
+                statement.expr is None or not self.may_fail(statement.expr, initialized))
+        if isinstance(statement, VariableAssignment):
+            return statement.left.depth == 0 and statement.left.slot not in self.reads \
+                and self.initialized(statement.right, initialized) and not self.may_fail(statement.right, initialized)
+        return not self.may_fail(statement, initialized)
+
+    def initialized(self, node, initialized):
+        """
+        Return whether the value of the expression cannot be None: only a variable may be not initialized,
+        and a call may return a not initialized variable
+        """
+        if isinstance(node, Call):
+            return False
+        if not isinstance(node, Symbol):
+            return True
+        if node.slot is None:
+            return False
+        if node.depth == 0:
+            return node.slot in initialized
+        symbol = self.global_table.lookup(node.name)
+        return symbol is not None and symbol.value is not None
+
+    def may_fail(self, node, initialized):
+        """
+        Return whether computing the expression may raise an error: whether any of its operations may
+        """
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, BinOp):
+                if node.op.type == SLASH and not (isinstance(node.right, Num) and node.right.value != 0):
+                    return True
+                if not self.initialized(node.left, initialized) or not self.initialized(node.right, initialized):
+                    return True
+                pending += (node.left, node.right)
+            elif isinstance(node, UnaryOp):
+                if not self.initialized(node.expr, initialized):
+                    return True
+                pending.append(node.expr)
+            elif isinstance(node, Symbol):
+                if node.slot is None:
+                    return True
+            elif not isinstance(node, Num):
+                return True
+        return False
+
+    def visit_Num(self, node):
+        pass
+
+    def leave_BinOp(self, node, left, right):
+        pass
+
+    def leave_UnaryOp(self, node, expr):
+        pass
+
+    def leave_Call(self, node, arguments):
+        pass
+
+    def visit_Symbol(self, node):
+        if node.depth == 0:
+            self.reads.add(node.slot)
@@ -0,0 +1,107 @@
+from analyzer.semanticanalyzer import SemanticAnalyzer
+from analyzer.treeanalyzer import GlobalSymbolTableCreator, TreeOptimizer
+from analyzer.liveness import LivenessAnalyzer
+from analyzer.annotations import AnnotationChecker
+from parsing.ast import FunctionDeclaration
+from symbol.symbol import FunctionSymbol
+
+
+class AnalysisPipeline(object):
+    """
+    The AnalysisPipeline analyzes the top-level declarations one by one as they are parsed:
+    each one is registered in the GlobalSymbolTable, then checked by the SemanticAnalyzer if it is a function,
+    before the next one is parsed. The errors are found without waiting for the end of the source
+    and the declarations are not kept once analyzed.
+    A function may use a global or a function declared after it: the references still unknown are checked at the end.
+    Once resolved, each function has its annotations checked by the AnnotationChecker and is checked for unused
+    variables, then optimized by the TreeOptimizer unless `optimize` is False and rid of its dead statements by the
+    LivenessAnalyzer unless `eliminate` is False, if no error has been found. `dump` is the stream where the optimized
+    functions are written, if any.
+    The parsed declarations are left as they are, as the IncrementalParser reuses them: a function with an optimized
+    body is replaced by a new FunctionDeclaration in its FunctionSymbol, which is the declaration passed on.
+    """
+
+    def __init__(self, optimize=True, eliminate=True, dump=None):
+        self.global_symtab_generator = GlobalSymbolTableCreator()
+        self.global_table = self.global_symtab_generator.global_table
+        self.semantic_analyzer = SemanticAnalyzer(self.global_table, streaming=True)
+        self.optimizer = TreeOptimizer(self.global_table, dump) if optimize else None
+        self.liveness_analyzer = LivenessAnalyzer(self.global_table)
+        self.annotation_checker = AnnotationChecker(self.global_table)
+        self.eliminate = eliminate
+        self.failed = False
+
+    @property
+    def warnings(self):
+        return self.semantic_analyzer.warnings
+
+    def analyze(self, declarations, analyzed=None):
+        """
+        Analyze the declarations as they are generated, and generate the errors as soon as they are found.
+        Each declaration is optimized then passed to `analyzed` once its analysis is done, in their order:
+        a function using a global declared after it is only resolved at the end, so it and the next declarations
+        are kept until then.
+        """
+        waiting = []
+        for declaration in declarations:
+            self.global_symtab_generator.visit(declaration)
+            yield from self.new_errors()
+            if isinstance(declaration, FunctionDeclaration):
+                self.semantic_analyzer.visit(declaration)
+                yield from self.new_errors()
+            if waiting or self.semantic_analyzer.unresolved or self.semantic_analyzer.unresolved_calls:
+                waiting.append(declaration)
+            else:
+                self.done(declaration, analyzed)
+                yield from self.new_errors()
+
+        self.semantic_analyzer.finish()
+        yield from self.new_errors()
+        for declaration in waiting:
+            self.done(declaration, analyzed)
+            yield from self.new_errors()
+
+    def done(self, declaration, analyzed):
+        """
+        Check the annotations of the resolved declaration and optimize it, then pass it to `analyzed`
+        """
+        if isinstance(declaration, FunctionDeclaration):
+            self.annotation_checker.check(declaration)
+            self.failed = self.failed or bool(self.annotation_checker.errors)
+        if isinstance(declaration, FunctionDeclaration) and not self.failed:
+            # The variables only read as constants are used: they are found before the optimization
+            self.warnings.extend(self.liveness_analyzer.unused(declaration))
+            body = declaration.body
+            if self.optimizer is not None:
+                body = self.optimizer.optimize(declaration)
+            if self.eliminate:
+                body = self.liveness_analyzer.eliminate(body)
+            if body is not declaration.body:
+                declaration = self.optimized(declaration, body)
+        if analyzed is not None:
+            analyzed(declaration)
+
+    def optimized(self, declaration, body):
+        """
+        Return a copy of the FunctionDeclaration with the optimized body, which replaces it in its FunctionSymbol
+        """
+        optimized = FunctionDeclaration(declaration.symbol, declaration.arguments, declaration.type, body,
+                                        declaration.annotations)
+        optimized.start = declaration.start
+        optimized.end = declaration.end
+        optimized.frame_size = declaration.frame_size
+        function = self.global_table.lookup(declaration.symbol.name)
+        if isinstance(function, FunctionSymbol) and function.declaration is declaration:
+            function.body = body
+            function.declaration = optimized
+        return optimized
+
+    def new_errors(self):
+        """
+        Take the errors found by the analyzers since the last call
+        """
+        for analyzer in (self.global_symtab_generator, self.semantic_analyzer, self.annotation_checker):
+            if analyzer.errors:
+                self.failed = True
+                yield from analyzer.errors
+                analyzer.errors = []
@@ -1,59 +1,85 @@
-from parsing.ast import NodeVisitor
+from parsing.ast import ExpressionVisitor, Call, Symbol
 from symbol.symbol import VarSymbol, ValSymbol, FunctionSymbol
 from symbol.stack import Stack
+from parsing.source import SourceError
 
 
-class SemanticAnalyzer(NodeVisitor):
+class SemanticAnalyzer(ExpressionVisitor):
     """
     SyntaxAnalyzer analyze the whole tree to checks every symbol
+    The visit of an expression returns the name of its type, or None if it is not known,
+    so the Interpreter computes plain values without checking their types
     """
 
-    def __init__(self, global_scope):
+    def __init__(self, global_scope, streaming=False):
         self._stack = Stack(global_scope)
         self.errors = []
         self.warnings = []
+        # While the declarations are streamed, a global may be declared after the functions using it:
+        # the symbols not found yet are only checked by `finish()`, with the depth of the global scope
+        self.streaming = streaming
+        self.unresolved = []
+        # The calls of a function not declared yet, with the types of their arguments
+        self.unresolved_calls = []
+        # The functions whose body ends with a call or a symbol not declared yet, with that last statement
+        self.unresolved_returns = []
 
     def get_stack(self):
         return self._stack
 
     def visit_Num(self, node):
-        pass
+        return node.type
 
-    def visit_BinOp(self, node):
-        self.visit(node.left)
-        self.visit(node.right)
+    def leave_BinOp(self, node, left, right):
+        if left is not None and right is not None and left != right:
+            self.errors.append(SourceError.at("Types mismatch", node))
+        return left if left == right else None
 
-    def visit_UnaryOp(self, node):
-        self.visit(node.expr)
+    def leave_UnaryOp(self, node, expr):
+        return expr
 
     def visit_VariableAssignment(self, node):
-        self.visit(node.left)
-        self.visit(node.right)
+        symbol = self.lookup(node.left)
+        type = self.visit(node.right)
+        if isinstance(symbol, ValSymbol):
+            self.errors.append(SourceError.at("A val cannot be reassigned: %s." % node.left.name, node))
+        elif symbol is not None and type is not None and symbol.type != type:
+            self.errors.append(SourceError.at("Types mismatch", node))
+        return symbol.type if symbol is not None else None
 
     def visit_VariableDeclaration(self, node):
         self.visit(node.type)
         # We should check the expr before the symbol in case of `var a : Int = a`
         if node.expr is not None:
-            self.visit(node.expr)
+            type = self.visit(node.expr)
+            if type is not None and type != node.type.name:
+                self.errors.append(SourceError.at("Types mismatch: the variable %s is of type %s." % (
+                    node.symbol.name, node.type.name), node.expr))
 
         if self._stack.last().scope.lookup(node.symbol.name, True) is not None:
-            self.errors.append(
-                "A variable with the same name has already been declared in this scope: %s." % node.symbol.name)
+            self.errors.append(SourceError.at(
+                "A variable with the same name has already been declared in this scope: %s." % node.symbol.name,
+                node.symbol))
         elif self._stack.last().scope.lookup(node.symbol.name, True) is not None:
-            self.errors.append(
-                "A variable is shadowing another variable in the global scope: %s." % node.symbol.name)
+            self.errors.append(SourceError.at(
+                "A variable is shadowing another variable in the global scope: %s." % node.symbol.name,
+                node.symbol))
         else:
             if node.const is True:
-                self._stack.last().scope.insert(VarSymbol(node.symbol.name, node.type))
+                symbol = ValSymbol(node.symbol.name, node.type.name)
             else:
-                self._stack.last().scope.insert(ValSymbol(node.symbol.name, node.type))
+                symbol = VarSymbol(node.symbol.name, node.type.name)
+            self._stack.last().scope.declare(symbol)
+            node.slot = symbol.slot
+        return node.type.name
 
     def visit_FunctionDeclaration(self, node):
         self.visit(node.type)
 
         if self._stack.last() is not self._stack.last():
             if self._stack.last().lookup(node.symbol.name, False) is not None:
-                self.errors.append("A function with the same name has already been declared: %s." % node.symbol.name)
+                self.errors.append(SourceError.at(
+                    "A function with the same name has already been declared: %s." % node.symbol.name, node.symbol))
             else:
                 self._stack.last().scope.insert(FunctionSymbol(node.symbol.name, node.type, node.arguments, node.body))
 
@@ -62,19 +88,119 @@ class SemanticAnalyzer(NodeVisitor):
         if node.arguments is not None:
             for argument in node.arguments:
                 self.visit(argument)
-        if node.body is not None:
+        if node.body:
+            # The value of a function is the value of its last statement
             for statement in node.body:
-                self.visit(statement)
-
+                type = self.visit(statement)
+            last = node.body[-1]
+            if type is not None:
+                self.check_return(node, last, type)
+            elif self.streaming and isinstance(last, (Call, Symbol)):
+                self.unresolved_returns.append((node, last))
+
+        node.frame_size = self._stack.last().scope.size
         # Pop the stack
         self._stack.pop()
 
+    def check_return(self, node, last, type):
+        """
+        Check the type of the last statement of the FunctionDeclaration against the type of the function
+        """
+        if type != node.type.name:
+            self.errors.append(SourceError.at("Types mismatch: the function %s is of type %s." % (
+                node.symbol.name, node.type.name), last))
+
+    def leave_Call(self, node, types):
+        function = self._stack.first().scope.lookup(node.symbol.name, True)
+        if function is None and self.streaming:
+            self.unresolved_calls.append((node, types))
+            return None
+        return self.check_call(node, function, types)
+
+    def check_call(self, node, function, types):
+        """
+        Check the number and the types of the arguments of the call, return the type of the function called.
+        The arguments are bound to the parameters in order, the parameters left must have a default value.
+        """
+        if function is None:
+            self.errors.append(SourceError.at("Unknown function: %s." % node.symbol.name, node.symbol))
+            return None
+        if not isinstance(function, FunctionSymbol):
+            self.errors.append(SourceError.at("Not a function: %s." % node.symbol.name, node.symbol))
+            return None
+        if len(types) > len(function.params):
+            self.errors.append(SourceError.at("Too many arguments: %s takes %d arguments, %d given." % (
+                node.symbol.name, len(function.params), len(types)), node))
+        for parameter in function.params[len(types):]:
+            if parameter.expr is None:
+                self.errors.append(SourceError.at("Missing argument: %s of %s." % (
+                    parameter.symbol.name, node.symbol.name), node))
+        for parameter, type, argument in zip(function.params, types, node.arguments):
+            if type is not None and type != parameter.type.name:
+                self.errors.append(SourceError.at("Types mismatch: the parameter %s of %s is of type %s." % (
+                    parameter.symbol.name, node.symbol.name, parameter.type.name), argument))
+        return function.type.name
+
     def visit_Symbol(self, node):
-        if self._stack.last().scope.lookup(node.name, True) is None and \
-                self._stack.first().scope.lookup(node.name, True) is None:
-            self.errors.append(
-                "Unknown symbol reference: %s\n       This symbol has not been declared in this scope." % node.name)
+        symbol = self.lookup(node)
+        if symbol is None:
+            return None
+        return symbol.type
+
+    def lookup(self, node):
+        """
+        Resolve the Symbol node to its variable: in the current scope or else in the global scope,
+        and return the symbol of the variable. A global not declared yet while streaming is resolved by `finish()`.
+        """
+        symbol = self._stack.last().scope.lookup(node.name, True)
+        if symbol is not None:
+            self.resolve(node, 0, symbol)
+            return symbol
+        depth = len(self._stack.elements) - 1
+        symbol = self._stack.first().scope.lookup(node.name, True)
+        if symbol is not None:
+            self.resolve(node, depth, symbol)
+        elif self.streaming:
+            self.unresolved.append((node, depth))
+        else:
+            self.unknown_symbol(node)
+        return symbol
+
+    def resolve(self, node, depth, symbol):
+        """
+        Set the variable referenced by the Symbol node, the Interpreter reading it from its frames without its name
+        """
+        node.depth = depth
+        node.slot = symbol.slot
+
+    def unknown_symbol(self, node):
+        self.errors.append(SourceError.at(
+            "Unknown symbol reference: %s\n       This symbol has not been declared in this scope." % node.name,
+            node))
+
+    def finish(self):
+        """
+        Check the symbols and the calls left unresolved while streaming, once every global has been declared
+        """
+        for node, depth in self.unresolved:
+            symbol = self._stack.first().scope.lookup(node.name, True)
+            if symbol is None:
+                self.unknown_symbol(node)
+            else:
+                self.resolve(node, depth, symbol)
+        self.unresolved = []
+        for node, types in self.unresolved_calls:
+            self.check_call(node, self._stack.first().scope.lookup(node.symbol.name, True), types)
+        self.unresolved_calls = []
+        for node, last in self.unresolved_returns:
+            symbol = self._stack.first().scope.lookup(last.symbol.name if isinstance(last, Call) else last.name, True)
+            if isinstance(last, Call) and isinstance(symbol, FunctionSymbol):
+                self.check_return(node, last, symbol.type.name)
+            elif isinstance(last, Symbol) and symbol is not None and not isinstance(symbol, FunctionSymbol):
+                self.check_return(node, last, symbol.type)
+        self.unresolved_returns = []
 
     def visit_Type(self, node):
         if self._stack.last().scope.lookup(node.name, False) is None:
-            self.errors.append("Unknown type reference: %s\n       This type has not been declared." % node.name)
+            self.errors.append(SourceError.at(
+                "Unknown type reference: %s\n       This type has not been declared." % node.name, node))
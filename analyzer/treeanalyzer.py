@@ -1,22 +1,281 @@
-from parsing.ast import NodeVisitor
+from parsing.ast import ExpressionVisitor, Num, BinOp, UnaryOp, Call, Symbol, VariableAssignment, \
+    VariableDeclaration, FunctionDeclaration
+from analyzer.annotations import single_expression
 from symbol.symbol import GlobalSymbolTable, ValSymbol, VarSymbol, FunctionSymbol
-from parsing.tokens import PLUS, STAR, SLASH, MINUS
+from parsing.tokens import Token, PLUS, STAR, SLASH, MINUS, INTEGER, FLOAT
+from parsing.source import SourceError
 
 
-class TreeOptimizer(NodeVisitor):
+# The Python type of the values of each Horilang type, and the kind of the tokens of its numbers
+VALUE_TYPES = {"Int": int, "Float": float}
+NUMBER_KINDS = {"Int": INTEGER, "Float": FLOAT}
+
+
+def count_nodes(node):
+    """
+    Return the number of nodes of the statement or expression tree, each shared node being counted at each use
+    """
+    count = 0
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        count += 1
+        if isinstance(node, BinOp):
+            pending += (node.left, node.right)
+        elif isinstance(node, UnaryOp):
+            pending.append(node.expr)
+        elif isinstance(node, Call):
+            pending += node.arguments
+        elif isinstance(node, VariableDeclaration):
+            if node.expr is not None:
+                pending.append(node.expr)
+        elif isinstance(node, VariableAssignment):
+            pending.append(node.right)
+    return count
+
+
+class TreeOptimizer(ExpressionVisitor):
+    """
+    The TreeOptimizer rewrites the body of each analyzed function before it is run:
+        - an operation on numbers is folded into a number,
+        - a variable known to hold a number is replaced by it: a global `val`, or a local `val` or `var`
+          initialized with a number and never reassigned by the function,
+        - a call of an @inline function is replaced by the expression of its body, its parameters being replaced
+          by the values bound to them. Each value must be a number or a variable, so computing it neither fails
+          nor changes anything, whether the parameter is used once, several times or never.
+    A number only replaces an expression if its value has the type of the expression: a division of two Int,
+    giving a Float, or by zero is left to be run.
+    The expressions may be shared by the NodeInterner, and the declarations reused by the IncrementalParser,
+    so the nodes are never changed: the visit of a node returns the same node if nothing has been optimized,
+    or a new one, and the optimized body is a new list.
+    """
+
+    def __init__(self, global_table, dump=None):
+        self.global_table = global_table
+        # The stream where the body of each function is written before and after its optimization, if any
+        self.dump = dump
+        # The number of nodes removed from all the functions
+        self.removed = 0
+        # The number of each local variable known to hold one, by slot
+        self.constants = {}
+        self.assigned = set()
+        # The number of calls inlined, and the names of the functions being inlined, never inlined in themselves
+        self.inlined = 0
+        self.inlining = set()
+
+    def optimize(self, declaration):
+        """
+        Return the optimized body of the FunctionDeclaration, its body itself if nothing has been optimized.
+        A global declaration has no body: None is returned.
+        """
+        if not isinstance(declaration, FunctionDeclaration):
+            return None
+        body = declaration.body
+        if not body:
+            return body
+        before = sum(count_nodes(statement) for statement in body)
+        self.write("Before optimization of %s:" % declaration.symbol.name, body)
+
+        self.assigned = {statement.left.slot for statement in body
+                         if isinstance(statement, VariableAssignment) and statement.left.depth == 0}
+        self.constants = {}
+        optimized = [self.visit(statement) for statement in body]
+        if all(statement is original for statement, original in zip(optimized, body)):
+            optimized = body
+
+        after = sum(count_nodes(statement) for statement in optimized)
+        self.removed += before - after
+        self.write("After optimization of %s: %d nodes, %d removed" % (declaration.symbol.name, after, before - after),
+                   optimized)
+        return optimized
+
+    def write(self, title, body):
+        if self.dump is None:
+            return
+        print(title, file=self.dump)
+        for statement in body:
+            try:
+                text = str(statement)
+            except RecursionError:
+                # The nodes are printed recursively
+                text = "%s: too deep to be printed" % type(statement).__name__
+            print("    %s" % text, file=self.dump)
+
+    def number(self, value, type, node):
+        """
+        Return a Num of the value with the span of the node it replaces, or None if the value is not of the type
+        """
+        if not isinstance(value, VALUE_TYPES.get(type, ())):
+            return None
+        number = Num(Token(NUMBER_KINDS[type], value))
+        number.start = node.start
+        number.end = node.end
+        return number
+
+    def visit_Num(self, node):
+        return node
+
+    def leave_BinOp(self, node, left, right):
+        if isinstance(left, Num) and isinstance(right, Num) and left.type == right.type:
+            try:
+                value = compute(node.op.type, left.value, right.value)
+            except ZeroDivisionError:
+                value = None
+            number = None if value is None else self.number(value, left.type, node)
+            if number is not None:
+                return number
+        if left is node.left and right is node.right:
+            return node
+        optimized = BinOp(left, node.op, right)
+        optimized.start = node.start
+        optimized.end = node.end
+        return optimized
+
+    def leave_UnaryOp(self, node, expr):
+        if isinstance(expr, Num):
+            number = self.number(-expr.value if node.op.type == MINUS else expr.value, expr.type, node)
+            if number is not None:
+                return number
+        if expr is node.expr:
+            return node
+        optimized = UnaryOp(node.op, expr)
+        optimized.start = node.start
+        optimized.end = node.end
+        return optimized
+
+    def visit_Symbol(self, node):
+        if node.slot is None:
+            return node
+        if node.depth == 0:
+            constant = self.constants.get(node.slot)
+            if constant is None:
+                return node
+            return self.number(constant.value, constant.type, node) or node
+        symbol = self.global_table.lookup(node.name)
+        if isinstance(symbol, ValSymbol) and symbol.value is not None:
+            return self.number(symbol.value, symbol.type, node) or node
+        return node
+
+    def leave_Call(self, node, arguments):
+        if any(argument is not original for argument, original in zip(arguments, node.arguments)):
+            optimized = Call(node.symbol, arguments)
+            optimized.start = node.start
+            optimized.end = node.end
+            node = optimized
+        inlined = self.inline(node)
+        return node if inlined is None else inlined
+
+    def inline(self, node):
+        """
+        Return the optimized expression of the body of the @inline function called, or None if it is not inlined
+        """
+        function = self.global_table.lookup(node.symbol.name)
+        if not isinstance(function, FunctionSymbol) or function.name in self.inlining or \
+                not function.declaration.annotated("inline") or not single_expression(function.declaration):
+            return None
+        # The arguments are bound to the first parameters, the default values are computed from the previous ones
+        values = {}
+        for position, parameter in enumerate(function.params):
+            if position < len(node.arguments):
+                value = node.arguments[position]
+            else:
+                value = self.visit(substitute(parameter.expr, values))
+            if not isinstance(value, (Num, Symbol)):
+                return None
+            values[parameter.slot] = value
+        self.inlining.add(function.name)
+        try:
+            expression = self.visit(substitute(function.body[0], values))
+        finally:
+            self.inlining.discard(function.name)
+        self.inlined += 1
+        return expression
+
+    def visit_VariableAssignment(self, node):
+        right = self.visit(node.right)
+        if right is node.right:
+            return node
+        optimized = VariableAssignment(node.left, right)
+        optimized.start = node.start
+        optimized.end = node.end
+        return optimized
+
+    def visit_VariableDeclaration(self, node):
+        if node.expr is None:
+            return node
+        expr = self.visit(node.expr)
+        if isinstance(expr, Num) and node.slot not in self.assigned:
+            self.constants[node.slot] = expr
+        if expr is node.expr:
+            return node
+        optimized = VariableDeclaration(node.lateinit, node.const, node.symbol, node.type, expr)
+        optimized.start = node.start
+        optimized.end = node.end
+        optimized.slot = node.slot
+        return optimized
+
+
+def substitute(node, values):
+    """
+    Return the expression of the body of a function, its local variables being replaced by the given values by slot.
+    The operations are copied, so the optimization of the copy does not change the function.
     """
-    The TreeOptimizer will optimize some statements
+    return Substitution(values).visit(node)
+
+
+class Substitution(ExpressionVisitor):
     """
+    The Substitution copies an expression, replacing its local variables by the values of their slots
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def generic_visit(self, node):
+        return node
+
+    def visit_Symbol(self, node):
+        return self.values.get(node.slot, node) if node.depth == 0 else node
 
-    pass
+    def leave_BinOp(self, node, left, right):
+        return self.copy(BinOp(left, node.op, right), node)
 
+    def leave_UnaryOp(self, node, expr):
+        return self.copy(UnaryOp(node.op, expr), node)
 
-class GlobalSymbolTableCreator(NodeVisitor):
+    def leave_Call(self, node, arguments):
+        return self.copy(Call(node.symbol, arguments), node)
+
+    def copy(self, substituted, node):
+        substituted.start = node.start
+        substituted.end = node.end
+        return substituted
+
+
+def compute(op_type, left, right):
+    """
+    Return the value of the operation, or None if the operator is unknown
+    """
+    if op_type == PLUS:
+        return left + right
+    elif op_type == STAR:
+        return left * right
+    elif op_type == SLASH:
+        return left / right
+    elif op_type == MINUS:
+        return left - right
+    return None
+
+
+class GlobalSymbolTableCreator(ExpressionVisitor):
     """
     The GlobalSymbolTableCreator will create the useful GlobalSymbolTable
     It will also compute all global VariableDeclaration
     """
 
+    # A call is an error, its arguments are not computed
+    operations = (BinOp, UnaryOp)
+
     def __init__(self):
         self.global_table = GlobalSymbolTable()
         self.errors = []
@@ -28,33 +287,30 @@ class GlobalSymbolTableCreator(NodeVisitor):
     def visit_Num(self, node):
         return ValSymbol('anonymous', node.type, node.value)
 
-    def visit_BinOp(self, node):
-        left = self.visit(node.left)
-        right = self.visit(node.right)
+    def leave_BinOp(self, node, left, right):
+        if left is None or right is None:
+            return None
         if left.type != right.type:
-            self.errors.append("Types mismatch")
+            self.errors.append(SourceError.at("Types mismatch", node))
             return None
         if left.value is None or right.value is None:
-            self.errors.append("Try to compute a not initialize variable")
+            self.errors.append(SourceError.at("Try to compute a not initialize variable", node))
             return None
-        if node.op.type is PLUS:
-            return ValSymbol('anonymous', left.type, left.value + right.value)
-        elif node.op.type is STAR:
-            return ValSymbol('anonymous', left.type, left.value * right.value)
-        elif node.op.type is SLASH:
-            return ValSymbol('anonymous', left.type, left.value / right.value)
-        elif node.op.type is MINUS:
-            return ValSymbol('anonymous', left.type, left.value - right.value)
-        else:
-            self.errors.append("Unknown error")
+        value = compute(node.op.type, left.value, right.value)
+        if value is None:
+            self.errors.append(SourceError.at("Unknown error", node))
             return None
+        return ValSymbol('anonymous', left.type, value)
 
-    def visit_UnaryOp(self, node):
-        expr = self.visit(node.expr)
+    def leave_UnaryOp(self, node, expr):
+        if expr is None:
+            return None
         if expr.value is None:
-            self.errors.append("Try to compute a not initialize variable")
+            self.errors.append(SourceError.at("Try to compute a not initialize variable", node))
             return None
-        return ValSymbol('anonymous', expr.type, -expr.value)
+        if node.op.type == MINUS:
+            return ValSymbol('anonymous', expr.type, -expr.value)
+        return ValSymbol('anonymous', expr.type, expr.value)
 
     def visit_VariableAssignment(self, node):
         pass
@@ -67,20 +323,26 @@ class GlobalSymbolTableCreator(NodeVisitor):
                 value = value.value
 
         if node.const is True:
-            self.global_table.insert(ValSymbol(node.symbol.name, node.type, value))
+            symbol = ValSymbol(node.symbol.name, node.type.name, value)
         else:
-            self.global_table.insert(VarSymbol(node.symbol.name, node.type, value))
+            symbol = VarSymbol(node.symbol.name, node.type.name, value)
+        self.global_table.declare(symbol)
+
+    def visit_Call(self, node):
+        # The globals are computed before any function is run
+        self.errors.append(SourceError.at("A global cannot be initialized by a function call", node))
+        return None
 
     def visit_FunctionDeclaration(self, node):
-        self.global_table.insert(FunctionSymbol(node.symbol.name, node.type, node.arguments, node.body))
+        self.global_table.insert(FunctionSymbol(node.symbol.name, node.type, node.arguments, node.body, node))
 
     def visit_Symbol(self, node):
         symbol = self.global_table.lookup(node.name)
         if symbol is None:
-            self.errors.append("Try to get value of an undeclared variable")
+            self.errors.append(SourceError.at("Try to get value of an undeclared variable", node))
             return None
         return symbol
 
     def visit_Type(self, node):
         if self.global_table.lookup(node.name) is None:
-            self.errors.append("Unknown type")
+            self.errors.append(SourceError.at("Unknown type", node))
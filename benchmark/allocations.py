@@ -0,0 +1,64 @@
+import contextlib
+import io
+import sys
+import time
+
+from analyzer.pipeline import AnalysisPipeline
+from benchmark.generator import generate_program
+from interpreter.interpreter import Interpreter
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from symbol import symbol
+from symbol.symbol import FunctionSymbol
+
+
+def count_symbols(function):
+    """
+    Run the function, return the number of symbols created meanwhile
+    """
+    counts = [0]
+    init = symbol.Symbol.__init__
+
+    def counting_init(self, *args, **kwargs):
+        counts[0] += 1
+        init(self, *args, **kwargs)
+
+    symbol.Symbol.__init__ = counting_init
+    try:
+        function()
+    finally:
+        symbol.Symbol.__init__ = init
+    return counts[0]
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    statements = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    text = generate_program(functions, statements)
+    pipeline = AnalysisPipeline()
+    for error in pipeline.analyze(Parser(Scanner(text)).declarations()):
+        print("Error: %s" % error)
+        return
+    function_symbols = [function for function in pipeline.global_table._symbols.values()
+                        if isinstance(function, FunctionSymbol)]
+
+    def interpret():
+        interpreter = Interpreter(pipeline.global_table)
+        # The interpreter prints the scope of each function
+        with contextlib.redirect_stdout(io.StringIO()):
+            for function in function_symbols:
+                interpreter.visit(function)
+
+    # Each pair of generated statements evaluates 5 binary operations and 1 unary operation
+    operations = functions * statements * 6
+    symbols = count_symbols(interpret)
+    start = time.perf_counter()
+    interpret()
+    elapsed = time.perf_counter() - start
+    print("Source: %d functions of %d statements, %d operations" % (functions, statements * 2, operations))
+    print("%d symbols created, %.2f by operation" % (symbols, symbols / operations))
+    print("%.3f sec, %.0f operations/sec" % (elapsed, operations / elapsed))
+
+
+if __name__ == "__main__":
+    main()
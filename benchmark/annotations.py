@@ -0,0 +1,56 @@
+import random
+import sys
+
+from benchmark.calls import invoke_all
+from benchmark.engines import ENGINES, analyzed_functions, best_time
+
+
+def generate_annotated_program(annotation, helpers=10, callers=20, calls=20, terms=10, seed=0):
+    """
+    Generate a Horilang program whose functions call helpers computing a long expression of their arguments,
+    with a few distinct arguments. The helpers have the given annotation, if any.
+    """
+    rng = random.Random(seed)
+    lines = ["# Generated Horilang program", "", "val base : Int = 3", ""]
+    for i in range(helpers):
+        expression = "a"
+        for _ in range(terms):
+            expression = "(%s %s %s)" % (expression, rng.choice("+-*"), rng.choice(["a", "b", "base", "2"]))
+        if annotation:
+            lines.append(annotation)
+        lines.append("func helper%d(var a : Int, var b : Int = base) : Int -> %s" % (i, expression))
+    lines.append("")
+    for i in range(callers):
+        lines.append("func caller%d() : Int {" % i)
+        lines.append("    var a : Int = 0")
+        for _ in range(calls):
+            lines.append("    a = a + helper%d(%d, %d)" % (
+                rng.randrange(helpers), rng.randint(1, 3), rng.randint(1, 3)))
+        lines.append("    a")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    callers = 20 * scale
+    names = ["caller%d" % i for i in range(callers)]
+    global_tables = {annotation: analyzed_functions(generate_annotated_program(annotation, callers=callers))[0]
+                     for annotation in ("", "@memoize", "@inline")}
+    for engine_name, engine in ENGINES:
+        interpreters = {annotation: engine(global_table) for annotation, global_table in global_tables.items()}
+        reference = invoke_all(interpreters[""], names, [], 1)
+        if any(invoke_all(interpreter, names, [], 1) != reference for interpreter in interpreters.values()):
+            print("%-10s gives other results once annotated" % engine_name)
+            continue
+        times = {annotation: best_time(lambda: invoke_all(interpreter, names, [], 10))
+                 for annotation, interpreter in interpreters.items()}
+        memos = interpreters["@memoize"].memos.values()
+        print("%-10s plain %8.3f sec   @memoize %8.3f sec x%.2f   @inline %8.3f sec x%.2f   %d hits, %d misses" % (
+            engine_name, times[""], times["@memoize"], times[""] / times["@memoize"], times["@inline"],
+            times[""] / times["@inline"], sum(memo.hits for memo in memos), sum(memo.misses for memo in memos)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import io
+import shutil
+import sys
+import tempfile
+import time
+
+from analyzer.pipeline import AnalysisPipeline
+from analyzer.treeanalyzer import GlobalSymbolTableCreator
+from benchmark.engines import call_all
+from benchmark.generator import generate_program
+from interpreter.cache import ASTCache
+from interpreter.interpreter import Interpreter
+from parsing.flatast import FlatAST
+from parsing.parser import Parser
+from parsing.scanner import StreamScanner
+from symbol.symbol import FunctionSymbol
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def execute(global_table, repeat):
+    """
+    Call each function of the program `repeat` times with the tree walking Interpreter
+    """
+    functions = [function for function in global_table._symbols.values() if isinstance(function, FunctionSymbol)]
+    return call_all(Interpreter(global_table), functions, repeat)
+
+
+def cold_start(cache, source):
+    """
+    Prepare the program as on a miss: parse, analyze, then store its tree
+    """
+    key = cache.key(io.BytesIO(source))
+    flat = FlatAST()
+    pipeline = AnalysisPipeline()
+    for _ in pipeline.analyze(Parser(StreamScanner(io.BytesIO(source))).declarations(), flat.add):
+        pass
+    cache.store(key, flat, pipeline.warnings)
+    return pipeline.global_table
+
+
+def warm_start(cache, source):
+    """
+    Prepare the program as on a hit: load its tree, rebuild its nodes then build its GlobalSymbolTable
+    """
+    flat, _ = cache.load(cache.key(io.BytesIO(source)))
+    global_symtab_generator = GlobalSymbolTableCreator()
+    global_symtab_generator.visit(flat.to_tree())
+    return global_symtab_generator.global_table
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    source = generate_program(functions).encode()
+    directory = tempfile.mkdtemp(prefix="horilang-cache-")
+    try:
+        cache = ASTCache(directory)
+        print("Source: %d functions, %d bytes, each function called %d times" % (functions, len(source), repeat))
+        # The run of the program is timed with its start: a tree loaded faster may be run slower
+        cold = best_time(lambda: execute(cold_start(cache, source), repeat))
+        warm = best_time(lambda: execute(warm_start(cache, source), repeat))
+        print("%-6s %8.3f sec" % ("cold", cold))
+        print("%-6s %8.3f sec   x%.2f" % ("warm", warm, cold / warm))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import random
+import sys
+
+from benchmark.engines import ENGINES, analyzed_functions, best_time
+from interpreter.interpreter import CallSite
+
+
+def generate_call_program(helpers=20, callers=20, calls=20, seed=0):
+    """
+    Generate a Horilang program whose functions call small helpers with positional and default arguments
+    """
+    rng = random.Random(seed)
+    lines = ["# Generated Horilang program", "", "val base : Int = 3", ""]
+    for i in range(helpers):
+        lines.append("func helper%d(var a : Int, var b : Int = base * %d) : Int -> a * %d + b" % (
+            i, rng.randint(1, 9), rng.randint(1, 9)))
+    lines.append("")
+    for i in range(callers):
+        lines.append("func caller%d() : Int {" % i)
+        lines.append("    var a : Int = %d" % i)
+        for _ in range(calls):
+            if rng.random() < 0.5:
+                lines.append("    a = helper%d(a - %d) - a" % (rng.randrange(helpers), rng.randint(1, 9)))
+            else:
+                lines.append("    a = helper%d(a, %d) - a * 2" % (rng.randrange(helpers), rng.randint(1, 9)))
+        # The last call is a tail call
+        lines.append("    helper%d(a)" % rng.randrange(helpers))
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_tail_chain(length=2000):
+    """
+    Generate a chain of functions, each one calling the next in tail position
+    """
+    lines = ["# Generated Horilang program", ""]
+    for i in range(length):
+        if i == length - 1:
+            lines.append("func link%d(var n : Int) : Int -> n" % i)
+        else:
+            lines.append("func link%d(var n : Int) : Int -> link%d(n + 1)" % (i, i + 1))
+    return "\n".join(lines)
+
+
+def invoke_all(interpreter, names, arguments, repeat):
+    sites = [CallSite(name) for name in names]
+    results = []
+    for _ in range(repeat):
+        for site in sites:
+            results.append(interpreter.invoke(site, list(arguments)))
+    return results
+
+
+def compare(name, text, names, arguments, repeat, count):
+    global_table, _ = analyzed_functions(text)
+    print("%s: %d entry functions called %d times" % (name, len(names), repeat))
+    reference = None
+    baseline = None
+    for engine_name, engine in ENGINES:
+        interpreter = engine(global_table)
+        results = invoke_all(interpreter, names, arguments, 1)
+        if reference is None:
+            reference = results
+        elif results != reference:
+            print("    %-10s gives other results" % engine_name)
+            continue
+        elapsed = best_time(lambda: invoke_all(interpreter, names, arguments, repeat))
+        baseline = baseline or elapsed
+        print("    %-10s %8.3f sec %10.0f Horilang calls/sec   x%.2f" % (
+            engine_name, elapsed, count * repeat / elapsed, baseline / elapsed))
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    callers = 20 * scale
+    compare("calls", generate_call_program(callers=callers), ["caller%d" % i for i in range(callers)], [], 20,
+            callers * 22)
+    # Far deeper than the Python recursion limit: only runs in constant Python stack depth
+    length = 5000 * scale
+    compare("tail calls", generate_tail_chain(length), ["link0"], [0], 5, length)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import random
+import sys
+
+from benchmark.calls import invoke_all
+from benchmark.engines import ENGINES, analyzed_functions, best_time
+from interpreter.interpreter import CallSite
+
+
+def generate_nested_program(depth=50, chains=10, globals_count=200, reads=10, seed=0):
+    """
+    Generate a Horilang program of chains of nested calls, each function of a chain reading many globals
+    and calling the next one out of tail position, so all the frames of a chain are alive at once
+    """
+    rng = random.Random(seed)
+    lines = ["# Generated Horilang program", ""]
+    for i in range(globals_count):
+        lines.append("var g%d : Int = %d" % (i, rng.randint(1, 9)))
+    lines.append("")
+    for chain in range(chains):
+        for level in range(depth):
+            expression = "n"
+            for _ in range(reads):
+                expression = "(%s %s g%d)" % (expression, rng.choice("+-"), rng.randrange(globals_count))
+            if level < depth - 1:
+                expression = "c%dl%d(%s) - g%d" % (chain, level + 1, expression, rng.randrange(globals_count))
+            lines.append("func c%dl%d(var n : Int) : Int -> %s" % (chain, level, expression))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def uncached(engine):
+    """
+    Return a subclass of the engine looking the function called up in the GlobalSymbolTable at each call,
+    as without the inline caches. The chains have no tail call: only `invoke()` finds the functions.
+    """
+
+    class Uncached(engine):
+        def invoke(self, site, arguments):
+            function = self.global_table.lookup(site.name)
+            return self.run(function, self.enter(function, arguments))
+
+    Uncached.__name__ = "Uncached" + engine.__name__
+    return Uncached
+
+
+def lookups(global_table, name, count):
+    for _ in range(count):
+        global_table.lookup(name)
+
+
+def site_checks(site, count):
+    for _ in range(count):
+        site.function or None
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    depth = 50
+    chains = 10 * scale
+    names = ["c%dl0" % chain for chain in range(chains)]
+    global_table, _ = analyzed_functions(generate_nested_program(depth, chains))
+    site = CallSite(names[0])
+    site.function = global_table.lookup(site.name)
+    count = 1000000
+    lookup_time = best_time(lambda: lookups(global_table, site.name, count))
+    check_time = best_time(lambda: site_checks(site, count))
+    print("%d symbols in the GlobalSymbolTable: lookup %.0f ns, inline cache %.0f ns" % (
+        len(global_table._symbols), lookup_time * 1e9 / count, check_time * 1e9 / count))
+    print("%d chains of %d nested calls, reading %d globals by call" % (chains, depth, 11))
+    for engine_name, engine in ENGINES:
+        cached = engine(global_table)
+        looked_up = uncached(engine)(global_table)
+        if invoke_all(cached, names, [1], 1) != invoke_all(looked_up, names, [1], 1):
+            print("%-10s gives other results with the inline caches" % engine_name)
+            continue
+        before = best_time(lambda: invoke_all(looked_up, names, [1], 20))
+        after = best_time(lambda: invoke_all(cached, names, [1], 20))
+        print("%-10s lookup by call %8.3f sec   inline caches %8.3f sec   x%.2f   %10.0f calls/sec" % (
+            engine_name, before, after, before / after, chains * depth * 20 / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import sys
+import time
+
+from analyzer.semanticanalyzer import SemanticAnalyzer
+from analyzer.treeanalyzer import GlobalSymbolTableCreator
+from benchmark.generator import generate_program
+from gen_ast_dot import ASTVisualizer
+from interpreter.interpreter import Interpreter
+from parsing.ast import FunctionDeclaration
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from symbol.symbol import FunctionSymbol
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def getattr_visit(self, node):
+    """
+    The dispatch of NodeVisitor before its dispatch table: a string and a getattr by visit
+    """
+    method_name = 'visit_' + type(node).__name__
+    visitor = getattr(self, method_name, self.generic_visit)
+    return visitor(node)
+
+
+def counting(visitor_class):
+    """
+    Return a subclass of the visitor class counting its visits in `visits`
+    """
+    def visit(self, node):
+        self.visits += 1
+        return visitor_class.visit(self, node)
+
+    return type(visitor_class.__name__, (visitor_class,), {'visit': visit, 'visits': 0})
+
+
+def workloads(tree, global_table):
+    """
+    Return the name, the visitor class and the run of each visitor on the whole tree
+    """
+    functions = [statement for statement in tree if isinstance(statement, FunctionDeclaration)]
+    function_symbols = [symbol for symbol in global_table._symbols.values() if isinstance(symbol, FunctionSymbol)]
+
+    def create_table(visitor_class):
+        visitor = visitor_class()
+        visitor.visit(tree)
+        return visitor
+
+    def analyze(visitor_class):
+        visitor = visitor_class(global_table)
+        for function in functions:
+            visitor.visit(function)
+        return visitor
+
+    def interpret(visitor_class):
+        visitor = visitor_class(global_table)
+        # The interpreter prints the scope of each function
+        with contextlib.redirect_stdout(io.StringIO()):
+            for symbol in function_symbols:
+                visitor.visit(symbol)
+        return visitor
+
+    def visualize(visitor_class):
+        visitor = visitor_class(None)
+        for statement in tree:
+            visitor.visit(statement)
+        return visitor
+
+    return (
+        ("GlobalSymbolTableCreator", GlobalSymbolTableCreator, create_table),
+        ("SemanticAnalyzer", SemanticAnalyzer, analyze),
+        ("Interpreter", Interpreter, interpret),
+        ("ASTVisualizer", ASTVisualizer, visualize),
+    )
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    tree = Parser(Scanner(generate_program(functions))).parse()
+    global_symtab_generator = GlobalSymbolTableCreator()
+    global_symtab_generator.visit(tree)
+    global_table = global_symtab_generator.global_table
+
+    print("Source: %d functions" % functions)
+    for name, visitor_class, run in workloads(tree, global_table):
+        visits = run(counting(visitor_class)).visits
+        legacy_class = type(visitor_class.__name__, (visitor_class,), {'visit': getattr_visit})
+        legacy = best_time(lambda: run(legacy_class))
+        cached = best_time(lambda: run(visitor_class))
+        print("%-26s %8d visits   getattr %10.0f visits/sec   cached %10.0f visits/sec   x%.2f" % (
+            name, visits, visits / legacy, visits / cached, legacy / cached))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import sys
+import time
+
+from analyzer.pipeline import AnalysisPipeline
+from benchmark.generator import generate_program
+from interpreter.closures import ClosureInterpreter
+from interpreter.interpreter import Interpreter
+from interpreter.iterative import IterativeInterpreter
+from interpreter.vm import VirtualMachine
+from interpreter.transpiler import TranspiledInterpreter
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from symbol.stack import Frame
+from symbol.symbol import FunctionSymbol
+
+ENGINES = (
+    ("tree", Interpreter),
+    ("iterative", IterativeInterpreter),
+    ("closures", ClosureInterpreter),
+    ("bytecode", VirtualMachine),
+    ("python", TranspiledInterpreter),
+)
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def analyzed_functions(text):
+    """
+    Return the GlobalSymbolTable of the analyzed program and its FunctionSymbols
+    """
+    pipeline = AnalysisPipeline()
+    for error in pipeline.analyze(Parser(Scanner(text)).declarations()):
+        raise error
+    functions = [function for function in pipeline.global_table._symbols.values()
+                 if isinstance(function, FunctionSymbol)]
+    return pipeline.global_table, functions
+
+
+def call_all(interpreter, functions, repeat):
+    """
+    Call each function `repeat` times, as `visit_FunctionSymbol` does without printing its frame
+    """
+    results = []
+    for _ in range(repeat):
+        for function in functions:
+            interpreter.frame = Frame(function.name, function.declaration.frame_size, interpreter.global_frame)
+            results.append(interpreter.call(function))
+    interpreter.frame = interpreter.global_frame
+    return results
+
+
+def compare(name, text, repeat):
+    global_table, functions = analyzed_functions(text)
+    print("%s: %d functions called %d times" % (name, len(functions), repeat))
+    reference = None
+    baseline = None
+    for engine_name, engine in ENGINES:
+        interpreter = engine(global_table)
+        results = call_all(interpreter, functions, 1)
+        if reference is None:
+            reference = results
+        elif results != reference:
+            print("    %-10s gives other results" % engine_name)
+            continue
+        elapsed = best_time(lambda: call_all(interpreter, functions, repeat))
+        baseline = baseline or elapsed
+        print("    %-10s %8.3f sec %10.0f calls/sec   x%.2f" % (
+            engine_name, elapsed, len(functions) * repeat / elapsed, baseline / elapsed))
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    compare("arithmetic", generate_program(20 * scale, 200), 5)
+    compare("calls", generate_program(200 * scale, 1), 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import sys
+import time
+
+from parsing.parser import Parser
+from parsing.tokenstream import TokenStream
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def expressions(size):
+    """
+    Generate the expressions parsed by the benchmark, each one made of about `size` operands
+    """
+    yield "long", " + ".join("(a * %d - -b / 2)" % i for i in range(size // 2))
+    yield "nested", "(" * size + "1" + " + 2)" * size
+    yield "unary", "-" * size + "1"
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for name, expression in expressions(size):
+        stream = TokenStream.from_text("func main() : Int -> %s\n" % expression)
+
+        def parse():
+            stream.rewind()
+            Parser(stream).parse()
+
+        elapsed = best_time(parse)
+        print("%8s %8d tokens %8.3f sec %10.0f tokens/sec" % (name, len(stream), elapsed, len(stream) / elapsed))
+
+
+if __name__ == "__main__":
+    main()
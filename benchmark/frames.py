@@ -0,0 +1,48 @@
+import sys
+import time
+
+from symbol.stack import Stack, StackElement
+from symbol.symbol import SymbolTable, VarSymbol
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def allocated_scopes(calls, variables):
+    stack = Stack()
+    for _ in range(calls):
+        # What `Stack.add()` and `Stack.pop()` did before reusing the popped elements
+        stack.elements.append(StackElement(SymbolTable("f", 2, stack.elements[-1].scope)))
+        for i in range(variables):
+            stack.last().scope.declare(VarSymbol("v%d" % i, "Int"))
+        stack.elements.pop()
+
+
+def pooled_scopes(calls, variables):
+    stack = Stack()
+    for _ in range(calls):
+        stack.add("f")
+        for i in range(variables):
+            stack.last().scope.declare(VarSymbol("v%d" % i, "Int"))
+        stack.pop()
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print("%d calls" % calls)
+    for variables in (0, 4):
+        allocated = best_time(lambda: allocated_scopes(calls // 4, variables))
+        pooled = best_time(lambda: pooled_scopes(calls // 4, variables))
+        print("scopes of %d variables  allocated %10.0f calls/sec   pooled %10.0f calls/sec   x%.2f" % (
+            variables, calls / 4 / allocated, calls / 4 / pooled, allocated / pooled))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import random
+
+
+def generate_program(functions=100, statements=20, seed=0):
+    """
+    Generate a Horilang program made of global declarations and `functions` functions
+    of `statements` statements each, the last function being `main`.
+    """
+    rng = random.Random(seed)
+    lines = ["# Generated Horilang program", ""]
+    for i in range(functions):
+        lines.append("val g%d : Int = %d * %d + %d" % (i, rng.randint(1, 9), rng.randint(1, 9), i))
+    lines.append("")
+    for i in range(functions):
+        name = "main" if i == functions - 1 else "func%d" % i
+        lines.append("func %s() : Int {" % name)
+        lines.append("    var a : Int = g%d" % i)
+        for j in range(statements):
+            lines.append("    var v%d : Int = (a + %d) * %d - g%d / 1" % (j, rng.randint(0, 99), rng.randint(1, 9), i))
+            lines.append("    a = v%d - a + -%d" % (j, rng.randint(0, 9)))
+        lines.append("    var f : Float = 3.14 * 2.0")
+        lines.append("    a")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
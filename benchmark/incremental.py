@@ -0,0 +1,37 @@
+import sys
+import time
+
+from benchmark.generator import generate_program
+from parsing.incremental import IncrementalParser
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [50, 500, 2000]
+    print("%10s %12s %16s %16s" % ("functions", "full parse", "same length edit", "longer line edit"))
+    for size in sizes:
+        text = generate_program(size)
+        full = best_time(lambda: Parser(Scanner(text)).parse())
+
+        # Edit the first line of the function in the middle of the program
+        parser = IncrementalParser(text)
+        line = "func func%d() : Int {\n    var a : Int = " % (size // 2)
+        offset = text.index(line) + len(line)
+        edit = best_time(lambda: parser.edit(offset, offset + 1, "7"))
+        longer = best_time(lambda: parser.edit(offset, offset + 1, "42"))
+        print("%10d %10.2f ms %13.2f ms %13.2f ms" % (size, full * 1000, edit * 1000, longer * 1000))
+
+
+if __name__ == "__main__":
+    main()
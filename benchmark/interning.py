@@ -0,0 +1,56 @@
+import sys
+import tracemalloc
+
+from benchmark.generator import generate_program
+from parsing.ast import AST
+from parsing.interning import NodeInterner
+from parsing.parser import Parser
+from parsing.tokenstream import TokenStream
+
+
+def count_nodes(tree):
+    """
+    Return the number of nodes of the tree and the number of distinct node objects
+    """
+    count = 0
+    distinct = set()
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, AST):
+            count += 1
+            distinct.add(id(node))
+            pending.extend(getattr(node, field) for field in type(node).__slots__)
+    return count, len(distinct)
+
+
+def traced(build):
+    """
+    Return what `build` returns, with the memory it holds once done and its peak memory
+    """
+    tracemalloc.start()
+    result = build()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, peak
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    stream = TokenStream.from_text(generate_program(functions))
+    print("Source: %d functions" % functions)
+
+    for name, interner in (("plain", None), ("interned", NodeInterner())):
+        stream.rewind()
+        # The interner is part of the memory held: it keeps every shared node
+        (tree, interner), size, peak = traced(lambda: (Parser(stream, interner).parse(), interner))
+        count, distinct = count_nodes(tree)
+        print("%-10s %8d nodes %8d objects %8.1f MB   peak %8.1f MB" % (
+            name, count, distinct, size / 1e6, peak / 1e6))
+        del tree, interner
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import random
+import sys
+
+from benchmark.calls import invoke_all
+from benchmark.engines import analyzed_functions, best_time, call_all
+from benchmark.generator import generate_program
+from interpreter.interpreter import Interpreter
+from interpreter.iterative import IterativeInterpreter
+
+# The recursion limit while analyzing the deep expressions: the analysis passes are recursive
+ANALYSIS_RECURSION_LIMIT = 1000000
+
+
+def generate_deep_program(depth, seed=0):
+    """
+    Generate a Horilang function `deep(a)` computing an expression of the given depth, made of nested
+    operations on its parameter, so the TreeOptimizer cannot fold it
+    """
+    rng = random.Random(seed)
+    expression = "a"
+    for _ in range(depth):
+        shape = rng.random()
+        if shape < 0.4:
+            expression = "%s %s a" % (expression, rng.choice("+-"))
+        elif shape < 0.7:
+            expression = "a - (%s)" % expression
+        elif shape < 0.9:
+            expression = "-(%s)" % expression
+        else:
+            expression = "(%s) * 1" % expression
+    return "func deep(var a : Int) : Int -> %s\n" % expression
+
+
+def run(interpreter, repeat):
+    try:
+        return invoke_all(interpreter, ["deep"], [3], repeat)
+    except RecursionError:
+        return None
+
+
+def main():
+    global_table, functions = analyzed_functions(generate_program(20, 200))
+    tree = best_time(lambda: call_all(Interpreter(global_table), functions, 5))
+    iterative = best_time(lambda: call_all(IterativeInterpreter(global_table), functions, 5))
+    print("shallow expressions: tree %8.3f sec   iterative %8.3f sec   x%.2f" % (tree, iterative, tree / iterative))
+
+    limit = sys.getrecursionlimit()
+    for depth in (100, 400, 10000, 100000):
+        sys.setrecursionlimit(ANALYSIS_RECURSION_LIMIT)
+        try:
+            global_table, _ = analyzed_functions(generate_deep_program(depth))
+        finally:
+            sys.setrecursionlimit(limit)
+        repeat = max(1, 20000 // depth)
+        tree = Interpreter(global_table)
+        iterative = IterativeInterpreter(global_table)
+        expected = run(tree, 1)
+        if expected is not None and expected != run(iterative, 1):
+            print("depth %6d: the iterative interpreter gives another result" % depth)
+            continue
+        iterative_time = best_time(lambda: run(iterative, repeat))
+        if expected is None:
+            print("depth %6d: tree   recursion limit reached   iterative %8.3f sec" % (depth, iterative_time))
+            continue
+        tree_time = best_time(lambda: run(tree, repeat))
+        print("depth %6d: tree %8.3f sec   iterative %8.3f sec   x%.2f" % (
+            depth, tree_time, iterative_time, tree_time / iterative_time))
+
+
+if __name__ == "__main__":
+    main()
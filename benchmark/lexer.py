@@ -0,0 +1,41 @@
+import sys
+import time
+
+from benchmark.generator import generate_program
+from parsing.lexer import Lexer
+from parsing.scanner import Scanner
+from parsing.tokens import EOF
+
+
+def count_tokens(lexer):
+    count = 0
+    while lexer.get_next_token().type != EOF:
+        count += 1
+    return count
+
+
+def measure(lexer_class, text, repeat=3):
+    """
+    Return the number of tokens and the best tokens/sec over `repeat` runs.
+    """
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = count_tokens(lexer_class(text))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, count / best
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    text = generate_program(functions)
+    print("Source: %d chars" % len(text))
+    for lexer_class in (Lexer, Scanner):
+        count, rate = measure(lexer_class, text)
+        print("%-8s %8d tokens %12.0f tokens/sec" % (lexer_class.__name__, count, rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import random
+import sys
+import time
+
+from analyzer.pipeline import AnalysisPipeline
+from benchmark.engines import ENGINES, best_time, call_all
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from symbol.symbol import FunctionSymbol
+
+
+def generate_dead_store_program(functions=20, statements=50, seed=0):
+    """
+    Generate a Horilang program whose functions declare variables never read and overwrite their assignments
+    """
+    rng = random.Random(seed)
+    lines = ["# Generated Horilang program", ""]
+    for i in range(functions):
+        lines.append("var g%d : Int = %d" % (i, rng.randint(1, 9)))
+    lines.append("")
+    for i in range(functions):
+        lines.append("func %s() : Int {" % ("main" if i == functions - 1 else "func%d" % i))
+        lines.append("    var a : Int = g%d" % i)
+        for j in range(statements):
+            lines.append("    var t%d : Int = (a + g%d) * %d" % (j, rng.randrange(functions), rng.randint(1, 9)))
+            lines.append("    a = a * %d - g%d" % (rng.randint(1, 9), rng.randrange(functions)))
+            if j % 2:
+                lines.append("    a = t%d + a" % j)
+        lines.append("    a")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def analyzed_functions(text, eliminate):
+    pipeline = AnalysisPipeline(eliminate=eliminate)
+    start = time.perf_counter()
+    for error in pipeline.analyze(Parser(Scanner(text)).declarations()):
+        raise error
+    elapsed = time.perf_counter() - start
+    functions = [function for function in pipeline.global_table._symbols.values()
+                 if isinstance(function, FunctionSymbol)]
+    return pipeline, functions, elapsed
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    text = generate_dead_store_program(20 * scale)
+    kept, kept_functions, kept_time = analyzed_functions(text, False)
+    eliminated, eliminated_functions, eliminated_time = analyzed_functions(text, True)
+    statements = sum(len(function.body) for function in kept_functions)
+    print("%d of %d statements removed, %d unused variables, analysis %.3f sec instead of %.3f sec" % (
+        eliminated.liveness_analyzer.removed, statements, len(eliminated.warnings), eliminated_time, kept_time))
+    for engine_name, engine in ENGINES:
+        kept_interpreter = engine(kept.global_table)
+        eliminated_interpreter = engine(eliminated.global_table)
+        if call_all(kept_interpreter, kept_functions, 1) != call_all(eliminated_interpreter, eliminated_functions, 1):
+            print("%-10s gives other results once the dead statements are removed" % engine_name)
+            continue
+        before = best_time(lambda: call_all(kept_interpreter, kept_functions, 20))
+        after = best_time(lambda: call_all(eliminated_interpreter, eliminated_functions, 20))
+        print("%-10s all statements %8.3f sec   live statements %8.3f sec   x%.2f" % (
+            engine_name, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
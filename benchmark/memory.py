@@ -0,0 +1,42 @@
+import sys
+import tracemalloc
+
+from benchmark.generator import generate_program
+from parsing.flatast import FlatAST
+from parsing.parser import Parser
+from parsing.tokenstream import TokenStream
+
+
+def traced(build):
+    """
+    Return what `build` returns, with the memory it holds once done and its peak memory
+    """
+    tracemalloc.start()
+    result = build()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, peak
+
+
+def main():
+    # About 1M nodes by default
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 2650
+    stream = TokenStream.from_text(generate_program(functions))
+
+    def parse():
+        stream.rewind()
+        return Parser(stream)
+
+    tree, size, peak = traced(lambda: parse().parse())
+    nodes = len(FlatAST.from_tree(tree))
+    del tree
+    print("Source: %d functions, %d nodes and lists" % (functions, nodes))
+    print("%-12s %8.1f MB %6.1f bytes/node   peak %8.1f MB" % ("objects", size / 1e6, size / nodes, peak / 1e6))
+
+    flat, size, peak = traced(lambda: FlatAST.from_declarations(parse().declarations()))
+    print("%-12s %8.1f MB %6.1f bytes/node   peak %8.1f MB" % ("flat", size / 1e6, size / nodes, peak / 1e6))
+    print("%-12s %8.1f MB in the arrays, %d constants" % ("", flat.nbytes() / 1e6, len(flat.constants)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import random
+import sys
+
+from analyzer.pipeline import AnalysisPipeline
+from benchmark.engines import ENGINES, best_time, call_all
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from symbol.symbol import FunctionSymbol
+
+
+def generate_constant_program(functions=20, statements=50, seed=0):
+    """
+    Generate a Horilang program whose functions compute with global `val`, local constants and numbers
+    """
+    rng = random.Random(seed)
+    lines = ["# Generated Horilang program", ""]
+    for i in range(functions):
+        lines.append("val g%d : Int = %d * %d + %d" % (i, rng.randint(1, 9), rng.randint(1, 9), i))
+    lines.append("")
+    for i in range(functions):
+        lines.append("func %s() : Int {" % ("main" if i == functions - 1 else "func%d" % i))
+        lines.append("    val k : Int = %d * %d" % (rng.randint(1, 9), rng.randint(1, 9)))
+        lines.append("    var step : Int = k - %d" % rng.randint(0, 9))
+        lines.append("    var a : Int = %d" % i)
+        for _ in range(statements):
+            lines.append("    a = (a + g%d * k) * (%d + %d) - step" % (
+                rng.randrange(functions), rng.randint(0, 9), rng.randint(0, 9)))
+        lines.append("    a")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def analyzed_functions(text, optimize):
+    pipeline = AnalysisPipeline(optimize=optimize)
+    for error in pipeline.analyze(Parser(Scanner(text)).declarations()):
+        raise error
+    functions = [function for function in pipeline.global_table._symbols.values()
+                 if isinstance(function, FunctionSymbol)]
+    return pipeline, functions
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    text = generate_constant_program(20 * scale)
+    plain, plain_functions = analyzed_functions(text, False)
+    optimized, optimized_functions = analyzed_functions(text, True)
+    print("%d nodes removed by the TreeOptimizer" % optimized.optimizer.removed)
+    for engine_name, engine in ENGINES:
+        plain_interpreter = engine(plain.global_table)
+        optimized_interpreter = engine(optimized.global_table)
+        if call_all(plain_interpreter, plain_functions, 1) != call_all(optimized_interpreter, optimized_functions, 1):
+            print("%-10s gives other results once optimized" % engine_name)
+            continue
+        before = best_time(lambda: call_all(plain_interpreter, plain_functions, 20))
+        after = best_time(lambda: call_all(optimized_interpreter, optimized_functions, 20))
+        print("%-10s not optimized %8.3f sec   optimized %8.3f sec   x%.2f" % (
+            engine_name, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+from benchmark.generator import generate_program
+from parsing.parallel import ParallelParser
+from parsing.parser import Parser
+from parsing.tokenstream import TokenStream
+
+
+def best_time(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    stream = TokenStream.from_text(generate_program(functions))
+    print("Source: %d functions, %d tokens, %d cpus" % (functions, len(stream), os.cpu_count() or 1))
+
+    def parse_serial():
+        stream.rewind()
+        Parser(stream).parse()
+
+    serial = best_time(parse_serial)
+    print("%8s %10.3f sec" % ("serial", serial))
+
+    workers = 1
+    while workers <= 2 * (os.cpu_count() or 1):
+        parser = ParallelParser(stream, workers, min_tokens=0)
+        elapsed = best_time(parser.parse)
+        print("%8d %10.3f sec %6.2fx" % (workers, elapsed, serial / elapsed))
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import sys
+import time
+import tracemalloc
+
+from analyzer.pipeline import AnalysisPipeline
+from analyzer.semanticanalyzer import SemanticAnalyzer
+from analyzer.treeanalyzer import GlobalSymbolTableCreator
+from benchmark.generator import generate_program
+from parsing.ast import FunctionDeclaration
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+
+
+def analyze_batch(text):
+    """
+    Parse the whole source then run each analysis on the whole tree, generating the errors found
+    """
+    tree = Parser(Scanner(text)).parse()
+    global_symtab_generator = GlobalSymbolTableCreator()
+    global_symtab_generator.visit(tree)
+    yield from global_symtab_generator.errors
+    semantic_analyzer = SemanticAnalyzer(global_symtab_generator.global_table)
+    for statement in tree:
+        if isinstance(statement, FunctionDeclaration):
+            semantic_analyzer.visit(statement)
+    yield from semantic_analyzer.errors
+
+
+def analyze_pipeline(text):
+    return AnalysisPipeline().analyze(Parser(Scanner(text)).declarations())
+
+
+def time_to_first_error(analyze, text):
+    start = time.perf_counter()
+    next(analyze(text))
+    return time.perf_counter() - start
+
+
+def peak_memory(analyze, text):
+    tracemalloc.start()
+    for _ in analyze(text):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    text = generate_program(functions)
+    # The first function declares its variable twice
+    failing = text.replace("var a : Int = 0\n", "var a : Int = 0\n    var a : Int = 1\n", 1)
+    print("Source: %d functions, %d chars" % (functions, len(text)))
+    for name, analyze in (("batch", analyze_batch), ("pipeline", analyze_pipeline)):
+        print("%-10s first error %8.3f sec   peak memory %7.1f MB" % (
+            name, time_to_first_error(analyze, failing), peak_memory(analyze, text) / 1e6))
+
+
+if __name__ == "__main__":
+    main()
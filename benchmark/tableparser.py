@@ -0,0 +1,35 @@
+import sys
+import time
+
+from benchmark.generator import generate_program
+from parsing.parser import Parser
+from parsing.tableparser import TableParser
+from parsing.tokenstream import TokenStream
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    stream = TokenStream.from_text(generate_program(functions))
+    print("Source: %d functions, %d tokens" % (functions, len(stream)))
+
+    for parser_class in (Parser, TableParser):
+        def parse():
+            stream.rewind()
+            parser_class(stream).parse()
+
+        elapsed = best_time(parse)
+        print("%-12s %8.3f sec %10.0f tokens/sec" % (parser_class.__name__, elapsed, len(stream) / elapsed))
+
+
+if __name__ == "__main__":
+    main()
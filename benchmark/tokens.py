@@ -0,0 +1,58 @@
+import sys
+import time
+import tracemalloc
+
+from benchmark.generator import generate_program
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from parsing.tokenstream import TokenStream
+
+
+def memory_per_token(build):
+    """
+    Return the number of tokens built by `build` and the bytes they hold per token.
+    """
+    tracemalloc.start()
+    tokens = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(tokens), size / len(tokens)
+
+
+def best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    text = generate_program(functions)
+    print("Source: %d chars" % len(text))
+
+    count, size = memory_per_token(lambda: list(Scanner(text).tokenize()))
+    print("Token objects   %8d tokens %6.1f bytes/token" % (count, size))
+    count, size = memory_per_token(lambda: TokenStream.from_text(text))
+    print("TokenStream     %8d tokens %6.1f bytes/token" % (count, size))
+
+    elapsed = best_time(lambda: Parser(Scanner(text)).parse())
+    print("Parse Scanner     %8.3f sec %10.0f tokens/sec" % (elapsed, count / elapsed))
+    elapsed = best_time(lambda: Parser(TokenStream.from_text(text)).parse())
+    print("Parse TokenStream %8.3f sec %10.0f tokens/sec" % (elapsed, count / elapsed))
+
+    stream = TokenStream.from_text(text)
+
+    def parse_stream():
+        stream.rewind()
+        Parser(stream).parse()
+
+    elapsed = best_time(parse_stream)
+    print("Parse prebuilt    %8.3f sec %10.0f tokens/sec" % (elapsed, count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
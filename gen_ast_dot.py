@@ -1,6 +1,6 @@
 import textwrap
 from parsing.parser import Parser
-from parsing.lexer import Lexer
+from parsing.scanner import Scanner
 from parsing.ast import NodeVisitor
 
 
@@ -8,6 +8,8 @@ class ASTVisualizer(NodeVisitor):
     def __init__(self, parser):
         self.parser = parser
         self.ncount = 1
+        # The number of each visited node, the nodes being slotted
+        self.nums = {}
         self.dot_header = [textwrap.dedent("""\
         digraph astgraph {
             node [shape=circle, fontsize=12, fontname="Courier", height=.1];
@@ -21,49 +23,49 @@ class ASTVisualizer(NodeVisitor):
     def visit_Num(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, node.value)
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
     def visit_BinOp(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, node.op.value)
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
         self.visit(node.left)
         self.visit(node.right)
 
         for child_node in (node.left, node.right):
-            s = '    node{} -> node{}\n'.format(node.num, child_node.num)
+            s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[child_node])
             self.dot_body.append(s)
 
     def visit_UnaryOp(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, node.op.value)
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
         self.visit(node.expr)
-        s = '    node{} -> node{}\n'.format(node.num, node.expr.num)
+        s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[node.expr])
         self.dot_body.append(s)
 
     def visit_VariableAssignment(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, "Assignment")
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
         self.visit(node.left)
         self.visit(node.right)
 
         for child_node in (node.left, node.right):
-            s = '    node{} -> node{}\n'.format(node.num, child_node.num)
+            s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[child_node])
             self.dot_body.append(s)
 
     def visit_VariableDeclaration(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, "Variable")
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
         self.visit(node.symbol)
@@ -71,58 +73,72 @@ class ASTVisualizer(NodeVisitor):
         if node.expr is not None:
             self.visit(node.expr)
             for child_node in (node.symbol, node.type, node.expr):
-                s = '    node{} -> node{}\n'.format(node.num, child_node.num)
+                s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[child_node])
                 self.dot_body.append(s)
         else:
             for child_node in (node.symbol, node.type):
-                s = '    node{} -> node{}\n'.format(node.num, child_node.num)
+                s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[child_node])
                 self.dot_body.append(s)
 
     def visit_FunctionDeclaration(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, "Function")
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
         self.visit(node.symbol)
-        s = '    node{} -> node{}\n'.format(node.num, node.symbol.num)
+        s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[node.symbol])
         self.dot_body.append(s)
         if node.arguments is not None:
             s = '    node{} [label="{}"]\n'.format(self.ncount, "Arguments")
             self.dot_body.append(s)
             body_pos = self.ncount
             self.ncount += 1
-            s = '    node{} -> node{}\n'.format(node.num, body_pos)
+            s = '    node{} -> node{}\n'.format(self.nums[node], body_pos)
             self.dot_body.append(s)
             for argument in node.arguments:
                 self.visit(argument)
-                s = '    node{} -> node{}\n'.format(body_pos, argument.num)
+                s = '    node{} -> node{}\n'.format(body_pos, self.nums[argument])
                 self.dot_body.append(s)
         self.visit(node.type)
-        s = '    node{} -> node{}\n'.format(node.num, node.type.num)
+        s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[node.type])
         self.dot_body.append(s)
         if node.body is not None:
             s = '    node{} [label="{}"]\n'.format(self.ncount, "Body")
             self.dot_body.append(s)
             body_pos = self.ncount
             self.ncount += 1
-            s = '    node{} -> node{}\n'.format(node.num, body_pos)
+            s = '    node{} -> node{}\n'.format(self.nums[node], body_pos)
             self.dot_body.append(s)
             for statement in node.body:
                 self.visit(statement)
-                s = '    node{} -> node{}\n'.format(body_pos, statement.num)
+                s = '    node{} -> node{}\n'.format(body_pos, self.nums[statement])
                 self.dot_body.append(s)
 
+    def visit_Call(self, node):
+        s = '    node{} [label="{}"]\n'.format(self.ncount, "Call")
+        self.dot_body.append(s)
+        self.nums[node] = self.ncount
+        self.ncount += 1
+
+        self.visit(node.symbol)
+        for argument in node.arguments:
+            self.visit(argument)
+
+        for child_node in [node.symbol] + list(node.arguments):
+            s = '    node{} -> node{}\n'.format(self.nums[node], self.nums[child_node])
+            self.dot_body.append(s)
+
     def visit_Symbol(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, node.name)
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
     def visit_Type(self, node):
         s = '    node{} [label="{}"]\n'.format(self.ncount, node.name)
         self.dot_body.append(s)
-        node.num = self.ncount
+        self.nums[node] = self.ncount
         self.ncount += 1
 
     def gendot(self):
@@ -132,13 +148,13 @@ class ASTVisualizer(NodeVisitor):
         self.ncount += 1
         for statement in tree:
             self.visit(statement)
-            s = '    node{} -> node{}\n'.format(1, statement.num)
+            s = '    node{} -> node{}\n'.format(1, self.nums[statement])
             self.dot_body.append(s)
         return ''.join(self.dot_header + self.dot_body + self.dot_footer)
 
 
 def main():
-    lexer = Lexer("""
+    lexer = Scanner("""
     
 var a : Int = 3 * 3 + c / 2 * (4 + b)
 
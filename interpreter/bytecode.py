@@ -0,0 +1,235 @@
+from array import array
+
+from parsing.ast import NodeVisitor, Num, Call, VariableDeclaration, constant_key
+from parsing.tokens import PLUS, STAR, SLASH, MINUS
+from parsing.source import SourceError
+from interpreter.interpreter import CallSite, may_be_none
+
+# The opcodes, each instruction being an opcode followed by one operand
+LOAD_CONST = 0
+LOAD_LOCAL = 1
+LOAD_OUTER = 2
+STORE_LOCAL = 3
+STORE_OUTER = 4
+BINARY_ADD = 5
+BINARY_SUBTRACT = 6
+BINARY_MULTIPLY = 7
+BINARY_DIVIDE = 8
+UNARY_NEGATIVE = 9
+CHECK_OPERANDS = 10
+CHECK_VALUE = 11
+POP_TOP = 12
+RETURN_VALUE = 13
+RAISE = 14
+CALL = 15
+TAIL_CALL = 16
+
+OPCODE_NAMES = (
+    "LOAD_CONST",
+    "LOAD_LOCAL",
+    "LOAD_OUTER",
+    "STORE_LOCAL",
+    "STORE_OUTER",
+    "BINARY_ADD",
+    "BINARY_SUBTRACT",
+    "BINARY_MULTIPLY",
+    "BINARY_DIVIDE",
+    "UNARY_NEGATIVE",
+    "CHECK_OPERANDS",
+    "CHECK_VALUE",
+    "POP_TOP",
+    "RETURN_VALUE",
+    "RAISE",
+    "CALL",
+    "TAIL_CALL",
+)
+
+BINARY_OPCODES = {
+    PLUS: BINARY_ADD,
+    MINUS: BINARY_SUBTRACT,
+    STAR: BINARY_MULTIPLY,
+    SLASH: BINARY_DIVIDE,
+}
+
+# The operands are unsigned 16 bits integers
+MAX_OPERAND = 0xFFFF
+
+
+class Code(object):
+    """
+    The Code is the bytecode of a function body: `instructions` holds pairs of an opcode and its operand.
+    The operand of an instruction indexes:
+        - LOAD_CONST: `constants`
+        - LOAD_LOCAL, STORE_LOCAL: the values of the frame
+        - LOAD_OUTER, STORE_OUTER: `outers`, the (display index, slot) of the variables of the enclosing frames
+        - CHECK_OPERANDS, CHECK_VALUE, RAISE: `errors`, the message and the node of the error to raise
+        - BINARY_DIVIDE: `errors`, the node of the division, raising an ArithmeticError as a division by zero
+        - CALL, TAIL_CALL: `calls`, the CallSite of the call and the number of its arguments
+    The names of the local variables are only used by the disassembler.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.instructions = array('H')
+        self.constants = []
+        self.outers = []
+        self.errors = []
+        self.calls = []
+        self.local_names = {}
+        self._indices = {}
+
+    def __len__(self):
+        return len(self.instructions) // 2
+
+    def emit(self, opcode, operand=0):
+        if operand > MAX_OPERAND:
+            raise SourceError("Function too large to be compiled: %s" % self.name)
+        self.instructions.append(opcode)
+        self.instructions.append(operand)
+
+    def index(self, table, key, value):
+        """
+        Return the index of the value in one of the tables of the code, adding it if needed
+        """
+        index = self._indices.get((id(table), key))
+        if index is None:
+            index = self._indices[(id(table), key)] = len(table)
+            table.append(value)
+        return index
+
+
+class BytecodeCompiler(NodeVisitor):
+    """
+    The BytecodeCompiler compiles the analyzed body of a function into the Code run by the VirtualMachine.
+    The stack machine evaluates the operands of an operation before it. Each statement leaves its value on the stack,
+    the value of the previous statement being popped, so the last one is the value returned.
+    A call pops its arguments and pushes the value returned, a call ending the body returns its TailCall.
+    """
+
+    def compile(self, function):
+        """
+        Return the Code of the body of the FunctionSymbol
+        """
+        self.code = Code(function.name)
+        body = function.body
+        tail = body[-1] if body and isinstance(body[-1], Call) else None
+        for position, statement in enumerate(body if tail is None else body[:-1]):
+            if position > 0:
+                self.code.emit(POP_TOP)
+            self.visit(statement)
+        if tail is not None:
+            # TAIL_CALL returns the TailCall of the call, the values below its arguments being left
+            self.arguments(tail)
+            self.code.emit(TAIL_CALL, self.call(tail))
+        else:
+            if not body:
+                self.constant(None)
+            self.code.emit(RETURN_VALUE)
+        for declaration in function.params + function.body:
+            if isinstance(declaration, VariableDeclaration) and declaration.slot is not None:
+                self.code.local_names[declaration.slot] = declaration.symbol.name
+        return self.code
+
+    def constant(self, value):
+        self.code.emit(LOAD_CONST, self.code.index(self.code.constants, constant_key(value), value))
+
+    def check(self, opcode, message, node):
+        self.code.emit(opcode, self.code.index(self.code.errors, (message, id(node)), (message, node)))
+
+    def call(self, node):
+        name = node.symbol.name
+        count = len(node.arguments)
+        # The calls of a function from the code share their CallSite
+        return self.code.index(self.code.calls, (name, count), (CallSite(name), count))
+
+    def arguments(self, node):
+        for argument in node.arguments:
+            self.visit(argument)
+
+    def outer(self, node):
+        index = -1 - node.depth
+        return self.code.index(self.code.outers, (index, node.slot), (index, node.slot, node.name))
+
+    def visit_Num(self, node):
+        self.constant(node.value)
+
+    def visit_BinOp(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+        # Only a variable or a call may give None
+        if may_be_none(node.left) or may_be_none(node.right):
+            self.check(CHECK_OPERANDS, "Try to compute a not initialized variable", node)
+        opcode = BINARY_OPCODES.get(node.op.type)
+        if opcode is None:
+            self.check(RAISE, "Unknown Error", node)
+        elif opcode == BINARY_DIVIDE:
+            self.check(BINARY_DIVIDE, "ArithmeticError", node)
+        else:
+            self.code.emit(opcode)
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.expr, Num):
+            self.constant(-node.expr.value if node.op.type == MINUS else node.expr.value)
+            return
+        self.visit(node.expr)
+        if may_be_none(node.expr):
+            self.check(CHECK_VALUE, "Try to compute a not initialized variable", node)
+        if node.op.type == MINUS:
+            self.code.emit(UNARY_NEGATIVE)
+
+    def visit_VariableAssignment(self, node):
+        self.visit(node.right)
+        if may_be_none(node.right):
+            self.check(CHECK_VALUE, "Try to assign a variable to a not initialized variable", node)
+        symbol = node.left
+        if symbol.slot is None:
+            self.check(RAISE, "Try to get value of an undeclared variable", symbol)
+        elif symbol.depth == 0:
+            self.code.emit(STORE_LOCAL, symbol.slot)
+        else:
+            self.code.emit(STORE_OUTER, self.outer(symbol))
+
+    def visit_VariableDeclaration(self, node):
+        if node.expr is None:
+            self.constant(None)
+        else:
+            self.visit(node.expr)
+        self.code.emit(STORE_LOCAL, node.slot)
+
+    def visit_Call(self, node):
+        self.arguments(node)
+        self.code.emit(CALL, self.call(node))
+
+    def visit_Symbol(self, node):
+        if node.slot is None:
+            self.check(RAISE, "Try to get value of an undeclared variable", node)
+        elif node.depth == 0:
+            self.code.emit(LOAD_LOCAL, node.slot)
+        else:
+            self.code.emit(LOAD_OUTER, self.outer(node))
+
+
+def disassemble(code):
+    """
+    Return the listing of the instructions of the Code, one by line
+    """
+    lines = ["Code of %s: %d instructions, %d constants" % (code.name, len(code), len(code.constants))]
+    instructions = code.instructions
+    for offset in range(0, len(instructions), 2):
+        opcode, operand = instructions[offset], instructions[offset + 1]
+        if opcode == LOAD_CONST:
+            argument = "%d (%r)" % (operand, code.constants[operand])
+        elif opcode in (LOAD_LOCAL, STORE_LOCAL):
+            argument = "%d (%s)" % (operand, code.local_names.get(operand, "?"))
+        elif opcode in (LOAD_OUTER, STORE_OUTER):
+            index, slot, name = code.outers[operand]
+            argument = "%d (%s: display[%d][%d])" % (operand, name, index, slot)
+        elif opcode in (CALL, TAIL_CALL):
+            site, count = code.calls[operand]
+            argument = "%d (%s with %d arguments)" % (operand, site.name, count)
+        elif opcode in (CHECK_OPERANDS, CHECK_VALUE, RAISE, BINARY_DIVIDE):
+            argument = "%d (%s)" % (operand, code.errors[operand][0])
+        else:
+            argument = ""
+        lines.append("%6d %-16s %s" % (offset // 2, OPCODE_NAMES[opcode], argument))
+    return "\n".join(lines)
@@ -0,0 +1,226 @@
+import contextlib
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import time
+
+from parsing.flatast import FlatAST
+
+# Changed whenever the cached trees would not be read or interpreted the same way anymore
+CACHE_VERSION = 7
+
+# The cached trees are dropped with the interpreter version: the version of the cache and of Python, for marshal
+VERSION_TAG = ("horilang-%d-%s" % (CACHE_VERSION, sys.implementation.cache_tag)).encode()
+
+MAGIC = b"HLC\x00"
+SUFFIX = ".hlc"
+
+CODE_MAGIC = b"HLP\x00"
+CODE_SUFFIX = ".hlp"
+
+# The suffixes of the files of the caches sharing a directory, evicted together
+SUFFIXES = (SUFFIX, CODE_SUFFIX)
+
+TEMPORARY_SUFFIX = ".tmp"
+# The age in seconds of a temporary file left by a process stopped while writing it
+STALE_AGE = 60 * 60
+
+# The number of bytes written by the process in each directory since its last eviction
+_written = {}
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# The part of `max_size` the process writes in a directory before evicting it again
+EVICTION_FRACTION = 0.25
+
+# The number of bytes read at once to hash a source
+READ_SIZE = 1024 * 1024
+
+
+def default_directory():
+    return os.environ.get("HORILANG_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "horilang")
+
+
+class ASTCache(object):
+    """
+    The ASTCache keeps on disk the analyzed tree of the programs run, like the .pyc files of Python.
+    A tree is stored as a FlatAST serialized by marshal, in a file named after the key of its source:
+    the hash of the source content and of the interpreter version.
+
+    The files are written to a temporary file then renamed, so a reader sees a whole file or none:
+    many processes can share the cache without locking. A file that cannot be read is a miss.
+    The ASTCache and the CodeCache share their directory and its `max_size`: after its first write in a directory,
+    a process removes the least recently used files of both caches until they fit in `max_size` bytes,
+    the modification time of a file being updated on each hit, and the stale temporary files.
+    The whole directory being scanned, it is only evicted again once the process has written
+    EVICTION_FRACTION of `max_size` bytes more in it.
+    """
+
+    magic = MAGIC
+    suffix = SUFFIX
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory or default_directory()
+        self.max_size = max_size
+
+    def key(self, file):
+        """
+        Return the key of the source read from the given binary file
+        """
+        digest = hashlib.sha256(VERSION_TAG + b"\x00")
+        chunk = file.read(READ_SIZE)
+        while chunk:
+            digest.update(chunk)
+            chunk = file.read(READ_SIZE)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def load(self, key):
+        """
+        Return the tree and the warnings stored for the key, or None on a miss
+        """
+        data = self.read(key)
+        if data is None:
+            return None
+        try:
+            tree, warnings = marshal.loads(data)
+            return FlatAST.loads(tree), warnings
+        except (EOFError, ValueError, TypeError):
+            return None
+
+    def store(self, key, flat, warnings=()):
+        """
+        Store the tree and the warnings of the source with the given key
+        """
+        self.write(key, marshal.dumps((flat.dumps(), [str(warning) for warning in warnings])))
+
+    def read(self, key):
+        """
+        Return the data stored for the key, or None on a miss
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        if not data.startswith(self.magic):
+            return None
+        try:
+            # The file is the most recently used one
+            os.utime(path)
+        except OSError:
+            pass
+        return data[len(self.magic):]
+
+    def write(self, key, data):
+        """
+        Store the data with the given key, then evict the directory on the first write of the process,
+        and whenever the bytes written since the last eviction exceed EVICTION_FRACTION of `max_size`.
+        The cache being only an optimization, an error while writing is ignored.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(prefix=".", suffix=TEMPORARY_SUFFIX, dir=self.directory)
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(self.magic + data)
+                os.replace(temporary, self.path(key))
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(temporary)
+                raise
+        except OSError:
+            return
+        written = _written.get(self.directory)
+        if written is None or written + len(data) > self.max_size * EVICTION_FRACTION:
+            # The file written is counted by the eviction
+            _written[self.directory] = 0
+            self.evict()
+        else:
+            _written[self.directory] = written + len(data)
+
+    def evict(self):
+        """
+        Remove the least recently used files of the caches until they fit in `max_size`,
+        and the temporary files older than STALE_AGE
+        """
+        entries = []
+        stale = time.time() - STALE_AGE
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    name = entry.name
+                    if name.endswith(SUFFIXES):
+                        try:
+                            status = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((status.st_mtime, status.st_size, entry.path))
+                    elif name.startswith(".") and name.endswith(TEMPORARY_SUFFIX):
+                        try:
+                            if entry.stat().st_mtime < stale:
+                                os.unlink(entry.path)
+                        except OSError:
+                            # Renamed or removed by another process
+                            pass
+        except OSError:
+            return
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        entries.sort()
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # Already removed by another process
+                pass
+            size -= entry_size
+
+
+class CodeCache(ASTCache):
+    """
+    The CodeCache keeps the Python code objects compiled from the source generated by the PythonTranspiler,
+    keyed by the hash of that source: in memory for the process, and on disk, serialized by marshal,
+    next to the trees of the ASTCache and evicted with them.
+    """
+
+    magic = CODE_MAGIC
+    suffix = CODE_SUFFIX
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        super().__init__(directory, max_size)
+        # The code objects already loaded or compiled by the process
+        self.codes = {}
+
+    def key(self, source):
+        """
+        Return the key of the given Python source
+        """
+        return hashlib.sha256(VERSION_TAG + b"\x00" + source.encode()).hexdigest()
+
+    def compile(self, source, filename):
+        """
+        Return the code object of the Python source, only compiling it if it is not cached
+        """
+        key = self.key(source)
+        code = self.codes.get(key)
+        if code is not None:
+            return code
+        data = self.read(key)
+        if data is not None:
+            try:
+                code = marshal.loads(data)
+            except (EOFError, ValueError, TypeError):
+                code = None
+        if code is None:
+            code = compile(source, filename, "exec")
+            self.write(key, marshal.dumps(code))
+        self.codes[key] = code
+        return code
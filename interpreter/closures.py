@@ -0,0 +1,247 @@
+from parsing.ast import NodeVisitor, Num, UnaryOp, Call
+from parsing.tokens import PLUS, STAR, SLASH, MINUS
+from parsing.source import SourceError
+from interpreter.interpreter import Interpreter, CallSite, TailCall, may_be_none, arithmetic_error
+
+
+def error(msg, node):
+    raise SourceError.at(msg, node)
+
+
+def binary_operation(op_type, left, right, checked, node, constant=None):
+    """
+    Return the closure applying the operator to the values of the `left` and `right` closures.
+    Only a variable or a call may give None: the values are `checked` only if an operand is one.
+    The `constant` value of the right operand, if known and not checked, is used without calling `right`.
+    """
+    if op_type == PLUS:
+        if constant is not None:
+            return lambda frame: left(frame) + constant
+        if not checked:
+            return lambda frame: left(frame) + right(frame)
+
+        def operation(frame):
+            left_value = left(frame)
+            right_value = right(frame)
+            if left_value is None or right_value is None:
+                error("Try to compute a not initialized variable", node)
+            return left_value + right_value
+    elif op_type == MINUS:
+        if constant is not None:
+            return lambda frame: left(frame) - constant
+        if not checked:
+            return lambda frame: left(frame) - right(frame)
+
+        def operation(frame):
+            left_value = left(frame)
+            right_value = right(frame)
+            if left_value is None or right_value is None:
+                error("Try to compute a not initialized variable", node)
+            return left_value - right_value
+    elif op_type == STAR:
+        if constant is not None:
+            return lambda frame: left(frame) * constant
+        if not checked:
+            return lambda frame: left(frame) * right(frame)
+
+        def operation(frame):
+            left_value = left(frame)
+            right_value = right(frame)
+            if left_value is None or right_value is None:
+                error("Try to compute a not initialized variable", node)
+            return left_value * right_value
+    elif op_type == SLASH:
+        # A division may raise an ArithmeticError, as a division by zero
+        if constant is not None:
+            def operation(frame):
+                try:
+                    return left(frame) / constant
+                except ArithmeticError as arithmetic:
+                    arithmetic_error(arithmetic, node)
+        elif not checked:
+            def operation(frame):
+                try:
+                    return left(frame) / right(frame)
+                except ArithmeticError as arithmetic:
+                    arithmetic_error(arithmetic, node)
+        else:
+            def operation(frame):
+                left_value = left(frame)
+                right_value = right(frame)
+                if left_value is None or right_value is None:
+                    error("Try to compute a not initialized variable", node)
+                try:
+                    return left_value / right_value
+                except ArithmeticError as arithmetic:
+                    arithmetic_error(arithmetic, node)
+    else:
+        error("Unknown Error", node)
+    return operation
+
+
+class ClosureCompiler(NodeVisitor):
+    """
+    The ClosureCompiler compiles the body of a function into Python closures, once.
+    Each node gives a closure taking the Frame of the call and returning the value of the node:
+    the constants are captured, the operators and the slots of the variables are chosen while compiling,
+    so running a function is only calling closures, without any visit.
+    A call is run by the `invoke` method of the interpreter with the CallSite of the closure,
+    a call ending the body gives its TailCall.
+    """
+
+    def __init__(self, invoke):
+        self.invoke = invoke
+
+    def compile(self, function):
+        """
+        Return the closure running the body of the FunctionSymbol in a frame, returning the value of its last statement
+        """
+        body = function.body
+        if body and isinstance(body[-1], Call):
+            statements = tuple(self.visit(statement) for statement in body[:-1])
+            site = CallSite(body[-1].symbol.name)
+            arguments = tuple(self.visit(argument) for argument in body[-1].arguments)
+
+            def tail(frame):
+                for statement in statements:
+                    statement(frame)
+                return TailCall(site, [argument(frame) for argument in arguments])
+
+            return tail
+
+        statements = tuple(self.visit(statement) for statement in body)
+        if len(statements) == 1:
+            return statements[0]
+
+        def body(frame):
+            value = None
+            for statement in statements:
+                value = statement(frame)
+            return value
+
+        return body
+
+    def visit_Num(self, node):
+        value = node.value
+        return lambda frame: value
+
+    def visit_BinOp(self, node):
+        checked = may_be_none(node.left) or may_be_none(node.right)
+        constant = self.constant(node.right) if not checked else None
+        return binary_operation(node.op.type, self.visit(node.left), self.visit(node.right), checked, node, constant)
+
+    def constant(self, node):
+        """
+        Return the value of a number or of a unary operator applied to a number, None for any other node
+        """
+        if isinstance(node, Num):
+            return node.value
+        if isinstance(node, UnaryOp):
+            value = self.constant(node.expr)
+            if value is not None and node.op.type == MINUS:
+                return -value
+            return value
+        return None
+
+    def visit_UnaryOp(self, node):
+        constant = self.constant(node)
+        if constant is not None:
+            return lambda frame: constant
+        expr = self.visit(node.expr)
+        checked = may_be_none(node.expr)
+        if node.op.type != MINUS:
+            if not checked:
+                return expr
+
+            def plus(frame):
+                value = expr(frame)
+                if value is None:
+                    error("Try to compute a not initialized variable", node)
+                return value
+
+            return plus
+
+        if not checked:
+            return lambda frame: -expr(frame)
+
+        def minus(frame):
+            value = expr(frame)
+            if value is None:
+                error("Try to compute a not initialized variable", node)
+            return -value
+
+        return minus
+
+    def visit_VariableAssignment(self, node):
+        expr = self.visit(node.right)
+        symbol = node.left
+        if symbol.slot is None:
+            return lambda frame: error("Try to get value of an undeclared variable", symbol)
+        slot = symbol.slot
+        index = -1 - symbol.depth
+        checked = may_be_none(node.right)
+
+        if index == -1 and not checked:
+            def assign_local(frame):
+                value = frame.values[slot] = expr(frame)
+                return value
+
+            return assign_local
+
+        def assign(frame):
+            value = expr(frame)
+            if value is None:
+                error("Try to assign a variable to a not initialized variable", node)
+            frame.display[index][slot] = value
+            return value
+
+        return assign
+
+    def visit_VariableDeclaration(self, node):
+        slot = node.slot
+        if node.expr is None:
+            def declare_none(frame):
+                frame.values[slot] = None
+
+            return declare_none
+
+        expr = self.visit(node.expr)
+
+        def declare(frame):
+            value = frame.values[slot] = expr(frame)
+            return value
+
+        return declare
+
+    def visit_Call(self, node):
+        invoke = self.invoke
+        site = CallSite(node.symbol.name)
+        arguments = tuple(self.visit(argument) for argument in node.arguments)
+        return lambda frame: invoke(site, [argument(frame) for argument in arguments])
+
+    def visit_Symbol(self, node):
+        if node.slot is None:
+            return lambda frame: error("Try to get value of an undeclared variable", node)
+        slot = node.slot
+        if node.depth == 0:
+            return lambda frame: frame.values[slot]
+        index = -1 - node.depth
+        return lambda frame: frame.display[index][slot]
+
+
+class ClosureInterpreter(Interpreter):
+    """
+    The ClosureInterpreter runs the functions compiled by the ClosureCompiler, each one being compiled on its first call
+    """
+
+    def __init__(self, global_table):
+        super().__init__(global_table)
+        self.compiler = ClosureCompiler(self.invoke)
+        # The compiled body of each FunctionDeclaration
+        self.compiled = {}
+
+    def execute(self, function, frame):
+        body = self.compiled.get(function.declaration)
+        if body is None:
+            body = self.compiled[function.declaration] = self.compiler.compile(function)
+        return body(frame)
@@ -1,122 +1,277 @@
-from parsing.ast import NodeVisitor
-from symbol.stack import StackManager
-from symbol.symbol import ValSymbol, VarSymbol, FunctionSymbol
+from parsing.ast import NodeVisitor, VariableDeclaration, Symbol, Call, constant_key
+from symbol.stack import Frame
+from symbol.symbol import FunctionSymbol
 from parsing.tokens import PLUS, STAR, SLASH, MINUS
+from parsing.source import SourceError
+from interpreter.memo import Memo, MISSING
+
+
+def may_be_none(node):
+    """
+    Return whether the value of the expression may be None: the value of a variable, or returned by a call
+    """
+    return isinstance(node, (Symbol, Call))
+
+
+def arithmetic_error(error, node):
+    """
+    Raise the SourceError of the ArithmeticError raised by the operation of the node, as a division by zero
+    """
+    raise SourceError.at("%s: %s" % (type(error).__name__, error), node) from None
+
+
+class CallSite(object):
+    """
+    The CallSite is the inline cache of a call: the FunctionSymbol called is looked up by name
+    in the GlobalSymbolTable once, then kept with the version of the table. It is looked up again
+    when the version of the table has changed, or when the site is run with another table:
+    the site of a Call node is kept by the node, so it is shared by the interpreters running the tree.
+    """
+
+    __slots__ = ('name', 'function', 'version')
+
+    def __init__(self, name):
+        self.name = name
+        self.function = None
+        # No table has this version: the first call looks the function up
+        self.version = -1
+
+
+class TailCall(object):
+    """
+    The TailCall is returned by a function body ending with a call, instead of the value of the call:
+    the CallSite of the call and the values of its arguments
+    """
+
+    __slots__ = ('site', 'arguments')
+
+    def __init__(self, site, arguments):
+        self.site = site
+        self.arguments = arguments
 
 
 class Interpreter(NodeVisitor):
     """
     The Interpreter have to interpret the whole tree
+    A call runs the function in a new frame, its arguments being bound to the slots of its parameters.
+    A call ending a function body is a tail call: the frame of the function called replaces the frame of the caller,
+    so a chain of tail calls runs without growing the Python stack or keeping its frames.
+    The function called is found by the CallSite of the call, kept by the Call node.
+    The engines compiling the functions only change `execute()`.
+    The values of the @memoize functions are kept by a Memo for each one, the calls found in it are not run.
     """
 
     def __init__(self, global_table):
-        self._sm = StackManager(global_table)
+        self.global_table = global_table
+        # The variables are read and written in the frames at the slots resolved by the SemanticAnalyzer
+        self.global_frame = self.frame = Frame.from_scope(global_table)
+        # The Memo of each @memoize FunctionSymbol
+        self.memos = {symbol: Memo(symbol.name) for symbol in global_table._symbols.values()
+                      if isinstance(symbol, FunctionSymbol) and symbol.declaration is not None
+                      and symbol.declaration.annotated("memoize")}
 
-    def error(self, msg):
-        raise RuntimeError("Error: " + msg)
+    def error(self, msg, node=None):
+        raise SourceError.at(msg, node)
 
     def interpret(self):
-        main = self._sm.stack.last().scope.lookup("main")
+        main = self.global_table.lookup("main")
         if main is None:
             self.error("Undefined main reference")
         if isinstance(main, FunctionSymbol):
-            return_value = self.visit(main)
+            try:
+                return_value = self.visit(main)
+            except RecursionError as error:
+                # Only the calls which are not in tail position use the Python stack, and the operations
+                # of the expressions unless the IterativeInterpreter computes them
+                function = getattr(error, "function", main)
+                self.error("Too many nested calls, or too deep an expression in %s" % function.name,
+                           function.declaration.symbol)
             print("\n\nMain returned: %s" % return_value)
+            for memo in self.memos.values():
+                print(memo)
         else:
             self.error("\"main\" must refer to function")
 
     def visit_Num(self, node):
-        self._sm.stack.last().return_value = node.value
-
-        return VarSymbol('anonymous', node.type, node.value)
+        return node.value
 
     def visit_BinOp(self, node):
+        # The values are plain Python values, their types having been checked by the SemanticAnalyzer:
+        # each operation computes a new value without changing its operands
         left = self.visit(node.left)
         right = self.visit(node.right)
 
-        if left.type != right.type:
-            print(left)
-            print(right)
-            self.error("Types mismatch")
-        if left.value is None or right.value is None:
-            self.error("Try to compute a not initialized variable")
-
-        if node.op.type is PLUS:
-            left.value += right.value
-        elif node.op.type is STAR:
-            left.value *= right.value
-        elif node.op.type is SLASH:
-            left.value /= right.value
-        elif node.op.type is MINUS:
-            left.value -= right.value
-        else:
-            self.error("Unknown Error")
+        if left is None or right is None:
+            self.error("Try to compute a not initialized variable", node)
 
-        self._sm.stack.last().return_value = left.value
-        return left
+        if node.op.type == PLUS:
+            return left + right
+        elif node.op.type == STAR:
+            return left * right
+        elif node.op.type == SLASH:
+            try:
+                return left / right
+            except ArithmeticError as error:
+                arithmetic_error(error, node)
+        elif node.op.type == MINUS:
+            return left - right
+        else:
+            self.error("Unknown Error", node)
 
     def visit_UnaryOp(self, node):
-        expr = self.visit(node.expr)
-        if expr.value is None:
-            self.error("Try to compute a not initialized variable")
+        value = self.visit(node.expr)
+        if value is None:
+            self.error("Try to compute a not initialized variable", node)
 
-        self._sm.stack.last().return_value = expr.value
-        return VarSymbol('anonymous', expr.type, -expr.value)
+        if node.op.type == MINUS:
+            return -value
+        return value
 
     def visit_VariableAssignment(self, node):
-        expr = self.visit(node.right)
-        if expr is None or expr.value is None:
-            self.error("Try to assign a variable to a not initialized variable")
-
-        symbol = self.visit(node.left)
-
-        if symbol.type is not expr.type:
-            self.error("Types mismatch")
-        symbol.value = expr.value
+        value = self.visit(node.right)
+        if value is None:
+            self.error("Try to assign a variable to a not initialized variable", node)
 
-        self._sm.stack.last().return_value = symbol.value
-        return True
+        symbol = node.left
+        if symbol.slot is None:
+            self.error("Try to get value of an undeclared variable", symbol)
+        self.frame.display[-1 - symbol.depth][symbol.slot] = value
+        return value
 
     def visit_VariableDeclaration(self, node):
         value = None
         if node.expr is not None:
             value = self.visit(node.expr)
-            if value is not None:
-                value = value.value
 
-        if node.const is True:
-            self._sm.stack.last().scope.insert(ValSymbol(node.symbol.name, node.type.name, value))
-        else:
-            self._sm.stack.last().scope.insert(VarSymbol(node.symbol.name, node.type.name, value))
-
-        self._sm.stack.last().return_value = value
-        return True
+        self.frame.values[node.slot] = value
+        return value
 
     def visit_FunctionSymbol(self, node):
-        # Create a new scope
-        self._sm.stack.add(node.name)
-        for statement in node.body:
-            ret = self.visit(statement)
-            if ret is None:
-                break
+        # Create the frame of the function, enclosed by the global frame
+        caller = self.frame
+        self.frame = self.enter(node, [])
+        return_value = self.call(node)
+
+        declarations = [statement for statement in node.params + node.body
+                        if isinstance(statement, VariableDeclaration)]
+        print(self.frame.symbol_table(declarations, self.global_table))
+
+        # Go back to the frame of the caller
+        self.frame = caller
+        return return_value
+
+    def visit_Call(self, node):
+        return self.invoke(node.site or self.site(node), [self.visit(argument) for argument in node.arguments])
+
+    def site(self, node):
+        """
+        Create the CallSite of the Call node, return it
+        """
+        site = node.site = CallSite(node.symbol.name)
+        return site
+
+    def resolve(self, site):
+        """
+        Look the function of the CallSite up in the GlobalSymbolTable, return it
+        """
+        site.function = self.global_table.lookup(site.name)
+        site.version = self.global_table.version
+        return site.function
+
+    def invoke(self, site, arguments):
+        """
+        Call the function of the CallSite with the values of its arguments, return its value
+        """
+        function = site.function if site.version == self.global_table.version else self.resolve(site)
+        return self.run(function, self.enter(function, arguments))
 
-        print(self._sm.stack.last().scope)
+    def enter(self, function, arguments):
+        """
+        Return the frame of a call of the FunctionSymbol: the arguments are bound to the first slots,
+        those of the parameters, then the parameters left are set to their default value, computed in the new frame
+        """
+        frame = Frame(function.name, function.declaration.frame_size, self.global_frame)
+        frame.values[:len(arguments)] = arguments
+        if len(arguments) < len(function.params):
+            caller = self.frame
+            self.frame = frame
+            for parameter in function.params[len(arguments):]:
+                self.visit(parameter)
+            self.frame = caller
+        return frame
 
-        return_value = self._sm.stack.last().return_value
-        # Pop the current scope
-        self._sm.stack.pop()
+    def call(self, function):
+        """
+        Run the body of the FunctionSymbol in the current frame, return the value of its last statement
+        """
+        return self.run(function, self.frame)
+
+    def run(self, function, frame):
+        """
+        Run the FunctionSymbol in the frame, then the functions it calls in tail position, each one in a frame
+        replacing the previous one but the given frame. Return the value of the last function.
+        A @memoize function is only run if the values of its parameters are not found in its Memo.
+        """
+        memos = self.memos
+        # The Memo and the key of each @memoize function of the chain not found in its Memo: they all return
+        # the value of the last function
+        missed = None
+        while True:
+            if memos:
+                memo = memos.get(function)
+                if memo is not None:
+                    # 0.0 and -0.0 are equal but must not share their value
+                    key = tuple(map(constant_key, frame.values[:len(function.params)]))
+                    value = memo.get(key)
+                    if value is not MISSING:
+                        break
+                    if missed is None:
+                        missed = []
+                    missed.append((memo, key))
+            try:
+                value = self.execute(function, frame)
+            except RecursionError as error:
+                # The error is located at the innermost function run
+                if not hasattr(error, "function"):
+                    error.function = function
+                raise
+            if value.__class__ is not TailCall:
+                break
+            site = value.site
+            function = site.function if site.version == self.global_table.version else self.resolve(site)
+            frame = self.enter(function, value.arguments)
+        if missed is not None:
+            for memo, key in missed:
+                memo.put(key, value)
+        return value
+
+    def execute(self, function, frame):
+        """
+        Run the body of the FunctionSymbol in the frame, return the value of its last statement,
+        or the TailCall of the call ending it
+        """
+        caller = self.frame
+        self.frame = frame
+        return_value = None
+        body = function.body
+        if body and isinstance(body[-1], Call):
+            for statement in body[:-1]:
+                self.visit(statement)
+            call = body[-1]
+            return_value = TailCall(call.site or self.site(call), [self.visit(argument) for argument in call.arguments])
+        else:
+            for statement in body:
+                return_value = self.visit(statement)
+        self.frame = caller
         return return_value
 
     def visit_FunctionDeclaration(self, node):
         pass
 
     def visit_Symbol(self, node):
-        symbol = self._sm.stack.last().scope.lookup(node.name)
-        if symbol is None:
-            self.error("Try to get value of an undeclared variable")
-
-        self._sm.stack.last().return_value = symbol.value
-        return symbol
+        if node.slot is None:
+            self.error("Try to get value of an undeclared variable", node)
+        return self.frame.display[-1 - node.depth][node.slot]
 
     def visit_Type(self, node):
         pass
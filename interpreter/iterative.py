@@ -0,0 +1,132 @@
+from interpreter.interpreter import Interpreter, arithmetic_error
+from parsing.ast import Num, BinOp, UnaryOp, Call, Symbol
+from parsing.flatast import VIEW_CLASSES
+from parsing.tokens import PLUS, STAR, SLASH, MINUS
+
+# The kinds of the expression nodes
+NUM, SYMBOL, BINARY, UNARY, CALL = range(5)
+EXPRESSION_KINDS = ((Num, NUM), (Symbol, SYMBOL), (BinOp, BINARY), (UnaryOp, UNARY), (Call, CALL))
+
+# The kind of each expression node class, the views of a FlatAST included
+KINDS = {node_class: kind for expression_class, kind in EXPRESSION_KINDS
+         for node_class in (expression_class,) + VIEW_CLASSES if issubclass(node_class, expression_class)}
+
+# Pushed on the stack above the value of the left operand of a binary operation and the operation, while its right
+# operand is computed: the operation is then applied to both values
+APPLY = object()
+# Pushed on the stack above a call, the values of the arguments computed and the index of the argument computed
+ARGUMENT = object()
+
+
+class IterativeInterpreter(Interpreter):
+    """
+    The IterativeInterpreter computes the expressions without any recursion, the value computed being kept in
+    a local variable. It goes down the left operands of the operations to a number, a variable or a call, pushing
+    the operations on a stack, then pops them to apply them to the value computed. A right operand which is
+    a number or a variable is read at once, otherwise the value of the left operand is pushed on the stack with
+    the operation, and the right operand is computed the same way. The stack is a Python list, holding both
+    the operations left to apply and the values of their operands already computed.
+    The depth of an expression is only bounded by the memory, and a loop iteration replaces a Python call by node.
+    The statements and the calls are run as by the Interpreter, a call of a function still using the Python stack.
+    """
+
+    def evaluate(self, node):
+        """
+        Return the value of the expression
+        """
+        kinds = KINDS
+        # The calls restore the frame: it is the same for the whole expression
+        display = self.frame.display
+        work = []
+        while True:
+            # Go down the left operands, the operations being applied once their left operand is computed
+            while True:
+                kind = kinds[type(node)]
+                if kind == BINARY:
+                    work.append(node)
+                    node = node.left
+                elif kind == UNARY:
+                    work.append(node)
+                    node = node.expr
+                else:
+                    break
+
+            if kind == SYMBOL:
+                if node.slot is None:
+                    self.error("Try to get value of an undeclared variable", node)
+                value = display[-1 - node.depth][node.slot]
+            elif kind == NUM:
+                value = node.value
+            elif node.arguments:
+                work += (node, 0, ARGUMENT)
+                node = node.arguments[0]
+                continue
+            else:
+                value = self.invoke(node.site or self.site(node), [])
+
+            # Apply the operations to the value computed, up to an operand left to compute
+            while work:
+                node = work.pop()
+                # The markers have no kind
+                kind = kinds.get(type(node))
+                if kind == BINARY:
+                    right = node.right
+                    kind = kinds[type(right)]
+                    if kind == SYMBOL:
+                        if right.slot is None:
+                            self.error("Try to get value of an undeclared variable", right)
+                        right = display[-1 - right.depth][right.slot]
+                    elif kind == NUM:
+                        right = right.value
+                    else:
+                        work += (value, node, APPLY)
+                        node = right
+                        break
+                elif kind == UNARY:
+                    if value is None:
+                        self.error("Try to compute a not initialized variable", node)
+                    if node.op.type == MINUS:
+                        value = -value
+                    continue
+                elif node is APPLY:
+                    node = work.pop()
+                    right = value
+                    value = work.pop()
+                else:
+                    # ARGUMENT: the value computed is the next argument of the call
+                    index = work.pop() + 1
+                    work.append(value)
+                    node = work[-1 - index]
+                    arguments = node.arguments
+                    if index < len(arguments):
+                        work += (index, ARGUMENT)
+                        node = arguments[index]
+                        break
+                    # The values of the arguments are above the call
+                    start = len(work) - index
+                    arguments = work[start:]
+                    del work[start - 1:]
+                    value = self.invoke(node.site or self.site(node), arguments)
+                    continue
+
+                if value is None or right is None:
+                    self.error("Try to compute a not initialized variable", node)
+                op = node.op.type
+                if op == PLUS:
+                    value = value + right
+                elif op == STAR:
+                    value = value * right
+                elif op == SLASH:
+                    try:
+                        value = value / right
+                    except ArithmeticError as error:
+                        arithmetic_error(error, node)
+                elif op == MINUS:
+                    value = value - right
+                else:
+                    self.error("Unknown Error", node)
+            else:
+                return value
+
+    # The statements visit their expressions: the operations are computed by `evaluate()`
+    visit_BinOp = visit_UnaryOp = visit_Call = evaluate
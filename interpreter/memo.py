@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+# The number of values kept for each @memoize function
+MEMO_CAPACITY = 1024
+
+# The value of a call not found in a Memo, as a call may return None
+MISSING = object()
+
+
+class Memo(object):
+    """
+    The Memo keeps the values returned by a @memoize function, by the values of its parameters.
+    At most `capacity` values are kept: the least recently used one is dropped for a new one.
+    `hits` and `misses` count the calls found and not found.
+    """
+
+    def __init__(self, name, capacity=MEMO_CAPACITY):
+        self.name = name
+        self.capacity = capacity
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return "Memoized %s: %d hits, %d misses, %d values kept" % (self.name, self.hits, self.misses,
+                                                                   len(self.values))
+
+    __repr__ = __str__
+
+    def get(self, key):
+        """
+        Return the value kept for the key, or MISSING
+        """
+        value = self.values.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.values.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.values[key] = value
+        if len(self.values) > self.capacity:
+            self.values.popitem(last=False)
@@ -0,0 +1,340 @@
+from parsing.ast import ExpressionVisitor, Num, Symbol, Call, VariableDeclaration, VariableAssignment
+from parsing.tokens import PLUS, STAR, SLASH, MINUS
+from parsing.source import SourceError
+from interpreter.cache import CodeCache
+from interpreter.interpreter import Interpreter, CallSite, TailCall, may_be_none, arithmetic_error
+
+OPERATORS = {PLUS: "+", MINUS: "-", STAR: "*", SLASH: "/"}
+
+# The precedence of the generated Python expressions, to only write the parentheses which are needed:
+# Python rejects too many nested parentheses
+PRECEDENCES = {PLUS: 1, MINUS: 1, STAR: 2, SLASH: 2}
+UNARY = 3
+ATOM = 4
+
+# The depth of the generated Python expressions beyond which an operand is computed into a temporary variable:
+# CPython rejects more than 200 nested parentheses and bounds the depth of the expressions it compiles
+MAX_DEPTH = 100
+
+FILENAME = "<horilang>"
+
+
+class Transpiled(object):
+    """
+    The Transpiled holds the Python source of a function body and what maps its errors back to the Horilang nodes:
+        - `errors`: the message and the node of the SourceError raised by `error(index)`
+        - `locations`: the node of each expression, by the (line, column, end column) of its Python source
+        - `statements`: the statement of each line, when no expression is found
+    The name of the function called by each `site<index>` is in `calls`.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lines = []
+        self.errors = []
+        self.calls = []
+        self.locations = {}
+        self.statements = {}
+
+    @property
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
+    def location(self, code, offset):
+        """
+        Return the node of the instruction at the given offset of the code object compiled from the source
+        """
+        positions = list(code.co_positions())
+        line, _, column, end_column = positions[offset // 2]
+        return self.locations.get((line, column, end_column), self.statements.get(line))
+
+
+class PythonTranspiler(ExpressionVisitor):
+    """
+    The PythonTranspiler writes the analyzed body of a function as a Python function `body(frame)`,
+    run by the evaluator of CPython. The local variables of the frame are held by Python local variables,
+    read from the frame at the start of the call and written back at its end. The variables of the enclosing
+    frames are read and written at their slot in the display. The values are plain Python values,
+    as in the Interpreter: the types and the `val` have been checked by the SemanticAnalyzer.
+
+    An operation on a not initialized variable is only checked by Python, which raises a TypeError:
+    the Horilang error is found back from the position of the failing instruction.
+    A call is run by `invoke(site, arguments)` with the CallSite of the function called, a call ending the body
+    is returned as a TailCall.
+
+    The visit of an expression returns its text, the spans of its nodes in it, its precedence, its depth and
+    the number of lines of the body once it is visited. An operand deeper than MAX_DEPTH is computed into a temporary
+    variable by a line of its own, as are the operands computed before it, so they are still computed in their order.
+    """
+
+    def transpile(self, function):
+        """
+        Return the Transpiled body of the FunctionSymbol
+        """
+        self.transpiled = transpiled = Transpiled(function.name)
+        # The variable holding each enclosing frame, by index in the display
+        self.outers = {}
+        self.temporaries = 0
+        # The text, the spans of the expressions and the statement of each line of the body
+        self.body = []
+        for position, statement in enumerate(function.body):
+            self.statement = statement
+            self.last = position == len(function.body) - 1
+            if isinstance(statement, (VariableDeclaration, VariableAssignment)):
+                self.visit(statement)
+            elif self.last and isinstance(statement, Call):
+                # The arguments are computed before the local variables are written back
+                arguments = [self.visit(argument) for argument in statement.arguments]
+                self.line("value = ", self.call(statement, "TailCall", arguments))
+            else:
+                self.line("value = " if self.last else "", self.expression(statement))
+        if not function.body:
+            self.line("value = None")
+
+        names = "".join("v%d, " % slot for slot in range(function.declaration.frame_size))
+        lines = transpiled.lines
+        lines.append("def body(frame):")
+        if names:
+            lines.append("    %s= frame.values" % names)
+        for index, name in sorted(self.outers.items()):
+            lines.append("    %s = frame.display[%d]" % (name, index))
+        for text, spans, statement in self.body:
+            lines.append("    " + text)
+            transpiled.statements[len(lines)] = statement
+            for start, end, node in spans:
+                transpiled.locations[(len(lines), start + 4, end + 4)] = node
+        if names:
+            lines.append("    frame.values[:] = (%s)" % names)
+        lines.append("    return value")
+        return transpiled
+
+    def line(self, text, expression=None, index=None):
+        """
+        Add a line to the body, made of the text followed by the (text, spans) of an expression,
+        at the given index of the body or at its end
+        """
+        spans = []
+        if expression is not None:
+            spans = [(start + len(text), end + len(text), node) for start, end, node in expression[1]]
+            text += expression[0]
+        if index is None:
+            self.body.append((text, spans, self.statement))
+        else:
+            self.body.insert(index, (text, spans, self.statement))
+
+    def temporary(self, expression, index):
+        """
+        Compute the expression into a new temporary variable by a line inserted at the given index of the body,
+        and return the text and the spans of the variable
+        """
+        name = "t%d" % self.temporaries
+        self.temporaries += 1
+        self.line(name + " = ", expression, index)
+        return name, []
+
+    def error(self, message, node):
+        self.transpiled.errors.append((message, node))
+        return "error(%d)" % (len(self.transpiled.errors) - 1)
+
+    def variable(self, node):
+        """
+        Return the Python expression of the variable of the Symbol
+        """
+        if node.depth == 0:
+            return "v%d" % node.slot
+        index = -1 - node.depth
+        name = self.outers.get(index)
+        if name is None:
+            name = self.outers[index] = "outer%d" % -index
+        return "%s[%d]" % (name, node.slot)
+
+    def expression(self, node):
+        """
+        Return the text of the expression and the spans of its nodes in it
+        """
+        return self.operands([node], [self.visit(node)], [0])[0][:2]
+
+    def operands(self, nodes, values, precedences):
+        """
+        Return the text, the spans and the depth of the operands, given their nodes and the values of their visits,
+        each one parenthesized if its precedence is lower than the given one.
+        When an operand has added lines to the body, the operands computed before it are computed into temporaries
+        by the lines preceding its own: a constant or a local variable does not change meanwhile.
+        """
+        operands = []
+        # The number of lines inserted into the body, and the number of lines once the last operand is computed
+        inserted = 0
+        end = None
+        for node, (text, spans, precedence, depth, lines), lowest in zip(nodes, values, precedences):
+            lines += inserted
+            if depth >= MAX_DEPTH:
+                text, spans = self.temporary((text, spans), lines)
+                precedence = ATOM
+                depth = 1
+                inserted += 1
+                lines += 1
+            elif precedence < lowest:
+                text = "(" + text + ")"
+                spans = [(start + 1, stop + 1, span_node) for start, stop, span_node in spans]
+            if end is not None and lines > end:
+                for position, previous in enumerate(nodes[:len(operands)]):
+                    if not isinstance(previous, Num) and not (isinstance(previous, Symbol) and previous.depth == 0):
+                        operands[position] = self.temporary(operands[position][:2], end) + (1,)
+                        end += 1
+                        inserted += 1
+                        lines += 1
+            operands.append((text, spans, depth))
+            end = lines
+        return operands
+
+    def visit_Num(self, node):
+        return repr(node.value), [], ATOM, 1, len(self.body)
+
+    def leave_BinOp(self, node, left, right):
+        precedence = PRECEDENCES.get(node.op.type)
+        if precedence is None:
+            return self.error("Unknown Error", node), [], ATOM, 1, len(self.body)
+        # The operators are left associative: the right operand is parenthesized at the same precedence
+        (left_text, left_spans, left_depth), (right_text, right_spans, right_depth) = self.operands(
+            (node.left, node.right), (left, right), (precedence, precedence + 1))
+        left_text += " %s " % OPERATORS[node.op.type]
+        text = left_text + right_text
+        spans = left_spans + [(start + len(left_text), end + len(left_text), span_node)
+                              for start, end, span_node in right_spans]
+        return text, spans + [(0, len(text), node)], precedence, max(left_depth, right_depth) + 1, len(self.body)
+
+    def leave_UnaryOp(self, node, expr):
+        if node.op.type != MINUS and not may_be_none(node.expr):
+            return expr
+        # `+` is kept before a variable or a call only to check its value is not None
+        operator = "-" if node.op.type == MINUS else "+"
+        (text, spans, depth), = self.operands((node.expr,), (expr,), (UNARY,))
+        text = operator + text
+        spans = [(start + 1, end + 1, span_node) for start, end, span_node in spans]
+        return text, spans + [(0, len(text), node)], UNARY, depth + 1, len(self.body)
+
+    def call(self, node, function, arguments):
+        """
+        Return the text, the spans and the depth of the call of `function` with the name of the Call
+        and the values of the visits of its arguments
+        """
+        calls = self.transpiled.calls
+        if node.symbol.name not in calls:
+            calls.append(node.symbol.name)
+        text = "%s(site%d, [" % (function, calls.index(node.symbol.name))
+        spans = []
+        depth = 0
+        arguments = self.operands(node.arguments, arguments, [0] * len(arguments))
+        for position, (argument_text, argument_spans, argument_depth) in enumerate(arguments):
+            if position > 0:
+                text += ", "
+            spans += [(start + len(text), end + len(text), span_node) for start, end, span_node in argument_spans]
+            text += argument_text
+            depth = max(depth, argument_depth)
+        text += "])"
+        return text, spans + [(0, len(text), node)], depth + 1
+
+    def leave_Call(self, node, arguments):
+        text, spans, depth = self.call(node, "invoke", arguments)
+        return text, spans, ATOM, depth, len(self.body)
+
+    def visit_Symbol(self, node):
+        if node.slot is None:
+            return self.error("Try to get value of an undeclared variable", node), [], ATOM, 1, len(self.body)
+        return self.variable(node), [], ATOM, 1, len(self.body)
+
+    def visit_VariableDeclaration(self, node):
+        target = "v%d = " % node.slot
+        if self.last:
+            target = "value = " + target
+        if node.expr is None:
+            self.line(target + "None")
+        else:
+            self.line(target, self.expression(node.expr))
+
+    def visit_VariableAssignment(self, node):
+        symbol = node.left
+        checked = may_be_none(node.right)
+        if symbol.slot is None or checked:
+            self.line("value = ", self.expression(node.right))
+            if checked:
+                self.line("if value is None:")
+                self.line("    " + self.error("Try to assign a variable to a not initialized variable", node))
+            if symbol.slot is None:
+                self.line(self.error("Try to get value of an undeclared variable", symbol))
+            else:
+                self.line("%s = value" % self.variable(symbol))
+            return
+        target = "%s = " % self.variable(symbol)
+        if self.last:
+            target = "value = " + target
+        self.line(target, self.expression(node.right))
+
+
+class TranspiledInterpreter(Interpreter):
+    """
+    The TranspiledInterpreter runs the functions transpiled to Python by the PythonTranspiler, each one being
+    transpiled on its first call. Their code objects are cached by the CodeCache, in memory and on disk.
+    """
+
+    # The CodeCache shared by the interpreters, created on first use
+    default_cache = None
+
+    def __init__(self, global_table, cache=None):
+        super().__init__(global_table)
+        if cache is None:
+            if TranspiledInterpreter.default_cache is None:
+                TranspiledInterpreter.default_cache = CodeCache()
+            cache = TranspiledInterpreter.default_cache
+        self.cache = cache
+        self.transpiler = PythonTranspiler()
+        # The transpiled body and the Python function of each FunctionDeclaration
+        self.compiled = {}
+
+    def compile(self, function):
+        """
+        Return the Transpiled body of the FunctionSymbol and the Python function running it
+        """
+        compiled = self.compiled.get(function.declaration)
+        if compiled is None:
+            transpiled = self.transpiler.transpile(function)
+            errors = transpiled.errors
+
+            def error(index):
+                raise SourceError.at(*errors[index])
+
+            namespace = {"error": error, "invoke": self.invoke, "TailCall": TailCall}
+            # The names of the functions called are not in the source: the bodies only differing by them
+            # share their code object
+            namespace.update(("site%d" % index, CallSite(name)) for index, name in enumerate(transpiled.calls))
+            try:
+                code = self.cache.compile(transpiled.source, FILENAME)
+            except (SyntaxError, RecursionError, MemoryError):
+                # The temporaries keep the expressions within the limits of CPython, which may still reject a body
+                raise SourceError.at("The body of %s is too deep to be compiled" % function.name,
+                                     function.declaration.symbol) from None
+            exec(code, namespace)
+            compiled = self.compiled[function.declaration] = transpiled, namespace["body"]
+        return compiled
+
+    def execute(self, function, frame):
+        transpiled, body = self.compile(function)
+        try:
+            return body(frame)
+        except TypeError as error:
+            # Only an operation on a not initialized variable applies an operator to None
+            raise SourceError.at("Try to compute a not initialized variable",
+                                 self.location(error, transpiled, body)) from None
+        except ArithmeticError as error:
+            arithmetic_error(error, self.location(error, transpiled, body))
+
+    def location(self, error, transpiled, body):
+        """
+        Return the node where the error has been raised by the Python function
+        """
+        traceback = error.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code is body.__code__:
+                return transpiled.location(body.__code__, traceback.tb_lasti)
+            traceback = traceback.tb_next
+        return None
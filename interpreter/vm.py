@@ -0,0 +1,106 @@
+from interpreter.bytecode import (
+    BytecodeCompiler, LOAD_CONST, LOAD_LOCAL, LOAD_OUTER, STORE_LOCAL, STORE_OUTER, BINARY_ADD, BINARY_SUBTRACT,
+    BINARY_MULTIPLY, BINARY_DIVIDE, UNARY_NEGATIVE, CHECK_OPERANDS, CHECK_VALUE, POP_TOP, RETURN_VALUE, RAISE, CALL,
+    TAIL_CALL
+)
+from interpreter.interpreter import Interpreter, TailCall, arithmetic_error
+from parsing.source import SourceError
+
+
+class VirtualMachine(Interpreter):
+    """
+    The VirtualMachine runs the Code compiled by the BytecodeCompiler, each function being compiled on its first call.
+    The instructions are run by a dispatch loop over an operand stack, the variables being read and written in
+    the frames at their slots, as the Interpreter does. A call is run by `invoke()`, a tail call returned
+    to the trampoline of the Interpreter.
+    """
+
+    def __init__(self, global_table):
+        super().__init__(global_table)
+        self.compiler = BytecodeCompiler()
+        # The Code of each FunctionDeclaration
+        self.codes = {}
+
+    def compile(self, function):
+        """
+        Return the Code of the FunctionSymbol, compiling it if needed
+        """
+        code = self.codes.get(function.declaration)
+        if code is None:
+            code = self.codes[function.declaration] = self.compiler.compile(function)
+        return code
+
+    def execute(self, function, frame):
+        return self.run_code(self.compile(function), frame)
+
+    def run_code(self, code, frame):
+        """
+        Run the Code in the frame, return the value on the top of the stack at RETURN_VALUE,
+        or the TailCall at TAIL_CALL
+        """
+        constants = code.constants
+        values = frame.values
+        display = frame.display
+        # The value on the top of the stack is kept in `top`, the values below it in `stack`
+        top = None
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        # There are no jumps: the instructions are read in sequence, by pairs of an opcode and its operand
+        instructions = iter(code.instructions)
+        # The opcodes are tested from the most to the least frequent
+        for opcode, operand in zip(instructions, instructions):
+            if opcode == LOAD_CONST:
+                push(top)
+                top = constants[operand]
+            elif opcode == LOAD_LOCAL:
+                push(top)
+                top = values[operand]
+            elif opcode == BINARY_ADD:
+                top = pop() + top
+            elif opcode == BINARY_MULTIPLY:
+                top = pop() * top
+            elif opcode == BINARY_SUBTRACT:
+                top = pop() - top
+            elif opcode == BINARY_DIVIDE:
+                try:
+                    top = pop() / top
+                except ArithmeticError as error:
+                    arithmetic_error(error, code.errors[operand][1])
+            elif opcode == STORE_LOCAL:
+                values[operand] = top
+            elif opcode == CHECK_OPERANDS:
+                if top is None or stack[-1] is None:
+                    raise SourceError.at(*code.errors[operand])
+            elif opcode == LOAD_OUTER:
+                index, slot, _ = code.outers[operand]
+                push(top)
+                top = display[index][slot]
+            elif opcode == POP_TOP:
+                top = pop()
+            elif opcode == CALL:
+                site, count = code.calls[operand]
+                push(top)
+                # The arguments are the `count` values on the top of the stack, none for a call without arguments
+                start = len(stack) - count
+                arguments = stack[start:]
+                del stack[start:]
+                top = self.invoke(site, arguments)
+            elif opcode == UNARY_NEGATIVE:
+                top = -top
+            elif opcode == CHECK_VALUE:
+                if top is None:
+                    raise SourceError.at(*code.errors[operand])
+            elif opcode == STORE_OUTER:
+                index, slot, _ = code.outers[operand]
+                display[index][slot] = top
+            elif opcode == RETURN_VALUE:
+                return top
+            elif opcode == TAIL_CALL:
+                site, count = code.calls[operand]
+                push(top)
+                return TailCall(site, stack[len(stack) - count:])
+            elif opcode == RAISE:
+                raise SourceError.at(*code.errors[operand])
+            else:
+                self.error("Unknown opcode %d in %s" % (opcode, code.name))
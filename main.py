@@ -1,14 +1,53 @@
-from parsing.lexer import Lexer
+import argparse
+import sys
+
+from parsing.scanner import Scanner, StreamScanner
 from parsing.parser import Parser
-from analyzer.semanticanalyzer import SemanticAnalyzer
+from parsing.flatast import FlatAST
+from analyzer.pipeline import AnalysisPipeline
 from analyzer.treeanalyzer import GlobalSymbolTableCreator
+from interpreter.cache import ASTCache
 from interpreter.interpreter import Interpreter
-from symbol.symbol import VarSymbol, ValSymbol
-from parsing.ast import FunctionDeclaration
+from interpreter.closures import ClosureInterpreter
+from interpreter.iterative import IterativeInterpreter
+from interpreter.bytecode import BytecodeCompiler, disassemble
+from interpreter.vm import VirtualMachine
+from interpreter.transpiler import TranspiledInterpreter
+from symbol.symbol import FunctionSymbol
+from parsing.source import SourceError
+
+
+# The execution engines which can be chosen with --engine
+ENGINES = {
+    "tree": Interpreter,
+    "iterative": IterativeInterpreter,
+    "closures": ClosureInterpreter,
+    "bytecode": VirtualMachine,
+    "python": TranspiledInterpreter,
+}
 
 
 def main():
-    lexer = Lexer("""
+    arguments = argparse.ArgumentParser(description="Run a Horilang program, or a sample without any path")
+    arguments.add_argument("path", nargs="?", help="the path of the program")
+    arguments.add_argument("--engine", choices=sorted(ENGINES), default="tree",
+                           help="the execution engine: the tree walking Interpreter by default")
+    arguments.add_argument("--disassemble", action="store_true",
+                           help="print the bytecode of each function before running the program")
+    arguments.add_argument("--dump-optimized", action="store_true",
+                           help="print each function before and after its optimization, when it is analyzed")
+    arguments = arguments.parse_args()
+    engine = ENGINES[arguments.engine]
+    disassembled = arguments.disassemble
+    dump = sys.stdout if arguments.dump_optimized else None
+
+    if arguments.path is not None:
+        # Run the program at the given path, streaming its source
+        with StreamScanner.open(arguments.path) as lexer:
+            run_cached(lexer, ASTCache(), engine, disassembled, dump)
+        return
+
+    lexer = Scanner("""
 
 func main() : Int {
     var aze : Int = 3
@@ -17,42 +56,98 @@ func main() : Int {
 }
 
     """)
-    parser = Parser(lexer)
-    tree = parser.parse()
+    run(lexer, engine, disassembled, dump)
 
-    print("Start GlobalSymbolTable Creation")
 
-    global_symtab_generator = GlobalSymbolTableCreator()
-    global_symtab_generator.visit(tree)
+def print_errors(errors, lexer):
+    """
+    Print the errors with their location, the line index of the source is only built here
+    """
+    line_index = lexer.line_index()
+    for error in errors:
+        print("Error: %s" % error.format(line_index))
 
-    global_table = global_symtab_generator.global_table
 
-    # print(global_table)
-    if len(global_symtab_generator.errors) > 0:
-        for error in global_symtab_generator.errors:
-            print("Error: %s" % error)
-        print("Errors has been found. Execution stopped.")
+def run_cached(lexer, cache, engine=Interpreter, disassembled=False, dump=None):
+    """
+    Run the program scanned by the StreamScanner, skipping its parsing and its analysis
+    if the ASTCache holds the tree of the same source
+    """
+    key = cache.key(lexer.source)
+    lexer.source.seek(0)
+    cached = cache.load(key)
+    if cached is None:
+        flat = FlatAST()
+        pipeline = analyze(lexer, Parser(lexer).declarations(), flat.add, dump)
+        if pipeline is not None:
+            line_index = lexer.line_index() if pipeline.warnings else None
+            cache.store(key, flat, [warning.format(line_index) for warning in pipeline.warnings])
+            interpret(lexer, pipeline.global_table, engine, disassembled)
         return
 
-    print("Start Semantic Analyze")
+    flat, warnings = cached
+    for warning in warnings:
+        print("Warning : %s" % warning)
+    # Only the GlobalSymbolTable is built again from the tree, the analysis being known to succeed.
+    # The nodes are rebuilt once, the interpreters reading their fields many times.
+    global_symtab_generator = GlobalSymbolTableCreator()
+    global_symtab_generator.visit(flat.to_tree())
+    interpret(lexer, global_symtab_generator.global_table, engine, disassembled)
 
-    semantic_analyzer = SemanticAnalyzer(global_table)
-    for statement in tree:
-        if isinstance(statement, FunctionDeclaration):
-            semantic_analyzer.visit(statement)
 
-    for error in semantic_analyzer.errors:
-        print("Error: %s" % error)
-    for warning in semantic_analyzer.warnings:
-        print("Warning : %s" % warning)
-    if len(semantic_analyzer.errors) > 0:
+def run(lexer, engine=Interpreter, disassembled=False, dump=None):
+    pipeline = analyze(lexer, Parser(lexer).declarations(), dump=dump)
+    if pipeline is not None:
+        interpret(lexer, pipeline.global_table, engine, disassembled)
+
+
+def analyze(lexer, declarations, analyzed=None, dump=None):
+    """
+    Analyze and optimize the declarations, return the AnalysisPipeline or None if errors have been found.
+    `analyzed` is called with each declaration once analyzed, the optimized functions are written to `dump` if any.
+    """
+    pipeline = AnalysisPipeline(dump=dump)
+
+    print("Start Analyze")
+
+    # The declarations are analyzed while being parsed, the errors are printed as soon as they are found
+    errors = []
+    line_index = None
+    try:
+        for error in pipeline.analyze(declarations, analyzed):
+            if line_index is None:
+                line_index = lexer.line_index()
+            print("Error: %s" % error.format(line_index))
+            errors.append(error)
+    except SourceError as error:
+        print_errors([error], lexer)
         print("Errors has been found. Execution stopped.")
-        return
+        return None
+
+    if pipeline.warnings and line_index is None:
+        line_index = lexer.line_index()
+    for warning in pipeline.warnings:
+        print("Warning : %s" % warning.format(line_index))
+    if len(errors) > 0:
+        print("Errors has been found. Execution stopped.")
+        return None
+    return pipeline
+
+
+def interpret(lexer, global_table, engine=Interpreter, disassembled=False):
+    if disassembled:
+        compiler = BytecodeCompiler()
+        for symbol in global_table._symbols.values():
+            if isinstance(symbol, FunctionSymbol):
+                print(disassemble(compiler.compile(symbol)))
 
     print("Start Interpreter")
 
-    interpreter = Interpreter(global_table)
-    interpreter.interpret()
+    interpreter = engine(global_table)
+    try:
+        interpreter.interpret()
+    except SourceError as error:
+        print_errors([error], lexer)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,37 @@
+import math
+
+from parsing.tokens import TOKEN_NAMES
+
+
 class NodeVisitor(object):
+    """
+    The NodeVisitor calls the `visit_<class name>` method of the visited node, or `generic_visit` if there is none.
+    The method of each node class is looked up once by visitor class then kept in the `dispatch_table` of the class,
+    so a visit costs a dictionary lookup. The methods are looked up on the class: a subclass overriding a method
+    gets its own method, but a method added to the class after its first visits is not seen.
+    """
+
+    dispatch_table = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Each visitor class has its own methods, so its own table
+        cls.dispatch_table = {}
+
     def visit(self, node):
-        method_name = 'visit_' + type(node).__name__
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        method = self.dispatch_table.get(type(node))
+        if method is None:
+            method = self.dispatch(type(node))
+        return method(self, node)
+
+    def dispatch(self, node_class):
+        """
+        Look up the method visiting the nodes of the given class, and keep it in the table of the visitor class
+        """
+        visitor_class = type(self)
+        method = getattr(visitor_class, 'visit_' + node_class.__name__, visitor_class.generic_visit)
+        visitor_class.dispatch_table[node_class] = method
+        return method
 
     def generic_visit(self, node):
         raise Exception('No visit_{} method'.format(type(node).__name__))
@@ -12,9 +41,21 @@ class AST(object):
     """
     The AST class is the base class of all the AST Nodes
     It don't have to be instantiated
+    Every node built by the Parser gets the span of its source: `start` and `end` offsets
+    The nodes are slotted: each node class lists its fields in its `__slots__`
     """
 
-    pass
+    __slots__ = ('start', 'end')
+
+
+def constant_key(value):
+    """
+    Return the key of a constant value in a table of constants: 1, 1.0 and True are equal, as 0.0 and -0.0 are,
+    but must not be confused
+    """
+    if type(value) is float:
+        return float, value, math.copysign(1, value)
+    return type(value), value
 
 
 class Num(AST):
@@ -25,10 +66,13 @@ class Num(AST):
         789.98
     """
 
+    __slots__ = ('value', 'type')
+
     def __init__(self, token):
-        self.token = token
+        self.start = self.end = None
         self.value = token.value
-        self.type = token.type
+        # The names of the INTEGER and FLOAT kinds are the names of their types
+        self.type = TOKEN_NAMES[token.type]
 
     def __str__(self):
         return 'Num({value}, {type})'.format(
@@ -50,9 +94,12 @@ class BinOp(AST):
         3 + (5 * 4)
     """
 
+    __slots__ = ('left', 'op', 'right')
+
     def __init__(self, left, op, right):
+        self.start = self.end = None
         self.left = left
-        self.token = self.op = op
+        self.op = op
         self.right = right
 
     def __str__(self):
@@ -75,8 +122,11 @@ class UnaryOp(AST):
         5 * - 67
     """
 
+    __slots__ = ('op', 'expr')
+
     def __init__(self, op, expr):
-        self.token = self.op = op
+        self.start = self.end = None
+        self.op = op
         self.expr = expr
 
     def __str__(self):
@@ -96,7 +146,10 @@ class VariableAssignment(AST):
          test = 4 + 2
     """
 
+    __slots__ = ('left', 'right')
+
     def __init__(self, left, right):
+        self.start = self.end = None
         self.left = left
         self.right = right
 
@@ -119,12 +172,17 @@ class VariableDeclaration(AST):
         lateinit var d : Bool
     """
 
+    __slots__ = ('lateinit', 'const', 'symbol', 'type', 'expr', 'slot')
+
     def __init__(self, lateinit, const, symbol, type, expr=None):
+        self.start = self.end = None
         self.lateinit = lateinit
         self.const = const
         self.symbol = symbol
         self.type = type
         self.expr = expr
+        # The slot of the variable in the frames of its scope, set by the SemanticAnalyzer
+        self.slot = None
 
     def __str__(self):
         return 'VariableDeclaration({lateinit}, {const}, {symbol}, {type}, {expr})'.format(
@@ -144,20 +202,83 @@ class FunctionDeclaration(AST):
     Examples:
         func test(val a : Int) : Int -> a
         func addTwo (val b : Int) : Int -> b * 2
+        @memoize func square(val a : Int) : Int -> a * a
     """
 
-    def __init__(self, symbol, arguments, type, body):
+    __slots__ = ('symbol', 'arguments', 'type', 'body', 'annotations', 'frame_size')
+
+    def __init__(self, symbol, arguments, type, body, annotations=None):
+        self.start = self.end = None
         self.symbol = symbol
         self.arguments = arguments
         self.type = type
         self.body = body
+        self.annotations = annotations if annotations is not None else []
+        # The number of variables of the function, arguments included, set by the SemanticAnalyzer
+        self.frame_size = None
+
+    def annotated(self, name):
+        """
+        Return whether the function has the annotation of the given name
+        """
+        return any(annotation.name == name for annotation in self.annotations)
 
     def __str__(self):
-        return 'FunctionDeclaration({symbol}, {arguments}, {type}, {body})'.format(
+        return 'FunctionDeclaration({symbol}, {arguments}, {type}, {body}, {annotations})'.format(
             symbol=self.symbol,
             arguments=self.arguments,
             type=self.type,
-            body=self.body
+            body=self.body,
+            annotations=self.annotations
+        )
+
+    __repr__ = __str__
+
+
+class Annotation(AST):
+    """
+    The Annotation represents a hint given to the analyzer and the engines by the annotations of a function
+    Examples:
+        @pure
+        @memoize
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.start = self.end = None
+        self.name = name
+
+    def __str__(self):
+        return 'Annotation({name})'.format(
+            name=self.name
+        )
+
+    __repr__ = __str__
+
+
+class Call(AST):
+    """
+    The Call represents the call of a function with its positional arguments
+    Examples:
+        test(3)
+        addTwo(a * 2) + 1
+        main()
+    """
+
+    __slots__ = ('symbol', 'arguments', 'site')
+
+    def __init__(self, symbol, arguments):
+        self.start = self.end = None
+        self.symbol = symbol
+        self.arguments = arguments
+        # The CallSite of the call, created on its first run
+        self.site = None
+
+    def __str__(self):
+        return 'Call({symbol}, {arguments})'.format(
+            symbol=self.symbol,
+            arguments=self.arguments
         )
 
     __repr__ = __str__
@@ -171,8 +292,15 @@ class Symbol(AST):
         test
     """
 
+    __slots__ = ('name', 'depth', 'slot')
+
     def __init__(self, name):
+        self.start = self.end = None
         self.name = name
+        # The variable referenced, set by the SemanticAnalyzer: the number of scopes between the reference
+        # and the scope of the variable, then the slot of the variable in the frames of that scope
+        self.depth = None
+        self.slot = None
 
     def __str__(self):
         return 'Symbol({name})'.format(
@@ -190,7 +318,10 @@ class Type(AST):
         Float
     """
 
+    __slots__ = ('name',)
+
     def __init__(self, name):
+        self.start = self.end = None
         self.name = name
 
     def __str__(self):
@@ -199,3 +330,121 @@ class Type(AST):
         )
 
     __repr__ = __str__
+
+
+# The kinds of the nodes walked by the ExpressionVisitor
+LEAF, BINARY, UNARY, CALL = range(4)
+
+# The number of nested operations visited recursively by the ExpressionVisitor, the deeper ones being walked
+MAX_NESTING = 100
+
+
+class ExpressionVisitor(NodeVisitor):
+    """
+    The ExpressionVisitor visits the expressions however deep they are.
+    The operands of an operation, one of the `operations` classes, are visited first, left to right, then
+    the `leave_<class name>` method of the operation is called with the node and the values of its operands:
+    `leave_BinOp(node, left, right)`, `leave_UnaryOp(node, expr)` and `leave_Call(node, arguments)` with the list
+    of the values of the arguments. The other nodes are visited by their `visit_<class name>` method.
+    The operations are visited recursively, which is faster for the usual expressions, up to MAX_NESTING nested ones:
+    the deeper ones are walked without recursion by `iterate()`.
+    """
+
+    operations = (BinOp, UnaryOp, Call)
+    # The kind and the `leave_<class name>` method of each node class walked by `iterate()`
+    walk_table = {}
+    # The number of operations being visited recursively
+    nesting = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.walk_table = {}
+
+    # The operands are visited by the method of their class, without going through `visit()`
+
+    def visit_BinOp(self, node):
+        if self.nesting >= MAX_NESTING:
+            return self.iterate(node)
+        self.nesting += 1
+        try:
+            table = self.dispatch_table
+            left = node.left
+            right = node.right
+            left = (table.get(type(left)) or self.dispatch(type(left)))(self, left)
+            right = (table.get(type(right)) or self.dispatch(type(right)))(self, right)
+            return self.leave_BinOp(node, left, right)
+        finally:
+            self.nesting -= 1
+
+    def visit_UnaryOp(self, node):
+        if self.nesting >= MAX_NESTING:
+            return self.iterate(node)
+        self.nesting += 1
+        try:
+            expr = node.expr
+            expr = (self.dispatch_table.get(type(expr)) or self.dispatch(type(expr)))(self, expr)
+            return self.leave_UnaryOp(node, expr)
+        finally:
+            self.nesting -= 1
+
+    def visit_Call(self, node):
+        if self.nesting >= MAX_NESTING:
+            return self.iterate(node)
+        self.nesting += 1
+        try:
+            return self.leave_Call(node, [self.visit(argument) for argument in node.arguments])
+        finally:
+            self.nesting -= 1
+
+    def iterate(self, node):
+        """
+        Visit the operation without recursion
+        """
+        table = self.walk_table
+        # The nodes in reverse post order: each operation comes before its operands, its last operand first
+        nodes = []
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            entry = table.get(type(node)) or self.walk(type(node))
+            nodes.append((node, entry))
+            kind = entry[0]
+            if kind == BINARY:
+                pending += (node.left, node.right)
+            elif kind == UNARY:
+                pending.append(node.expr)
+            elif kind == CALL:
+                pending += node.arguments
+        # The values of the operands visited, the operations replacing the values of their operands by theirs
+        values = []
+        for node, (kind, leave) in reversed(nodes):
+            if kind == LEAF:
+                values.append(self.visit(node))
+            elif kind == BINARY:
+                right = values.pop()
+                values[-1] = leave(self, node, values[-1], right)
+            elif kind == UNARY:
+                values[-1] = leave(self, node, values[-1])
+            else:
+                start = len(values) - len(node.arguments)
+                arguments = values[start:]
+                del values[start:]
+                values.append(leave(self, node, arguments))
+        return values[0]
+
+    def walk(self, node_class):
+        """
+        Look up the kind of the nodes of the given class and their `leave_<class name>` method,
+        and keep them in the table of the visitor class
+        """
+        visitor_class = type(self)
+        if not issubclass(node_class, visitor_class.operations):
+            entry = LEAF, None
+        elif issubclass(node_class, BinOp):
+            entry = BINARY, visitor_class.leave_BinOp
+        elif issubclass(node_class, UnaryOp):
+            entry = UNARY, visitor_class.leave_UnaryOp
+        else:
+            entry = CALL, visitor_class.leave_Call
+        visitor_class.walk_table[node_class] = entry
+        return entry
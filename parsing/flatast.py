@@ -0,0 +1,283 @@
+import marshal
+from array import array
+
+from parsing import ast
+from parsing.ast import AST, constant_key
+from parsing.tokens import Token
+
+# The span of a node built without one
+NO_OFFSET = 0xFFFFFFFF
+
+# The node kinds of the flat tree: the node classes, the LIST kind standing for a list of nodes
+NODE_CLASSES = (
+    ast.Num,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.VariableAssignment,
+    ast.VariableDeclaration,
+    ast.FunctionDeclaration,
+    ast.Symbol,
+    ast.Type,
+    ast.Call,
+    ast.Annotation,
+)
+LIST = len(NODE_CLASSES)
+NODE_KINDS = {node_class: kind for kind, node_class in enumerate(NODE_CLASSES)}
+
+# The slots set while running the nodes, which are not part of the tree
+RUN_SLOTS = ('site',)
+
+# The fields of each node kind, in the order of its operands
+NODE_FIELDS = tuple(tuple(field for field in node_class.__slots__ if field not in RUN_SLOTS)
+                    for node_class in NODE_CLASSES)
+
+
+class FlatAST(object):
+    """
+    The FlatAST holds a whole tree in a few arrays instead of an object per node.
+    Node `i` has the kind `kinds[i]`, the span `starts[i]`, `ends[i]` and its operands from `operands[firsts[i]]`:
+    one per field of its kind, or the number of items then the items for a LIST.
+    An operand is the index of a child node, or the complemented index of a value in the `constants` table
+    (names, numbers, operator tokens, flags and None) which are stored once however often they are used.
+    The nodes are read through views: `view(i)` returns an instance of a subclass of the class of the node,
+    with the same name, so the NodeVisitor subclasses walk the flat tree as they walk the tree of objects.
+    A view is created on each access to a field: a tree walked many times, as by the interpreters,
+    is rebuilt into nodes by `to_tree()`.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.firsts = array('I')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.operands = array('i')
+        self.constants = []
+        self._constant_indices = {}
+        # The indices of the top-level declarations
+        self.roots = array('I')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def from_tree(cls, tree):
+        """
+        Build the flat tree of the given list of top-level declarations
+        """
+        return cls.from_declarations(tree)
+
+    @classmethod
+    def from_declarations(cls, declarations):
+        """
+        Build the flat tree of the declarations as they are generated,
+        so the nodes of a single declaration are alive at once while parsing with `Parser.declarations()`
+        """
+        flat = cls()
+        for declaration in declarations:
+            flat.add(declaration)
+        return flat
+
+    def add(self, declaration):
+        """
+        Append a top-level declaration
+        """
+        self.roots.append(self.append(declaration))
+
+    def dumps(self):
+        """
+        Serialize the tree into bytes with marshal, the operators being stored as (kind, value) pairs
+        """
+        constants = [(value.type, value.value) if type(value) is Token else value for value in self.constants]
+        return marshal.dumps((
+            self.kinds.tobytes(),
+            self.firsts.tobytes(),
+            self.starts.tobytes(),
+            self.ends.tobytes(),
+            self.operands.tobytes(),
+            self.roots.tobytes(),
+            constants,
+        ))
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Rebuild the tree serialized by `dumps()`
+        """
+        flat = cls()
+        kinds, firsts, starts, ends, operands, roots, constants = marshal.loads(data)
+        flat.kinds.frombytes(kinds)
+        flat.firsts.frombytes(firsts)
+        flat.starts.frombytes(starts)
+        flat.ends.frombytes(ends)
+        flat.operands.frombytes(operands)
+        flat.roots.frombytes(roots)
+        flat.constants = [Token(*value) if type(value) is tuple else value for value in constants]
+        return flat
+
+    def constant(self, value):
+        """
+        Return the operand of the given value, adding it to the constants table if needed
+        """
+        if type(value) is Token:
+            # The operators are stored once for each kind, without their span
+            key = (Token, value.type, value.value)
+            value = Token(value.type, value.value)
+        else:
+            key = constant_key(value)
+        index = self._constant_indices.get(key)
+        if index is None:
+            index = self._constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return ~index
+
+    def append(self, node):
+        """
+        Append the node and all its descendants, return the index of the node
+        """
+        index = len(self.kinds)
+        kinds = self.kinds
+        operands = self.operands
+        # The nodes to append, with the position of the operand referencing each one
+        pending = [(node, None)]
+        while pending:
+            node, position = pending.pop()
+            if position is not None:
+                operands[position] = len(kinds)
+            if type(node) is list:
+                kinds.append(LIST)
+                self.starts.append(NO_OFFSET)
+                self.ends.append(NO_OFFSET)
+                self.firsts.append(len(operands))
+                operands.append(len(node))
+                values = node
+            else:
+                kind = NODE_KINDS[type(node)]
+                kinds.append(kind)
+                self.starts.append(NO_OFFSET if node.start is None else node.start)
+                self.ends.append(NO_OFFSET if node.end is None else node.end)
+                self.firsts.append(len(operands))
+                values = [getattr(node, field) for field in NODE_FIELDS[kind]]
+            for value in values:
+                if isinstance(value, (AST, list)):
+                    pending.append((value, len(operands)))
+                    operands.append(0)
+                else:
+                    operands.append(self.constant(value))
+        return index
+
+    def operand(self, operand):
+        """
+        Return the value of an operand: a view of a node, a list of views or a constant
+        """
+        if operand < 0:
+            return self.constants[~operand]
+        return self.view(operand)
+
+    def view(self, index):
+        """
+        Return the view of the node at the given index, a list of views for a LIST node
+        """
+        kind = self.kinds[index]
+        if kind == LIST:
+            first = self.firsts[index]
+            operands = self.operands[first + 1:first + 1 + self.operands[first]]
+            return [self.operand(operand) for operand in operands]
+        return VIEW_CLASSES[kind](self, index)
+
+    def root(self):
+        """
+        Return the views of the top-level declarations
+        """
+        return [self.view(index) for index in self.roots]
+
+    def to_tree(self):
+        """
+        Rebuild the nodes of the tree, return the list of the top-level declarations.
+        The children of a node are appended after it: the nodes are built from the last one, without recursion.
+        """
+        kinds = self.kinds
+        firsts = self.firsts
+        starts = self.starts
+        ends = self.ends
+        operands = self.operands
+        constants = self.constants
+        nodes = [None] * len(kinds)
+        for index in range(len(kinds) - 1, -1, -1):
+            kind = kinds[index]
+            first = firsts[index]
+            if kind == LIST:
+                nodes[index] = [constants[~operand] if operand < 0 else nodes[operand]
+                                for operand in operands[first + 1:first + 1 + operands[first]]]
+                continue
+            node_class = NODE_CLASSES[kind]
+            # The constructors take the tokens of the node: the fields are set on a new instance
+            node = nodes[index] = node_class.__new__(node_class)
+            start = starts[index]
+            end = ends[index]
+            node.start = None if start == NO_OFFSET else start
+            node.end = None if end == NO_OFFSET else end
+            for position, field in enumerate(NODE_FIELDS[kind]):
+                operand = operands[first + position]
+                setattr(node, field, constants[~operand] if operand < 0 else nodes[operand])
+            for field in RUN_SLOTS:
+                if field in node_class.__slots__:
+                    setattr(node, field, None)
+        return [nodes[index] for index in self.roots]
+
+    def nbytes(self):
+        """
+        Return the size of the arrays of the tree, without the constants
+        """
+        return sum(len(buffer) * buffer.itemsize
+                   for buffer in (self.kinds, self.firsts, self.starts, self.ends, self.operands, self.roots))
+
+
+def view_field(position):
+    return property(lambda view: view.tree.operand(view.tree.operands[view.tree.firsts[view.index] + position]))
+
+
+def view_offset(name):
+    def get(view):
+        offset = getattr(view.tree, name)[view.index]
+        return None if offset == NO_OFFSET else offset
+
+    return property(get)
+
+
+def view_class(node_class):
+    """
+    Create the view class of a node class, reading the fields of the node from the arrays of the tree
+    """
+    attributes = {
+        '__slots__': ('tree', 'index'),
+        '__doc__': 'The view of a %s node of a FlatAST' % node_class.__name__,
+        '__init__': view_init,
+        '__eq__': view_eq,
+        '__hash__': view_hash,
+        'start': view_offset('starts'),
+        'end': view_offset('ends'),
+    }
+    for position, field in enumerate(NODE_FIELDS[NODE_KINDS[node_class]]):
+        attributes[field] = view_field(position)
+    for field in RUN_SLOTS:
+        if field in node_class.__slots__:
+            # A view is created on each access: what is set while running is not kept
+            attributes[field] = property(lambda view: None, lambda view, value: None)
+    return type(node_class.__name__, (node_class,), attributes)
+
+
+def view_init(self, tree, index):
+    self.tree = tree
+    self.index = index
+
+
+def view_eq(self, other):
+    # A view is created on each access: two views of the same node are equal
+    return type(other) is type(self) and other.tree is self.tree and other.index == self.index
+
+
+def view_hash(self):
+    return hash((id(self.tree), self.index))
+
+
+VIEW_CLASSES = tuple(view_class(node_class) for node_class in NODE_CLASSES)
@@ -0,0 +1,267 @@
+import re
+
+from parsing import tokens
+
+# The tokens of the notation of the grammar: a rule name followed by a colon, a name, or an operator
+GRAMMAR_PATTERN = re.compile(r"\s*(?:(?P<RULE>[a-z_]+)\s*:|(?P<NAME>\w+)|(?P<OPERATOR>[|()*+?])|(?P<MISMATCH>\S))")
+
+# What the value of a production is built from its values
+RULE = 0          # the result of the `build_<rule>` method of the builder
+GROUP = 1         # the value of a single symbol, or a Group of the values of several symbols
+LIST = 2          # the list of the values of every repetition
+OPTIONAL = 3      # the value of the symbol, or None if it is absent
+TRANSPARENT = 4   # no value: the values of the symbols are left to the enclosing production
+
+
+class GrammarError(Exception):
+    pass
+
+
+class Production(object):
+    """
+    The Production rewrites the nonterminal `name` into the sequence `symbols` of names
+    """
+
+    def __init__(self, name, symbols, action, rule):
+        self.name = name
+        self.symbols = symbols
+        self.action = action
+        # The rule of the grammar the production comes from
+        self.rule = rule
+
+    def __str__(self):
+        return '{name} : {symbols}'.format(
+            name=self.name,
+            symbols=' '.join(self.symbols) or '<empty>'
+        )
+
+    __repr__ = __str__
+
+
+class Grammar(object):
+    """
+    The Grammar reads the rules of the grammar written in the docstring of `Parser.parse()`:
+        rule : symbol symbol ...
+             | symbol ...
+    A TERMINAL is the name of a token kind and a nonterminal the name of another rule.
+    The symbols can be grouped by parentheses, separated by `|` and followed by `*`, `+` or `?`.
+    Each group and repetition is turned into a nonterminal of its own named after its rule,
+    so the productions only hold plain sequences of symbols.
+    """
+
+    def __init__(self, text):
+        self.productions = []
+        # The names of the nonterminals, the first one being the start symbol
+        self.nonterminals = []
+        self.terminals = {}
+        self._counts = {}
+        self.read(text)
+        self.check()
+
+    def read(self, text):
+        items = []
+        for match in GRAMMAR_PATTERN.finditer(text):
+            if match.lastgroup == "MISMATCH":
+                raise GrammarError("Unexpected %r in the grammar" % match["MISMATCH"])
+            if match.lastgroup is not None:
+                items.append((match.lastgroup, match[match.lastgroup]))
+        items.append((None, None))
+
+        position = 0
+        while items[position][0] is not None:
+            kind, name = items[position]
+            if kind != "RULE":
+                raise GrammarError("Expected a rule instead of %r" % name)
+            if name in self.nonterminals:
+                raise GrammarError("The rule %s is defined twice" % name)
+            self.nonterminals.append(name)
+            alternatives, position = self.read_alternatives(items, position + 1)
+            for symbols in alternatives:
+                self.add(name, symbols, RULE, name)
+
+    def read_alternatives(self, items, position):
+        """
+        Read the alternatives starting at the given position, return them with the position following them
+        """
+        alternatives = []
+        symbols = []
+        while True:
+            kind, value = items[position]
+            if kind == "NAME":
+                symbols.append(value)
+            elif value == "(":
+                group, position = self.read_alternatives(items, position + 1)
+                if items[position][1] != ")":
+                    raise GrammarError("Missing ')' in the grammar")
+                symbols.append(group)
+            elif value in ("*", "+", "?") and symbols:
+                symbols[-1] = (value, symbols[-1])
+            elif value == "|":
+                alternatives.append(symbols)
+                symbols = []
+            else:
+                alternatives.append(symbols)
+                return alternatives, position
+            position += 1
+
+    def add(self, name, symbols, action, rule):
+        self.productions.append(Production(name, [self.symbol(item, rule) for item in symbols], action, rule))
+
+    def helper(self, rule):
+        """
+        Create a new nonterminal for a part of the given rule
+        """
+        self._counts[rule] = count = self._counts.get(rule, 0) + 1
+        name = '%s:%d' % (rule, count)
+        self.nonterminals.append(name)
+        return name
+
+    def symbol(self, item, rule):
+        """
+        Return the name of the symbol standing for the given item of a rule
+        """
+        if isinstance(item, str):
+            return item
+        if isinstance(item, list):
+            # A group of alternatives
+            if len(item) == 1 and len(item[0]) == 1:
+                return self.symbol(item[0][0], rule)
+            name = self.helper(rule)
+            for symbols in item:
+                self.add(name, symbols, GROUP, rule)
+            return name
+
+        operator, item = item
+        name = self.helper(rule)
+        if operator == "?":
+            self.add(name, [item], OPTIONAL, rule)
+            self.add(name, [], OPTIONAL, rule)
+        else:
+            repetition = self.helper(rule)
+            self.add(name, [item, repetition] if operator == "+" else [repetition], LIST, rule)
+            self.add(repetition, [item, repetition], TRANSPARENT, rule)
+            self.add(repetition, [], TRANSPARENT, rule)
+        return name
+
+    def check(self):
+        for production in self.productions:
+            for symbol in production.symbols:
+                if symbol in self.nonterminals:
+                    continue
+                kind = getattr(tokens, symbol, None)
+                if not symbol.isupper() or not isinstance(kind, int):
+                    raise GrammarError("Unknown symbol %s in %s" % (symbol, production))
+                self.terminals[symbol] = kind
+
+    def nullable_symbols(self):
+        nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for production in self.productions:
+                if production.name not in nullable and all(symbol in nullable for symbol in production.symbols):
+                    nullable.add(production.name)
+                    changed = True
+        return nullable
+
+    def first_sets(self, nullable):
+        first = {name: set() for name in self.nonterminals}
+        first.update((name, {name}) for name in self.terminals)
+        changed = True
+        while changed:
+            changed = False
+            for production in self.productions:
+                target = first[production.name]
+                size = len(target)
+                for symbol in production.symbols:
+                    target |= first[symbol]
+                    if symbol not in nullable:
+                        break
+                changed = changed or len(target) != size
+        return first
+
+    def follow_sets(self, nullable, first):
+        follow = {name: set() for name in self.nonterminals}
+        follow[self.nonterminals[0]].add("EOF")
+        changed = True
+        while changed:
+            changed = False
+            for production in self.productions:
+                # What follows the symbols of the production from its end
+                trailer = set(follow[production.name])
+                for symbol in reversed(production.symbols):
+                    if symbol in follow:
+                        size = len(follow[symbol])
+                        follow[symbol] |= trailer
+                        changed = changed or len(follow[symbol]) != size
+                    if symbol in nullable:
+                        trailer = trailer | first[symbol]
+                    else:
+                        trailer = set(first[symbol])
+        return follow
+
+    def predict_sets(self):
+        """
+        Return the set of terminals predicting each production
+        """
+        nullable = self.nullable_symbols()
+        first = self.first_sets(nullable)
+        follow = self.follow_sets(nullable, first)
+        predict = []
+        for production in self.productions:
+            terminals = set()
+            for symbol in production.symbols:
+                terminals |= first[symbol]
+                if symbol not in nullable:
+                    break
+            else:
+                terminals |= follow[production.name]
+            predict.append(terminals)
+        return predict
+
+
+class ParseTable(object):
+    """
+    The ParseTable gives the production to expand a nonterminal into for each token kind:
+    `predict[nonterminal][kind]` is the index of the production, or None on a syntax error.
+    The grammar symbols are numbered for the parsing engine: the terminals by their token kinds,
+    the nonterminals following them.
+    A conflict between two productions raises a GrammarError, the grammar not being LL(1).
+    """
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+        kinds = len(tokens.TOKEN_NAMES)
+        numbers = dict(grammar.terminals, EOF=tokens.EOF)
+        for index, name in enumerate(grammar.nonterminals):
+            numbers[name] = kinds + index
+        self.start = numbers[grammar.nonterminals[0]]
+        self.nonterminal_base = kinds
+        self.predict = [[None] * kinds for _ in grammar.nonterminals]
+        # The symbols of each production, reversed to be pushed on the stack of the engine
+        self.symbols = [tuple(numbers[symbol] for symbol in reversed(production.symbols))
+                        for production in grammar.productions]
+        self.actions = [production.action for production in grammar.productions]
+
+        for index, terminals in enumerate(grammar.predict_sets()):
+            production = grammar.productions[index]
+            row = self.predict[numbers[production.name] - kinds]
+            for terminal in terminals:
+                other = row[numbers[terminal]]
+                if other is not None:
+                    raise GrammarError("LL(1) conflict on %s between %s and %s" % (
+                        terminal, grammar.productions[other], production))
+                row[numbers[terminal]] = index
+
+    def __str__(self):
+        lines = []
+        for index, production in enumerate(self.grammar.productions):
+            row = self.predict[self.grammar.nonterminals.index(production.name)]
+            terminals = [tokens.TOKEN_NAMES[kind] for kind, predicted in enumerate(row) if predicted == index]
+            lines.append('{production:60} {terminals}'.format(
+                production=str(production),
+                terminals=', '.join(terminals)
+            ))
+        return '\n'.join(lines)
+
+    __repr__ = __str__
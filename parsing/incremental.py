@@ -0,0 +1,165 @@
+from bisect import bisect_left, bisect_right
+
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from parsing.source import LineIndex, SourceError
+from parsing.tokens import EOL, EOF
+
+
+class TextEdit(object):
+    """
+    The TextEdit replaces the text between the `start` and `end` offsets of a source by `text`
+    Examples:
+        TextEdit(4, 7, "b")     replaces the 3 chars at offset 4 by "b"
+        TextEdit(0, 0, "# x\\n") inserts a line at the start of the source
+    """
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+        # How far the text following the edit moves
+        self.delta = len(text) - (end - start)
+
+    def __str__(self):
+        return 'TextEdit({start}, {end}, {text})'.format(
+            start=self.start,
+            end=self.end,
+            text=repr(self.text)
+        )
+
+    __repr__ = __str__
+
+    def apply(self, source):
+        return source[:self.start] + self.text + source[self.end:]
+
+
+def parse_region(text, offset, after_root, before_root):
+    """
+    Parse the top-level declarations of a region of a source starting at the given offset.
+    `after_root` and `before_root` tell whether the region follows or precedes a declaration kept as is:
+    like in the whole source, the region must separate them from its own declarations with an EOL.
+    """
+    parser = Parser(Scanner(text, offset))
+    roots = []
+    separated = not after_root
+    while parser.current_token.type == EOL:
+        parser.eat_EOL()
+        separated = True
+    while parser.current_token.type != EOF:
+        if not separated:
+            parser.error()
+        roots.append(parser.root())
+        separated = False
+        while parser.current_token.type == EOL:
+            parser.eat_EOL()
+            separated = True
+    if before_root and not separated and (after_root or roots):
+        parser.error()
+    return roots
+
+
+class SessionLineIndex(LineIndex):
+    """
+    The SessionLineIndex locates the offsets of the tree of an IncrementalParser in its current source
+    """
+
+    def __init__(self, line_starts, virtual_starts, virtual_ends, shifts):
+        super().__init__(line_starts)
+        self.virtual_starts = virtual_starts
+        self.virtual_ends = virtual_ends
+        self.shifts = shifts
+
+    def translate(self, offset):
+        """
+        Return the offset in the source of an offset of the tree
+        """
+        index = bisect_right(self.virtual_starts, offset) - 1
+        if index >= 0 and offset <= self.virtual_ends[index]:
+            return offset + self.shifts[index]
+        return offset
+
+    def location(self, offset):
+        return super().location(self.translate(offset))
+
+
+class IncrementalParser(object):
+    """
+    The IncrementalParser keeps the source and the tree of a program across its edits.
+    Only the top-level declarations touched by an edit are lexed and parsed again,
+    the others are reused as they are, whatever their number and size.
+
+    Moving the spans of every declaration following an edit would cost as much as parsing them again,
+    so the offsets of the tree are virtual instead: each parsed region is scanned from an offset that no
+    other region uses, and the declarations only keep in `_shifts` how far their source has moved since.
+    The offsets are turned back into offsets of the source by the LineIndex given by `line_index()`.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.tree = None
+        self._shifts = []
+        self._next_offset = 0
+        self.parse()
+
+    def parse(self):
+        """
+        Parse the whole source again, its offsets being the real ones
+        """
+        self.tree = None
+        self._next_offset = len(self.source) + 1
+        self.tree = Parser(Scanner(self.source)).parse()
+        self._shifts = [0] * len(self.tree)
+        return self.tree
+
+    def edit(self, start, end, text):
+        """
+        Replace the source between the `start` and `end` offsets by `text` and return the new tree.
+        A syntax error is raised as by the Parser on the whole edited source.
+        """
+        edit = TextEdit(start, end, text)
+        self.source = source = edit.apply(self.source)
+        if self.tree is None:
+            return self.parse()
+        tree = self.tree
+        shifts = self._shifts
+        count = len(tree)
+
+        # The declarations touched by the edit are tree[first:last]
+        first = bisect_left(range(count), edit.start, key=lambda index: tree[index].end + shifts[index])
+        last = bisect_right(range(count), edit.end, key=lambda index: tree[index].start + shifts[index])
+        region_start = tree[first - 1].end + shifts[first - 1] if first > 0 else 0
+        region_end = tree[last].start + shifts[last] + edit.delta if last < count else len(source)
+        region = source[region_start:region_end]
+        if last < count and '#' in region[region.rfind('\n') + 1:]:
+            # A comment now starts on the line of the next declaration: take it in the region
+            last += 1
+            region_end = tree[last].start + shifts[last] + edit.delta if last < count else len(source)
+            region = source[region_start:region_end]
+
+        offset = self._next_offset
+        self._next_offset += len(region) + 1
+        try:
+            roots = parse_region(region, offset, first > 0, last < count)
+        except SourceError:
+            roots = None
+        if roots is None or first + len(roots) + count - last == 0:
+            # Let the whole source be parsed to report the error where the Parser would
+            return self.parse()
+
+        self.tree = tree[:first] + roots + tree[last:]
+        self._shifts = shifts[:first] + [region_start - offset] * len(roots) + \
+            [shift + edit.delta for shift in shifts[last:]]
+        return self.tree
+
+    def line_index(self):
+        """
+        Build the LineIndex of the source, locating the offsets of the tree
+        """
+        roots = sorted(zip(self.tree or [], self._shifts), key=lambda item: item[0].start)
+        return SessionLineIndex(
+            LineIndex.from_text(self.source).line_starts,
+            [root.start for root, _ in roots],
+            [root.end for root, _ in roots],
+            [shift for _, shift in roots]
+        )
@@ -0,0 +1,68 @@
+from parsing.ast import Num, BinOp, UnaryOp, Symbol, Type, constant_key
+
+
+class NodeInterner(object):
+    """
+    The NodeInterner hash-conses the expression nodes: structurally identical Num, Symbol, Type, BinOp and UnaryOp
+    nodes are created once and shared by every place they appear, so the tree becomes a DAG.
+    The children of a node are interned before it, so two subtrees are identical when their root nodes
+    have the same fields and the very same children: a node is looked up by the identity of its children.
+    The shared nodes can then key the caches of the analysis and the evaluation by their identity.
+
+    A shared node keeps the span of its first occurrence: an error located by it points to that occurrence.
+    The declarations and the assignments are never shared, each one has its own span.
+
+    The SemanticAnalyzer sets in each Symbol node the variable it references: the Symbol nodes are only shared
+    when they reference the same variable. The Parser calls `enter()` and `leave()` around each function
+    and `declare()` after each variable declaration of a function, so a Symbol is looked up with the slot
+    the SemanticAnalyzer gives to its local variable, or None for a global.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        # The slot of each local variable declared so far in the current function, None out of a function
+        self.scope = None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def enter(self):
+        """
+        Start the scope of a function
+        """
+        self.scope = {}
+
+    def leave(self):
+        self.scope = None
+
+    def declare(self, name):
+        """
+        Declare a variable of the current function at the next slot, the global variables are not declared
+        """
+        if self.scope is not None:
+            self.scope[name] = len(self.scope)
+
+    def key(self, node):
+        node_class = type(node)
+        if node_class is Num:
+            return (Num, node.type) + constant_key(node.value)
+        if node_class is BinOp:
+            return BinOp, id(node.left), node.op.type, id(node.right)
+        if node_class is UnaryOp:
+            return UnaryOp, node.op.type, id(node.expr)
+        if node_class is Symbol:
+            return Symbol, node.name, None if self.scope is None else self.scope.get(node.name)
+        if node_class is Type:
+            return Type, node.name
+        return None
+
+    def intern(self, node):
+        """
+        Return the shared node structurally identical to the given one, which becomes shared if it is the first.
+        Interning a node again returns the same shared node.
+        """
+        key = self.key(node)
+        if key is None:
+            return node
+        # The shared nodes are kept alive by the table, so the identities used in the keys are not reused
+        return self.nodes.setdefault(key, node)
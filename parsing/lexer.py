@@ -1,14 +1,15 @@
 from parsing.tokens import *
+from parsing.source import SourceError
 
 
 class Lexer(object):
     def __init__(self, text):
         self.text = text
         self.text_pos = 0  # The self.text position
-        self.current_char = self.text[self.text_pos]
+        self.current_char = self.text[self.text_pos] if self.text else None
 
     def error(self):
-        raise Exception("Unrecognized character")
+        raise SourceError("Unrecognized character", self.text_pos, self.text_pos + 1)
 
     def advance(self):
         """
@@ -43,6 +44,7 @@ class Lexer(object):
         """
         Return a (multidigit) integer or float consumed from the input.
         """
+        start = self.text_pos
         result = ''
         while self.current_char is not None and self.current_char.isdigit():
             result += self.current_char
@@ -56,9 +58,9 @@ class Lexer(object):
                 result += self.current_char
                 self.advance()
 
-            return Token(FLOAT, float(result))
+            return Token(FLOAT, float(result), start, self.text_pos)
         else:
-            return Token(INTEGER, int(result))
+            return Token(INTEGER, int(result), start, self.text_pos)
 
     def symbol(self):
         result = ''
@@ -71,16 +73,21 @@ class Lexer(object):
         """
         Handle identifiers and reserved keywords
         """
+        start = self.text_pos
         result = self.symbol()
-        return RESERVED_KEYWORDS.get(result.lower(), Token(SYMBOL, result))
+        keyword = RESERVED_KEYWORDS.get(result.lower())
+        if keyword is not None:
+            return Token(keyword.type, keyword.value, start, self.text_pos)
+        return Token(SYMBOL, result, start, self.text_pos)
 
     def create_token(self, type, value):
         """
         Return a token with the given information and advance of the necessary char
         """
+        start = self.text_pos
         for i in range(0, len(value)):
             self.advance()
-        return Token(type, value)
+        return Token(type, value, start, self.text_pos)
 
     def get_next_token(self):
         """
@@ -104,8 +111,9 @@ class Lexer(object):
 
             # ANNOTATION
             if self.current_char == "@":
+                start = self.text_pos
                 self.advance()
-                return Token(ANNOTATION, self.text())
+                return Token(ANNOTATION, self.symbol(), start, self.text_pos)
 
             # SYMBOL or Keywords
             if self.current_char.isalpha():
@@ -190,4 +198,4 @@ class Lexer(object):
 
             self.error()
 
-        return Token(EOF, None)
+        return Token(EOF, None, len(self.text), len(self.text))
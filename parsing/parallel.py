@@ -0,0 +1,136 @@
+import gc
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from parsing.parser import Parser
+from parsing.tokens import *
+from parsing.tokenstream import TokenStream
+
+# Below this number of tokens, starting the worker processes costs more than parsing serially
+MIN_PARALLEL_TOKENS = 100000
+
+# The number of chunks given to each worker, so a worker done early can take the chunk of a slower one
+CHUNKS_PER_WORKER = 4
+
+# The kinds of the first token of a top-level declaration, the annotations coming before the FUNC of a function
+DECLARATION_KINDS = (ANNOTATION, FUNC, VAR, VAL, LATEINIT)
+
+# The constants of the stream being parsed, sent once to each worker process
+_constants = None
+
+
+def _start_worker(constants):
+    global _constants
+    _constants = constants
+    # A worker only builds trees without cycles, which are freed by their reference counts
+    gc.disable()
+
+
+def _parse_chunk(kinds, values, starts, ends):
+    """
+    Parse in a worker process the top-level declarations of a chunk of the stream
+    """
+    stream = TokenStream()
+    stream.kinds = kinds
+    stream.values = values
+    stream.starts = starts
+    stream.ends = ends
+    stream.constants = _constants
+    stream.rewind()
+    return Parser(stream).parse()
+
+
+def follows_annotation(kinds, index):
+    """
+    Return whether the token at the given index follows an annotation, with only EOL between them
+    """
+    index -= 1
+    while index >= 0 and kinds[index] == EOL:
+        index -= 1
+    return index >= 0 and kinds[index] == ANNOTATION
+
+
+def declaration_boundaries(stream, count):
+    """
+    Return the indices of the tokens at which the stream is cut into about `count` chunks of the same size.
+    A chunk always starts with a top-level declaration: a declaration keyword following an EOL out of any body,
+    and not following the annotations of a function.
+    """
+    kinds = stream.kinds.tobytes()
+    eol = bytes((EOL,))
+    lbrace = bytes((LBRACE,))
+    rbrace = bytes((RBRACE,))
+    # The last token is EOF, it is never the start of a chunk
+    size = len(kinds) - 1
+
+    boundaries = []
+    # The depth of the braces at `position`
+    position = depth = 0
+    for chunk in range(1, count):
+        index = kinds.find(eol, max(size * chunk // count - 1, position))
+        while index != -1 and index + 1 < size:
+            index += 1
+            if kinds[index] in DECLARATION_KINDS and not follows_annotation(kinds, index):
+                depth += kinds.count(lbrace, position, index) - kinds.count(rbrace, position, index)
+                position = index
+                if depth == 0:
+                    boundaries.append(index)
+                    break
+            index = kinds.find(eol, index)
+        else:
+            break
+    return boundaries
+
+
+class ParallelParser(object):
+    """
+    The ParallelParser parses the top-level declarations of a TokenStream in worker processes.
+    The stream is cut at the start of top-level declarations, which do not depend on each other,
+    and the declarations parsed from each chunk are merged in their order of the source.
+    Small streams, or a single worker, are parsed serially by the Parser.
+    """
+
+    def __init__(self, stream, workers=None, min_tokens=MIN_PARALLEL_TOKENS):
+        self.stream = stream
+        self.workers = workers or os.cpu_count() or 1
+        self.min_tokens = min_tokens
+
+    def parse(self):
+        """
+        Build the same tree as the Parser, raising the first syntax error of the source as the Parser does
+        """
+        stream = self.stream
+        boundaries = []
+        if self.workers > 1 and len(stream) >= self.min_tokens:
+            boundaries = declaration_boundaries(stream, self.workers * CHUNKS_PER_WORKER)
+        if not boundaries:
+            stream.rewind()
+            return Parser(stream).parse()
+
+        chunks = []
+        starts = [0] + boundaries
+        for start, stop in zip(starts, boundaries + [len(stream) - 1]):
+            # Every chunk ends with an EOF token placed at the start of the next chunk
+            chunks.append((
+                stream.kinds[start:stop] + array('B', (EOF,)),
+                stream.values[start:stop] + array('I', (0,)),
+                stream.starts[start:stop] + stream.starts[stop:stop + 1],
+                stream.ends[start:stop] + stream.starts[stop:stop + 1],
+            ))
+
+        tree = []
+        # The trees sent back by the workers are made of millions of objects: the garbage collections
+        # triggered while they are unpickled would walk them again and again, taking most of the time
+        collect = gc.isenabled()
+        gc.disable()
+        try:
+            with ProcessPoolExecutor(self.workers, initializer=_start_worker,
+                                     initargs=(stream.constants,)) as executor:
+                # The results are taken in order: the first error raised is the first one of the source
+                for roots in executor.map(_parse_chunk, *zip(*chunks)):
+                    tree.extend(roots)
+        finally:
+            if collect:
+                gc.enable()
+        return tree
@@ -1,15 +1,52 @@
 from parsing.tokens import *
 from parsing.ast import *
+from parsing.source import SourceError
+
+# The precedence of the binary operators, all of them being left associative
+BINARY_OPERATORS = {
+    PLUS: 1,
+    MINUS: 1,
+    STAR: 2,
+    SLASH: 2,
+}
+
+# The prefix operators apply to the operand right after them, before any binary operator
+UNARY_PRECEDENCE = 3
+PREFIX_OPERATORS = {
+    PLUS: UNARY_PRECEDENCE,
+    MINUS: UNARY_PRECEDENCE,
+}
 
 
 class Parser(object):
-    def __init__(self, lexer):
+    def __init__(self, lexer, interner=None):
         self.lexer = lexer
+        # The NodeInterner sharing the identical expression nodes, if any
+        self.interner = interner
         self.current_token = self.lexer.get_next_token()
+        # The end offset of the last eaten token
+        self.previous_end = 0
         # print(self.current_token)
 
     def error(self):
-        raise Exception('Invalid syntax')
+        raise SourceError.at('Invalid syntax: unexpected %s' % TOKEN_NAMES[self.current_token.type],
+                             self.current_token)
+
+    def located(self, node, start):
+        """
+        Set the span of the node: from the given start offset to the end of the last eaten token
+        """
+        node.start = start
+        node.end = self.previous_end
+        return node
+
+    def shared(self, node):
+        """
+        Return the node shared by the interner if any, the node itself otherwise
+        """
+        if self.interner is None:
+            return node
+        return self.interner.intern(node)
 
     def eat(self, token_type):
         """
@@ -18,6 +55,7 @@ class Parser(object):
         otherwise raise an exception.
         """
         if self.current_token.type == token_type:
+            self.previous_end = self.current_token.end
             self.current_token = self.lexer.get_next_token()
             # print(self.current_token)
         else:
@@ -38,18 +76,25 @@ class Parser(object):
         root_list : root
                   | root EOL root_list
         """
+        return list(self.declarations())
+
+    def declarations(self):
+        """
+        Generate the top-level declarations one by one, each one as soon as it is parsed.
+        The end of the tokens is checked once the last declaration is generated.
+        """
         if self.current_token.type == EOL:
             self.eat_EOL()
 
-        node = self.root()
-        results = [node]
+        yield self.root()
 
         while self.current_token.type == EOL:
             self.eat_EOL()
-            if self.current_token is not None and self.current_token.type is not EOF:
-                results.append(self.root())
+            if self.current_token.type != EOF:
+                yield self.root()
 
-        return results
+        if self.current_token.type != EOF:
+            self.error()
 
     def root(self):
         """
@@ -59,7 +104,7 @@ class Parser(object):
         statement = None
         if self.current_token.type in (LATEINIT, VAR, VAL):
             statement = self.variable_declaration()
-        elif self.current_token.type == FUNC:
+        elif self.current_token.type in (FUNC, ANNOTATION):
             statement = self.function_declaration()
         else:
             self.error()
@@ -67,12 +112,18 @@ class Parser(object):
 
     def function_declaration(self):
         """
-        function_declaration : FUNC symbol LPAREN function_arguments RPAREN type body
-                             | FUNC symbol LPAREN RPAREN type body
-                             | FUNC symbol type body
+        function_declaration : annotation* FUNC symbol LPAREN function_arguments RPAREN type body
+                             | annotation* FUNC symbol LPAREN RPAREN type body
+                             | annotation* FUNC symbol type body
         """
+        start = self.current_token.start
+        annotations = []
+        while self.current_token.type == ANNOTATION:
+            annotations.append(self.annotation())
         self.eat(FUNC)
         symbol = self.symbol()
+        if self.interner is not None:
+            self.interner.enter()
         arguments = None
         if self.current_token.type == LPAREN:
             self.eat(LPAREN)
@@ -83,7 +134,21 @@ class Parser(object):
                 self.eat(RPAREN)
         type = self.type()
         body = self.body()
-        return FunctionDeclaration(symbol, arguments, type, body)
+        if self.interner is not None:
+            self.interner.leave()
+        return self.located(FunctionDeclaration(symbol, arguments, type, body, annotations), start)
+
+    def annotation(self):
+        """
+        annotation : ANNOTATION EOL*
+        """
+        token = self.current_token
+        self.eat(ANNOTATION)
+        node = self.located(Annotation(token.value), token.start)
+        # The annotations may be written on their own lines
+        if self.current_token.type == EOL:
+            self.eat_EOL()
+        return node
 
     def function_argument_list(self):
         """
@@ -104,6 +169,7 @@ class Parser(object):
         function_argument : (VAR | VAL) symbol type
                           | (VAR | VAL) symbol type EQUAL expr
         """
+        start = self.current_token.start
         const = False
         if self.current_token.type == VAR:
             self.eat(VAR)
@@ -116,7 +182,9 @@ class Parser(object):
         if self.current_token.type == EQUAL:
             self.eat(EQUAL)
             expr = self.expr()
-        return VariableDeclaration(False, const, symbol, type, expr)
+        if self.interner is not None:
+            self.interner.declare(symbol.name)
+        return self.located(VariableDeclaration(False, const, symbol, type, expr), start)
 
     def body(self):
         """
@@ -134,8 +202,7 @@ class Parser(object):
 
     def statement_list(self):
         """
-        statement_list : annotation
-                       | statement
+        statement_list : statement
                        | statement EOL statement_list
         """
         if self.current_token.type == EOL:
@@ -148,10 +215,7 @@ class Parser(object):
             self.eat_EOL()
             if self.current_token.type == RBRACE:
                 break
-            if self.current_token.type == ANNOTATION:
-                results.append(self.annotation())
-            else:
-                results.append(self.statement())
+            results.append(self.statement())
 
         return results
 
@@ -164,26 +228,16 @@ class Parser(object):
         if self.current_token.type in (LATEINIT, VAL, VAR):
             return self.variable_declaration()
         elif self.current_token.type == SYMBOL:
-            #
-            # A statement starting with a SYMBOL can either be a variable_assignment and a expr
-            #
-            symbol = self.symbol()
+            # A statement starting with a SYMBOL is either a variable_assignment or an expr.
+            # The symbol is not shared yet: it may be the left operand of the expr, taking its span.
+            token = self.current_token
+            self.eat(SYMBOL)
+            symbol = self.located(Symbol(token.value), token.start)
+            self.shared(symbol)
             if self.current_token.type == EQUAL:
-                # VariableAssignment
                 self.eat(EQUAL)
-                return VariableAssignment(symbol, self.expr())
-            elif self.current_token.type in (PLUS, MINUS):
-                # Term
-                op = self.current_token
-                self.eat(self.current_token.type)
-                return BinOp(symbol, op, self.term())
-            elif self.current_token.type in (STAR, SLASH):
-                # Factor
-                op = self.current_token
-                self.eat(self.current_token.type)
-                return BinOp(symbol, op, self.factor())
-            else:
-                return symbol
+                return self.located(VariableAssignment(self.shared(symbol), self.expr()), symbol.start)
+            return self.expr(symbol)
         else:
             return self.expr()
 
@@ -193,13 +247,18 @@ class Parser(object):
         """
         symbol = self.symbol()
         self.eat(EQUAL)
-        return VariableAssignment(symbol, self.expr())
+        return self.located(VariableAssignment(symbol, self.expr()), symbol.start)
 
     def variable_declaration(self):
         """
-        function_argument : (VAR | VAL) symbol type
-                          | (VAR | VAL) symbol type EQUAL expr
+        variable_declaration : LATEINIT? (VAR | VAL) symbol type
+                             | LATEINIT? (VAR | VAL) symbol type EQUAL expr
         """
+        start = self.current_token.start
+        lateinit = False
+        if self.current_token.type == LATEINIT:
+            self.eat(LATEINIT)
+            lateinit = True
         const = False
         if self.current_token.type == VAR:
             self.eat(VAR)
@@ -212,7 +271,9 @@ class Parser(object):
         if self.current_token.type == EQUAL:
             self.eat(EQUAL)
             expr = self.expr()
-        return VariableDeclaration(False, const, symbol, type, expr)
+        if self.interner is not None:
+            self.interner.declare(symbol.name)
+        return self.located(VariableDeclaration(lateinit, const, symbol, type, expr), start)
 
     def symbol(self):
         """
@@ -220,7 +281,7 @@ class Parser(object):
         """
         token = self.current_token
         self.eat(SYMBOL)
-        return Symbol(token.value)
+        return self.shared(self.located(Symbol(token.value), token.start))
 
     def type(self):
         """
@@ -229,103 +290,162 @@ class Parser(object):
         self.eat(COLON)
         token = self.current_token
         self.eat(SYMBOL)
-        return Type(token.value)
-
-    def expr(self):
-        """
-        expr : term ((PLUS | MINUS) term)*
-        """
-        node = self.term()
-
-        while self.current_token.type in (PLUS, MINUS):
-            token = self.current_token
-            if token.type == PLUS:
-                self.eat(PLUS)
-            elif token.type == MINUS:
-                self.eat(MINUS)
-
-            node = BinOp(node, token, self.term())
-
-        return node
-
-    def term(self):
-        """
-        term : factor ((STAR | SLASH) factor)*
-        """
-        node = self.factor()
-
-        while self.current_token.type in (STAR, SLASH):
+        return self.shared(self.located(Type(token.value), token.start))
+
+    def expr(self, left=None):
+        """
+        expr : (PLUS | MINUS)* operand (binary_operator (PLUS | MINUS)* operand)*
+
+        operand : INTEGER
+                | FLOAT
+                | LPAREN expr RPAREN
+                | symbol
+                | call
+
+        call : symbol LPAREN (expr (COMMA expr)*)? RPAREN
+
+        The precedence of the operators is given by BINARY_OPERATORS and PREFIX_OPERATORS.
+        The expression is parsed by precedence climbing over explicit stacks, the arguments of the calls included,
+        so its depth is not bounded by the recursion limit, nor by the analysis or the IterativeInterpreter.
+        The other engines compute the operations recursively: a deeper expression than the recursion limit allows
+        is reported as an error when it is run. The `left` operand may have already been parsed by the caller.
+        """
+        # The parsed operands and the operators not applied yet
+        operands = [] if left is None else [left]
+        operators = []
+        # The parentheses opened in the expression: None for a parenthesized expression,
+        # the symbol called and the arguments parsed for a call
+        groups = []
+        operand_expected = left is None
+        # The type of each token is checked before it is eaten, so the tokens are taken without `eat()`
+        get_next_token = self.lexer.get_next_token
+        interner = self.interner
+
+        while True:
             token = self.current_token
-            if token.type == STAR:
-                self.eat(STAR)
-            elif token.type == SLASH:
-                self.eat(SLASH)
-
-            node = BinOp(node, token, self.factor())
-
+            if operand_expected:
+                if token.type in PREFIX_OPERATORS:
+                    operators.append((PREFIX_OPERATORS[token.type], token))
+                elif token.type == LPAREN:
+                    operators.append((0, token))
+                    groups.append(None)
+                elif token.type == RPAREN and operators and operators[-1][0] == 0 and groups[-1] is not None \
+                        and not groups[-1][1]:
+                    # A call without arguments
+                    operators.pop()
+                    operands.append(self.called(groups.pop(), token))
+                    operand_expected = False
+                else:
+                    if token.type in (INTEGER, FLOAT):
+                        node = Num(token)
+                    elif token.type == SYMBOL:
+                        node = Symbol(token.value)
+                    else:
+                        self.error()
+                    node.start = token.start
+                    node.end = token.end
+                    if interner is not None:
+                        interner.intern(node)
+                    operands.append(node)
+                    operand_expected = False
+                self.previous_end = token.end
+                self.current_token = get_next_token()
+                continue
+
+            # A symbol followed by a parenthesis is called: the parenthesis of a parenthesized symbol ends after it
+            if token.type == LPAREN and isinstance(operands[-1], Symbol) and operands[-1].end == self.previous_end:
+                operators.append((0, token))
+                groups.append((operands.pop(), []))
+                operand_expected = True
+                self.previous_end = token.end
+                self.current_token = get_next_token()
+                continue
+
+            precedence = BINARY_OPERATORS.get(token.type)
+            # A closing parenthesis ends the last group, a comma the argument of the last call
+            closing = bool(groups) and (token.type == RPAREN or token.type == COMMA and groups[-1] is not None)
+            if precedence is None and not closing:
+                if groups:
+                    self.error()
+                if not operators:
+                    return operands[0] if interner is None else interner.intern(operands[0])
+
+            # Apply the pending operators binding at least as tightly as the next one,
+            # every operator being left associative. A closing parenthesis or the end of the expression
+            # apply all the operators following the last opening parenthesis.
+            # The operands reduced here all end with the last eaten token.
+            # With an interner, each node is interned as soon as it is created, in the order of the source,
+            # so a shared node gets the span of its first occurrence. The stack keeps the node itself
+            # as the span of its parent is taken from it, the shared node is only taken when the parent is created.
+            while operators and operators[-1][0] >= (precedence or 1):
+                operator_precedence, operator = operators.pop()
+                right = operands.pop()
+                if operator_precedence == UNARY_PRECEDENCE:
+                    if interner is not None:
+                        right = interner.intern(right)
+                    node = self.located(UnaryOp(operator, right), operator.start)
+                else:
+                    left = operands.pop()
+                    start = left.start
+                    if interner is not None:
+                        left = interner.intern(left)
+                        right = interner.intern(right)
+                    node = self.located(BinOp(left, operator, right), start)
+                if interner is not None:
+                    interner.intern(node)
+                operands.append(node)
+
+            if precedence is not None:
+                operators.append((precedence, token))
+                operand_expected = True
+            elif not closing:
+                return operands[0] if interner is None else interner.intern(operands[0])
+            elif token.type == COMMA:
+                groups[-1][1].append(operands.pop() if interner is None else interner.intern(operands.pop()))
+                operand_expected = True
+            else:
+                operators.pop()
+                group = groups.pop()
+                if group is not None:
+                    group[1].append(operands.pop() if interner is None else interner.intern(operands.pop()))
+                    operands.append(self.called(group, token))
+            self.previous_end = token.end
+            self.current_token = get_next_token()
+
+    def called(self, group, token):
+        """
+        Return the Call of the symbol with the arguments of the group, the token being its closing parenthesis
+        """
+        symbol, arguments = group
+        node = Call(symbol, arguments)
+        node.start = symbol.start
+        node.end = token.end
         return node
 
-    def factor(self):
-        """
-        factor : (PLUS | MINUS) factor
-               | INTEGER
-               | FLOAT
-               | LPAREN expr RPAREN
-               | symbol
-        """
-        token = self.current_token
-        if token.type == PLUS:
-            self.eat(PLUS)
-            return UnaryOp(token, self.factor())
-        elif token.type == MINUS:
-            self.eat(MINUS)
-            return UnaryOp(token, self.factor())
-        elif token.type == INTEGER:
-            self.eat(INTEGER)
-            return Num(token)
-        elif token.type == FLOAT:
-            self.eat(FLOAT)
-            return Num(token)
-        elif token.type == LPAREN:
-            self.eat(LPAREN)
-            node = self.expr()
-            self.eat(RPAREN)
-            return node
-        else:
-            return self.symbol()
-
     def parse(self):
         """
-        root_list : root
-                  | root EOL root_list
+        root_list : EOL* root (EOL root?)*
 
         root : variable_declaration
              | function_declaration
 
-        function_declaration : FUNC symbol LPAREN function_arguments RPAREN type body
-                             | FUNC symbol LPAREN RPAREN type body
-                             | FUNC symbol type body
+        function_declaration : annotation* FUNC symbol (LPAREN function_argument_list? RPAREN)? type body
 
-        function_argument_list : function_argument
-                               | function_argument COMMA function_argument_list
+        annotation : ANNOTATION EOL*
 
-        function_argument : (VAR | VAL) symbol type
-                          | (VAR | VAL) symbol type EQUAL expr
+        function_argument_list : function_argument (COMMA function_argument)*
+
+        function_argument : (VAR | VAL) symbol type (EQUAL expr)?
 
         body : RARROW statement
              | LBRACE statement_list RBRACE
 
-        statement_list : (annotation)? statement
-                       | (annotation)? statement EOL statement_list
+        statement_list : EOL* statement (EOL statement?)*
 
         statement : variable_declaration
-                  | variable_assignment
-                  | expr
+                  | expr (EQUAL expr)?
 
-        variable_assignment : symbol EQUAL expr
-
-        variable_declaration : (VAR | VAL) symbol type
-                             | (VAR | VAL) symbol type EQUAL expr
+        variable_declaration : LATEINIT? (VAR | VAL) symbol type (EQUAL expr)?
 
         expr : term ((PLUS | MINUS) term)*
 
@@ -335,13 +455,13 @@ class Parser(object):
                | INTEGER
                | FLOAT
                | LPAREN expr RPAREN
-               | symbol
+               | symbol (LPAREN call_arguments? RPAREN)?
+
+        call_arguments : expr (COMMA expr)*
 
         symbol : SYMBOL
 
         type : COLON SYMBOL
-
-        annotation : ANNOTATION
         """
         node = self.root_list()
         if self.current_token.type != EOF:
@@ -0,0 +1,227 @@
+import codecs
+import mmap
+import re
+from itertools import product
+
+from parsing.tokens import *
+from parsing.source import LineIndex, SourceError
+
+# The token type of every operator, the two chars operators being tried first by the pattern
+OPERATORS = {
+    "\n": EOL,
+    "==": DOUBLEEQUAL,
+    "=": EQUAL,
+    ":": COLON,
+    ";": SEMICOLON,
+    "->": RARROW,
+    "-": MINUS,
+    "<-": LARROW,
+    "<": LCHEV,
+    ">": RCHEV,
+    "+": PLUS,
+    "*": STAR,
+    "/": SLASH,
+    "\\": ANTISLASH,
+    "%": PERCENTAGE,
+    "(": LPAREN,
+    ")": RPAREN,
+    "{": LBRACE,
+    "}": RBRACE,
+    ",": COMMA,
+}
+
+# Each match skips the leading spaces then captures exactly one token in the group named after its kind.
+# The empty `\Z` alternative swallows the trailing spaces of the text.
+MASTER_PATTERN = re.compile(r"""
+    [^\S\n]*
+    (?:
+        (?P<SYMBOL>[^\W\d_][^\W_]*)
+      | (?P<OPERATOR>==|->|<-|[\n=:;<>+*/\\%(){},-])
+      | (?P<FLOAT>\d+\.\d*)
+      | (?P<INTEGER>\d+)
+      | (?P<COMMENT>\#[^\n]*\n?)
+      | (?P<ANNOTATION>@[^\W\d_][^\W_]*)
+      | (?P<MISMATCH>.)
+      | \Z
+    )
+""", re.VERBOSE | re.DOTALL)
+
+# The number of chars read at once by the StreamScanner
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Keywords are case insensitive: every spelling is precomputed so an identifier costs one dict probe
+KEYWORDS = {
+    "".join(spelling): token
+    for keyword, token in RESERVED_KEYWORDS.items()
+    for spelling in product(*((c.lower(), c.upper()) for c in keyword))
+}
+
+
+class Scanner(object):
+    """
+    The Scanner breaks the text apart into tokens with a single compiled master pattern.
+    It produces the same tokens as the Lexer and can be given to the Parser in place of it.
+    """
+
+    def __init__(self, text, offset=0):
+        self.text = text
+        # The offset of the text in its source, when only a part of the source is scanned
+        self.offset = offset
+        self._pending = ""
+        self._tokens = self.tokenize()
+
+    def error(self, offset):
+        raise SourceError("Unrecognized character", offset, offset + 1)
+
+    def line_index(self):
+        """
+        Build the LineIndex of the text, to locate the errors
+        """
+        return LineIndex.from_text(self.text)
+
+    def scan(self, text, final=True, offset=0):
+        """
+        Generate the tokens of the text, which starts at the given offset of the source.
+        When the text is not `final`, the token reaching its end may go on in the next text:
+        it is not generated but kept in `_pending` instead.
+        """
+        operators = OPERATORS
+        keywords = KEYWORDS
+        size = len(text)
+        for match in MASTER_PATTERN.finditer(text):
+            kind = match.lastgroup
+            if kind is None:
+                continue
+            start = match.start(kind)
+            end = match.end()
+            if not final and end == size:
+                if kind != "COMMENT":
+                    self._pending = text[start:]
+                elif not text.endswith("\n"):
+                    # Only the comment mark is needed to skip the rest of the comment
+                    self._pending = "#"
+                return
+            if kind == "SYMBOL":
+                value = match["SYMBOL"]
+                keyword = keywords.get(value)
+                if keyword is None:
+                    yield Token(SYMBOL, value, offset + start, offset + end)
+                else:
+                    yield Token(keyword.type, keyword.value, offset + start, offset + end)
+            elif kind == "OPERATOR":
+                value = match["OPERATOR"]
+                yield Token(operators[value], value, offset + start, offset + end)
+            elif kind == "INTEGER":
+                yield Token(INTEGER, int(match["INTEGER"]), offset + start, offset + end)
+            elif kind == "FLOAT":
+                yield Token(FLOAT, float(match["FLOAT"]), offset + start, offset + end)
+            elif kind == "ANNOTATION":
+                yield Token(ANNOTATION, match["ANNOTATION"][1:], offset + start, offset + end)
+            elif kind == "MISMATCH":
+                self.error(offset + start)
+
+    def tokenize(self):
+        """
+        Generate every token of the text, the last one being the EOF token.
+        """
+        yield from self.scan(self.text, True, self.offset)
+        end = self.offset + len(self.text)
+        yield Token(EOF, None, end, end)
+
+    def get_next_token(self):
+        """
+        Return the next token, the EOF token is returned once the text is consumed.
+        """
+        return next(self._tokens, None) or Token(EOF, None)
+
+
+class StreamScanner(Scanner):
+    """
+    The StreamScanner reads the source from a file object or a mmap through a bounded buffer
+    and yields its tokens lazily, so the memory used does not depend on the size of the source.
+    A token cut by the end of the buffer is carried over to the next read.
+    """
+
+    def __init__(self, source, buffer_size=DEFAULT_BUFFER_SIZE, encoding="utf-8"):
+        self.source = source
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._close = None
+        super().__init__(None)
+
+    @classmethod
+    def open(cls, path, buffer_size=DEFAULT_BUFFER_SIZE, encoding="utf-8"):
+        """
+        Open the file at `path` and scan it through a read-only mmap.
+        The returned scanner has to be closed once the parsing is done.
+        """
+        file = open(path, "rb")
+        try:
+            source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            source = file
+        scanner = cls(source, buffer_size, encoding)
+        scanner._close = file.close if source is file else lambda: (source.close(), file.close())
+        return scanner
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def line_index(self):
+        """
+        Build the LineIndex of the source, reading it once again from its start.
+        The reading of the tokens can go on afterwards.
+        """
+        position = self.source.tell()
+        self.source.seek(0)
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+
+        def chunks():
+            chunk = self.source.read(self.buffer_size)
+            while chunk:
+                yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+                chunk = self.source.read(self.buffer_size)
+
+        line_index = LineIndex.from_chunks(chunks())
+        self.source.seek(position)
+        return line_index
+
+    def read(self):
+        """
+        Read the next chunk of the source, decoding it if the source gives bytes.
+        Return None once the source is exhausted.
+        """
+        chunk = self.source.read(self.buffer_size)
+        if isinstance(chunk, str):
+            return chunk or None
+        if not chunk:
+            return self._decoder.decode(b"", True) or None
+        return self._decoder.decode(chunk)
+
+    def tokenize(self):
+        """
+        Generate every token of the source, the last one being the EOF token.
+        """
+        # The number of chars read and the offset in the source of the text being scanned
+        size = offset = 0
+        chunk = self.read()
+        while chunk is not None:
+            size += len(chunk)
+            text = self._pending + chunk
+            self._pending = ""
+            yield from self.scan(text, False, offset)
+            # The pending token is scanned again at the start of the next text
+            offset = size - len(self._pending)
+            chunk = self.read()
+        yield from self.scan(self._pending, True, offset)
+        yield Token(EOF, None, size, size)
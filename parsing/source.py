@@ -0,0 +1,76 @@
+from array import array
+from bisect import bisect_right
+
+
+class LineIndex(object):
+    """
+    The LineIndex holds the offset of the start of every line of a source.
+    It turns an offset into a line and a column by bisection, which is only needed to format an error.
+    """
+
+    def __init__(self, line_starts):
+        self.line_starts = line_starts
+
+    @classmethod
+    def from_text(cls, text):
+        return cls.from_chunks((text,))
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """
+        Build the index of a source read chunk by chunk
+        """
+        line_starts = array('Q', [0])
+        offset = 0
+        for chunk in chunks:
+            position = chunk.find('\n')
+            while position != -1:
+                line_starts.append(offset + position + 1)
+                position = chunk.find('\n', position + 1)
+            offset += len(chunk)
+        return cls(line_starts)
+
+    def location(self, offset):
+        """
+        Return the line and the column, both starting at 1, of the given offset
+        """
+        line = bisect_right(self.line_starts, offset) - 1
+        return line + 1, offset - self.line_starts[line] + 1
+
+
+class SourceError(Exception):
+    """
+    The SourceError is an error located by the span of the token or the node it is about
+    """
+
+    def __init__(self, message, start=None, end=None):
+        super().__init__(message)
+        self.message = message
+        self.start = start
+        self.end = end
+
+    def __reduce__(self):
+        # Keep the span when the error is sent back by a worker process
+        return type(self), (self.message, self.start, self.end)
+
+    @classmethod
+    def at(cls, message, node):
+        """
+        Create an error located at the span of the given node or token
+        """
+        if node is None:
+            return cls(message)
+        return cls(message, node.start, node.end)
+
+    def format(self, line_index=None):
+        """
+        Return the message prefixed with the line and the column of the error if they are known
+        """
+        if line_index is None or self.start is None:
+            return self.message
+        line, column = line_index.location(self.start)
+        return 'line {line}, column {column}: {message}'.format(
+            line=line,
+            column=column,
+            message=self.message
+        )
@@ -0,0 +1,246 @@
+from parsing.tokens import *
+from parsing.ast import *
+from parsing.grammar import Grammar, ParseTable, RULE, GROUP, LIST, OPTIONAL
+from parsing.parser import Parser
+from parsing.source import SourceError
+
+# The table generated from the grammar of the Parser, built once on first use
+_table = None
+
+
+def parse_table():
+    global _table
+    if _table is None:
+        _table = ParseTable(Grammar(Parser.parse.__doc__))
+    return _table
+
+
+class Group(tuple):
+    """
+    The Group holds the values of the symbols of a group of a rule, with the end offset of its last token
+    """
+
+    end = None
+
+
+class TreeBuilder(object):
+    """
+    The TreeBuilder builds the AST nodes from the values of the rules of the grammar.
+    The `build_<rule>` method is given the values of the symbols of the rule: a Token for a terminal,
+    the built value for a rule, a Group for a group of several symbols, a list for a repetition
+    and None for a missing optional symbol.
+    A rule without method takes the value of its single symbol, or a Group of the values of its symbols.
+    The TableParser sets the span of the nodes built without one.
+    """
+
+    # The last symbol built between parentheses, which cannot be assigned: each symbol is a new node
+    parenthesized = None
+
+    def build_root_list(self, eols, root, groups):
+        return [root] + [root for _, root in groups if root is not None]
+
+    def build_function_declaration(self, annotations, func, symbol, arguments, type, body):
+        return FunctionDeclaration(symbol, arguments and arguments[1], type, body, annotations)
+
+    def build_annotation(self, token, eols):
+        # The span of the annotation does not take the EOL following it
+        node = Annotation(token.value)
+        node.start = token.start
+        node.end = token.end
+        return node
+
+    def build_function_argument_list(self, argument, groups):
+        return [argument] + [argument for _, argument in groups]
+
+    def build_function_argument(self, keyword, symbol, type, default):
+        return VariableDeclaration(False, keyword.type == VAL, symbol, type, default and default[1])
+
+    def build_body(self, *values):
+        if values[0].type == RARROW:
+            return [values[1]]
+        return values[1]
+
+    def build_statement_list(self, eols, statement, groups):
+        return [statement] + [statement for _, statement in groups if statement is not None]
+
+    def build_statement(self, node, assignment=None):
+        if assignment is None:
+            return node
+        return VariableAssignment(node, assignment[1])
+
+    def check_target(self, node, equal):
+        """
+        Check the value preceding an EQUAL token as soon as the token is matched, as the Parser does:
+        the type of a declaration, or the target of an assignment which must be a symbol
+        """
+        if not isinstance(node, (Type, Symbol)) or node is self.parenthesized:
+            raise SourceError.at('Invalid syntax: unexpected %s' % TOKEN_NAMES[equal.type], equal)
+
+    def build_variable_declaration(self, lateinit, keyword, symbol, type, initialization):
+        expr = [] if initialization is None else initialization[1]
+        return VariableDeclaration(lateinit is not None, keyword.type == VAL, symbol, type, expr)
+
+    def build_expr(self, node, groups):
+        # The operators are left associative
+        for group in groups:
+            op, right = group
+            left = node
+            node = BinOp(left, op, right)
+            node.start = left.start
+            node.end = group.end
+        return node
+
+    build_term = build_expr
+
+    def build_factor(self, *values):
+        if len(values) == 2:
+            if isinstance(values[0], Token):
+                return UnaryOp(values[0], values[1])
+            # symbol (LPAREN call_arguments? RPAREN)?
+            symbol, call = values
+            if call is None:
+                return symbol
+            return Call(symbol, call[1] or [])
+        if len(values) == 3:
+            # LPAREN expr RPAREN
+            if isinstance(values[1], Symbol):
+                self.parenthesized = values[1]
+            return values[1]
+        if isinstance(values[0], Token):
+            return Num(values[0])
+        return values[0]
+
+    def build_call_arguments(self, expr, groups):
+        return [expr] + [expr for _, expr in groups]
+
+    def build_symbol(self, token):
+        return Symbol(token.value)
+
+    def build_type(self, colon, token):
+        node = Type(token.value)
+        node.start = token.start
+        node.end = token.end
+        return node
+
+
+class TableParser(object):
+    """
+    The TableParser parses the tokens with the LL(1) table generated from the grammar of the Parser
+    and builds the same tree. Its single loop keeps the symbols to match on an explicit stack:
+    a terminal is matched against the current token, a nonterminal is replaced by the symbols of the
+    production predicted by the table and is followed by a marker building the value of the production
+    from the values of its symbols once they are matched.
+    """
+
+    def __init__(self, lexer, builder=None):
+        self.lexer = lexer
+        self.builder = builder or TreeBuilder()
+        self.current_token = self.lexer.get_next_token()
+        self.previous_end = 0
+        self.table = parse_table()
+        self.actions = [self.action(production) for production in self.table.grammar.productions]
+
+    def error(self):
+        raise SourceError.at('Invalid syntax: unexpected %s' % TOKEN_NAMES[self.current_token.type],
+                             self.current_token)
+
+    def action(self, production):
+        """
+        Return the function building the value of the production from the list of the values of its symbols
+        """
+        if len(production.symbols) == 1 and production.action in (RULE, GROUP) and \
+                not hasattr(self.builder, 'build_' + production.name):
+            # The value of the single symbol is left as it is
+            return None
+        if production.action == RULE:
+            build = getattr(self.builder, 'build_' + production.name, None)
+            if build is None:
+                return Group
+            return lambda values: build(*values)
+        if production.action == GROUP:
+            return Group
+        if production.action == LIST:
+            return list
+        if production.action == OPTIONAL:
+            return lambda values: values[0] if values else None
+        return None
+
+    def expansions(self):
+        """
+        Return for each nonterminal and each token kind what replaces the nonterminal on the stack,
+        with the number of markers it holds.
+        The leftmost symbol is expanded as long as it is a nonterminal, which saves an iteration of the engine
+        per nonterminal on the way to the first terminal.
+        """
+        expansions = []
+        for row in self.table.predict:
+            expansions.append([None if production is None else self.expansion(production, kind)
+                               for kind, production in enumerate(row)])
+        return expansions
+
+    def expansion(self, production, kind):
+        table = self.table
+        entries = []
+        markers = 0
+        while True:
+            if self.actions[production] is not None:
+                entries.append(~production)
+                markers += 1
+            symbols = table.symbols[production]
+            if not symbols:
+                break
+            entries.extend(symbols[:-1])
+            if symbols[-1] < table.nonterminal_base:
+                entries.append(symbols[-1])
+                break
+            production = table.predict[symbols[-1] - table.nonterminal_base][kind]
+        return tuple(entries), markers
+
+    def parse(self):
+        table = self.table
+        expansions = self.expansions()
+        actions = self.actions
+        nonterminal_base = table.nonterminal_base
+        get_next_token = self.lexer.get_next_token
+
+        token = self.current_token
+        values = []
+        # The number of values preceding each production being matched and the start offset of its first token
+        frames = []
+        # The symbols still to match, the last one first. The marker of a production is its complemented index,
+        # the values of its symbols are built into its own value when it is popped.
+        stack = [EOF, table.start]
+        while stack:
+            symbol = stack.pop()
+            if symbol >= nonterminal_base:
+                expansion = expansions[symbol - nonterminal_base][token.type]
+                if expansion is None:
+                    self.current_token = token
+                    self.error()
+                entries, markers = expansion
+                if markers:
+                    frames += [(len(values), token.start)] * markers
+                stack += entries
+            elif symbol >= 0:
+                if token.type != symbol:
+                    self.current_token = token
+                    self.error()
+                if symbol == EQUAL:
+                    self.builder.check_target(values[-1], token)
+                values.append(token)
+                self.previous_end = token.end
+                token = get_next_token()
+            else:
+                count, start = frames.pop()
+                node = actions[~symbol](values[count:])
+                del values[count:]
+                if isinstance(node, AST):
+                    if node.start is None:
+                        node.start = start
+                        node.end = self.previous_end
+                elif type(node) is Group:
+                    node.end = self.previous_end
+                values.append(node)
+
+        self.current_token = token
+        return values[0]
@@ -1,62 +1,83 @@
 class Token(object):
-    def __init__(self, type, value):
+    __slots__ = ('type', 'value', 'start', 'end')
+
+    def __init__(self, type, value, start=None, end=None):
         self.type = type
         self.value = value
+        # The span of the token: the offsets of its first char and of the char following it
+        self.start = start
+        self.end = end
 
     def __str__(self):
         """
         String representation of the class instance.
         Examples:
-            Token(INTEGER, 3)
-            Token(PLUS, '+')
-            Token(MUL, '*')
+            Token(Int, 3)
+            Token(Plus '+', '+')
+            Token(Star '*', '*')
         """
         return 'Token({type}, {value})'.format(
-            type=self.type,
+            type=TOKEN_NAMES[self.type],
             value=repr(self.value)
         )
 
     __repr__ = __str__
 
+    def __reduce__(self):
+        # Much faster to pickle than the default state of a class with slots
+        return Token, (self.type, self.value, self.start, self.end)
+
+
+# The token kinds are small integers, their readable names are kept for the error messages
+TOKEN_NAMES = []
+
+
+def token_kind(name):
+    """
+    Create a new token kind with the given readable name
+    """
+    TOKEN_NAMES.append(name)
+    return len(TOKEN_NAMES) - 1
+
 
 # Keywords
-VAR = "Variable"
-VAL = "Const Variable"
-FUNC = "Function"
-LATEINIT = "Late init"
+VAR = token_kind("Variable")
+VAL = token_kind("Const Variable")
+FUNC = token_kind("Function")
+LATEINIT = token_kind("Late init")
 
 # Symbols
-SYMBOL = "Symbol"
-ANNOTATION = "Annotation"
+SYMBOL = token_kind("Symbol")
+ANNOTATION = token_kind("Annotation")
 
-# Numbers
-INTEGER = "Int"
-FLOAT = "Float"
+# Numbers, their names are the names of their types
+INTEGER = token_kind("Int")
+FLOAT = token_kind("Float")
 
 # Recognized Characters
-LPAREN = "Left Parenthesis '('"
-RPAREN = "Right Parenthesis ')'"
-LBRACE = "Left Curly Bracket '{'"
-RBRACE = "Right Curly Bracket '}'"
-LCHEV = "Left Chevron '<'"
-RCHEV = "Right Chevron '>'"
-LARROW = "Left Arrow '<-'"
-RARROW = "Right Arrow '->'"
-EQUAL = "Equal '='"
-DOUBLEEQUAL = "Double Equal '=='"
-COLON = "Colon ':'"
-COMMA = "Comma ','"
-SEMICOLON = "Semicolon ';'"
-STAR = "Star '*'"
-SLASH = "Slash '/'"
-ANTISLASH = "AntiSlash '\\'"
-PLUS = "Plus '+'"
-MINUS = "Minus '-'"
-PERCENTAGE = "Percentage '%'"
-DOT = "Dot '.'"
+LPAREN = token_kind("Left Parenthesis '('")
+RPAREN = token_kind("Right Parenthesis ')'")
+LBRACE = token_kind("Left Curly Bracket '{'")
+RBRACE = token_kind("Right Curly Bracket '}'")
+LCHEV = token_kind("Left Chevron '<'")
+RCHEV = token_kind("Right Chevron '>'")
+LARROW = token_kind("Left Arrow '<-'")
+RARROW = token_kind("Right Arrow '->'")
+EQUAL = token_kind("Equal '='")
+DOUBLEEQUAL = token_kind("Double Equal '=='")
+COLON = token_kind("Colon ':'")
+COMMA = token_kind("Comma ','")
+SEMICOLON = token_kind("Semicolon ';'")
+STAR = token_kind("Star '*'")
+SLASH = token_kind("Slash '/'")
+ANTISLASH = token_kind("AntiSlash '\\'")
+PLUS = token_kind("Plus '+'")
+MINUS = token_kind("Minus '-'")
+PERCENTAGE = token_kind("Percentage '%'")
+DOT = token_kind("Dot '.'")
 
-EOL = "End of line"
-EOF = "End of file"
+EOL = token_kind("End of line")
+EOF = token_kind("End of file")
 
 RESERVED_KEYWORDS = {
     "var": Token(VAR, "var"),
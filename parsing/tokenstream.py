@@ -0,0 +1,106 @@
+from array import array
+
+from parsing.tokens import *
+from parsing.scanner import MASTER_PATTERN, OPERATORS, KEYWORDS
+from parsing.source import SourceError
+
+
+class TokenStream(object):
+    """
+    The TokenStream holds a whole token stream as a struct of arrays:
+    the kind of each token, the index of its value in the `constants` table and its span.
+    The values are interned so a symbol or a number is stored once however often it is used.
+    It can be given to the Parser in place of a Lexer: the tokens are only created while being parsed.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.values = array('I')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.constants = [None]
+        self._constant_indices = {None: 0}
+        self.rewind()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def from_text(cls, text):
+        """
+        Break the text apart into tokens, the last one being the EOF token.
+        """
+        stream = cls()
+        append_kind = stream.kinds.append
+        append_value = stream.values.append
+        append_start = stream.starts.append
+        append_end = stream.ends.append
+        constants = stream.constants
+        constant_indices = stream._constant_indices
+        operators = OPERATORS
+        keywords = KEYWORDS
+        for match in MASTER_PATTERN.finditer(text):
+            group = match.lastgroup
+            if group == "SYMBOL":
+                key = value = match["SYMBOL"]
+                keyword = keywords.get(value)
+                if keyword is None:
+                    kind = SYMBOL
+                else:
+                    kind = keyword.type
+                    key = value = keyword.value
+            elif group == "OPERATOR":
+                key = value = match["OPERATOR"]
+                kind = operators[value]
+            elif group == "INTEGER":
+                key = value = int(match["INTEGER"])
+                kind = INTEGER
+            elif group == "FLOAT":
+                value = float(match["FLOAT"])
+                # 1.0 must not be interned as 1
+                key = (FLOAT, value)
+                kind = FLOAT
+            elif group == "ANNOTATION":
+                key = value = match["ANNOTATION"][1:]
+                kind = ANNOTATION
+            elif group == "MISMATCH":
+                stream.error(match.start(group))
+            else:
+                continue
+
+            index = constant_indices.get(key)
+            if index is None:
+                index = constant_indices[key] = len(constants)
+                constants.append(value)
+            append_kind(kind)
+            append_value(index)
+            append_start(match.start(group))
+            append_end(match.end())
+
+        append_kind(EOF)
+        append_value(0)
+        append_start(len(text))
+        append_end(len(text))
+        return stream
+
+    def error(self, offset):
+        raise SourceError("Unrecognized character", offset, offset + 1)
+
+    def token(self, index):
+        """
+        Create the Token stored at the given index
+        """
+        return Token(self.kinds[index], self.constants[self.values[index]], self.starts[index], self.ends[index])
+
+    def rewind(self):
+        """
+        Restart the reading from the first token, so the stream can be parsed once again
+        """
+        # The Tokens read by the Parser are created on the fly from the arrays
+        self._tokens = map(Token, self.kinds, map(self.constants.__getitem__, self.values), self.starts, self.ends)
+
+    def get_next_token(self):
+        """
+        Return the next token, the EOF token is returned once the stream is consumed.
+        """
+        return next(self._tokens, None) or Token(EOF, None)
@@ -1,4 +1,4 @@
-from symbol.symbol import SymbolTable, GlobalSymbolTable
+from symbol.symbol import SymbolTable, GlobalSymbolTable, ValSymbol, VarSymbol
 
 
 class StackElement(object):
@@ -7,18 +7,81 @@ class StackElement(object):
         self.return_value = None
 
 
+# The number of popped elements kept by a Stack to be reused
+MAX_FREE = 64
+
+
+class Frame(object):
+    """
+    The Frame holds the values of the variables of a scope while it is run, each one at the slot given
+    by the analysis, in a list of a fixed size. The `display` holds the values of the frame and of its enclosing
+    frames, so the variable at (depth, slot) is at `display[-1 - depth][slot]` whatever the depth.
+    The values are plain Python values: the names and the types are only used to print the frame.
+    """
+
+    __slots__ = ('name', 'values', 'enclosing', 'display')
+
+    def __init__(self, name, size, enclosing=None):
+        self.name = name
+        self.values = [None] * size
+        self.enclosing = enclosing
+        self.display = (() if enclosing is None else enclosing.display) + (self.values,)
+
+    @classmethod
+    def from_scope(cls, scope):
+        """
+        Create the frame of the values of the variables declared in the SymbolTable
+        """
+        frame = cls(scope.name, scope.size)
+        for symbol in scope._symbols.values():
+            if symbol.slot is not None:
+                frame.values[symbol.slot] = symbol.value
+        return frame
+
+    def symbol_table(self, declarations, enclosing_scope=None):
+        """
+        Return the SymbolTable of the variables of the frame, declared by the given VariableDeclaration nodes,
+        for debugging
+        """
+        scope = SymbolTable(self.name, len(self.display), enclosing_scope)
+        for declaration in declarations:
+            symbol_class = ValSymbol if declaration.const is True else VarSymbol
+            scope.insert(symbol_class(declaration.symbol.name, declaration.type.name, self.values[declaration.slot]))
+        return scope
+
+
 class Stack(object):
-    def __init__(self, global_symtab=GlobalSymbolTable()):
-        self.global_symtab = global_symtab
+    """
+    The Stack holds the scopes being analyzed. The elements popped are kept to be reused by the next `add()`,
+    with their SymbolTable cleared, as the scopes are not used once popped.
+    """
+
+    def __init__(self, global_symtab=None):
+        # Each stack has its own GlobalSymbolTable if none is given
+        self.global_symtab = GlobalSymbolTable() if global_symtab is None else global_symtab
         self.elements = [StackElement(self.global_symtab)]
+        self.free = []
 
     def add(self, name):
         # print("Create new stack: %s" % name)
-        self.elements.append(StackElement(SymbolTable(name, self.elements[-1].scope.level + 1, self.elements[-1].scope)))
+        enclosing_scope = self.elements[-1].scope
+        if self.free:
+            element = self.free.pop()
+            scope = element.scope
+            scope.name = name
+            scope.level = enclosing_scope.level + 1
+            scope.enclosing_scope = enclosing_scope
+            self.elements.append(element)
+        else:
+            self.elements.append(StackElement(SymbolTable(name, enclosing_scope.level + 1, enclosing_scope)))
 
     def pop(self):
         # print("Pop stack: %s" % self.elements[-1].scope.name)
-        self.elements.pop()
+        element = self.elements.pop()
+        if len(self.free) < MAX_FREE:
+            element.scope.clear()
+            element.return_value = None
+            self.free.append(element)
 
     def last(self):
         return self.elements[-1]
@@ -1,10 +1,16 @@
 from collections import OrderedDict
+from itertools import count
+
+# The versions of all the GlobalSymbolTable: two tables never have the same version
+_versions = count()
 
 
 class Symbol(object):
     def __init__(self, name, type=None):
         self.name = name
         self.type = type
+        # The slot of a variable in the frames of its scope
+        self.slot = None
 
 
 class VarSymbol(Symbol):
@@ -81,10 +87,12 @@ class BuiltinTypeSymbol(TypeSymbol):
 
 
 class FunctionSymbol(Symbol):
-    def __init__(self, name, type, params, body):
+    def __init__(self, name, type, params, body, declaration=None):
         super().__init__(name, type)
         self.params = params if params is not None else []
         self.body = body
+        # The FunctionDeclaration, giving the size of the frames of the function once analyzed
+        self.declaration = declaration
 
     def __str__(self):
         return "<Function(name='{name}', type='{type}', params={params}, body={body})>".format(
@@ -103,6 +111,8 @@ class SymbolTable(object):
         self.name = name
         self.level = level
         self.enclosing_scope = enclosing_scope
+        # The number of slots given to the variables of the scope
+        self.size = 0
 
     def __str__(self):
         h1 = 'SYMBOL TABLE'
@@ -129,6 +139,21 @@ class SymbolTable(object):
         # print('Insert: %s' % symbol.name)
         self._symbols[symbol.name] = symbol
 
+    def clear(self):
+        """
+        Remove all the symbols of the scope and free its slots
+        """
+        self._symbols.clear()
+        self.size = 0
+
+    def declare(self, symbol):
+        """
+        Insert a variable, giving it the next slot of the frames of the scope
+        """
+        symbol.slot = self.size
+        self.size += 1
+        self.insert(symbol)
+
     def lookup(self, name, current_scope_only=False):
         # print('Lookup: %s (Scope name: %s)' % (name, self.name))
         # 'symbol' is either an instance of the Symbol class or None
@@ -147,10 +172,25 @@ class SymbolTable(object):
 
 
 class GlobalSymbolTable(SymbolTable):
+    """
+    The GlobalSymbolTable holds the global variables, the functions and the types.
+    Its `version` changes whenever a symbol is inserted or removed, so a symbol found in the table
+    can be kept by a cache, as long as the version it was found in is the version of the table.
+    """
+
     def __init__(self):
+        self.version = next(_versions)
         super().__init__("Global", 1)
         self._init_builtins()
 
+    def insert(self, symbol):
+        super().insert(symbol)
+        self.version = next(_versions)
+
+    def clear(self):
+        super().clear()
+        self.version = next(_versions)
+
     def _init_builtins(self):
         self.insert(BuiltinTypeSymbol('Int'))
         self.insert(BuiltinTypeSymbol('Float'))
@@ -0,0 +1,28 @@
+from parsing.source import SourceError
+
+# A program using every kind of token and of declaration
+SAMPLE = """
+# A comment on its own line
+val base : Int = 10
+lateinit var later : Int
+VAR counter : Int = 0   # A comment after a statement
+
+@memoize @pure func add(var a : Int, val b : Int = base * 2) : Int -> a + b
+func scale(val x : Float, val k : Float = 2.) : Float -> x * k / 0.5
+Func main() : Int {
+    var x : Int = add(1) + add(1, 2) * -add(+3, (4 - -5))
+    counter = counter + 1
+    x
+}
+"""
+
+
+def failure(function):
+    """
+    Return the message and the start of the SourceError raised by the function, or None
+    """
+    try:
+        function()
+    except SourceError as error:
+        return str(error), error.start
+    return None
@@ -0,0 +1,50 @@
+import unittest
+
+from parsing.ast import ExpressionVisitor, MAX_NESTING
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+
+
+class Evaluator(ExpressionVisitor):
+    """
+    Compute the sum of the numbers of an expression, their signs being ignored and a symbol being an error
+    """
+
+    def visit_Num(self, node):
+        return node.value
+
+    def visit_Symbol(self, node):
+        raise ValueError(node.name)
+
+    def leave_BinOp(self, node, left, right):
+        return left + right
+
+    def leave_UnaryOp(self, node, expr):
+        return expr
+
+    def leave_Call(self, node, arguments):
+        return sum(arguments)
+
+
+def expression(text):
+    return Parser(Scanner(text)).expr()
+
+
+class ExpressionVisitorTest(unittest.TestCase):
+    """
+    The ExpressionVisitor visits the expressions recursively up to MAX_NESTING nested operations
+    """
+
+    def test_exception(self):
+        # An exception leaves the count of the nested operations as it was
+        evaluator = Evaluator()
+        for text in ("1 + (2 + f(3, -x))", "+" * (MAX_NESTING // 2) + "x", "1 + " * MAX_NESTING * 2 + "x"):
+            with self.subTest(text=text[:20]):
+                with self.assertRaises(ValueError):
+                    evaluator.visit(expression(text))
+                self.assertEqual(evaluator.nesting, 0)
+        self.assertEqual(evaluator.visit(expression("1 + (2 + f(3, -4))")), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
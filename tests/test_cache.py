@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from interpreter.cache import ASTCache, CodeCache, EVICTION_FRACTION, TEMPORARY_SUFFIX
+
+
+def size(directory):
+    """
+    Return the number of bytes of the files of the directory
+    """
+    return sum(entry.stat().st_size for entry in os.scandir(directory))
+
+
+class CacheTest(unittest.TestCase):
+    """
+    The caches keep their directory within their size while the process writes in it
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="horilang-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_eviction(self):
+        cache = ASTCache(self.directory, max_size=1000)
+        code_cache = CodeCache(self.directory, max_size=1000)
+        for index in range(40):
+            written = cache if index % 2 else code_cache
+            written.write("key%d" % index, bytes(100))
+            # The files are used in the order they are written
+            os.utime(written.path("key%d" % index), (index, index))
+            # Up to EVICTION_FRACTION of the size is written between two evictions
+            self.assertLessEqual(size(self.directory), 1000 * (1 + EVICTION_FRACTION) + 104)
+        self.assertEqual(cache.read("key39"), bytes(100))
+        self.assertIsNone(code_cache.read("key0"))
+
+    def test_failed_write(self):
+        cache = ASTCache(self.directory)
+        with mock.patch("os.replace", side_effect=OSError):
+            cache.write("key", b"data")
+        self.assertIsNone(cache.read("key"))
+        # The temporary file is removed, an error while removing it being ignored too
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith(TEMPORARY_SUFFIX)])
+        with mock.patch("os.replace", side_effect=OSError), mock.patch("os.unlink", side_effect=OSError):
+            cache.write("key", b"data")
+        self.assertIsNone(cache.read("key"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,402 @@
+import contextlib
+import io
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+from analyzer.pipeline import AnalysisPipeline
+from analyzer.treeanalyzer import GlobalSymbolTableCreator
+from benchmark.generator import generate_program
+from interpreter.cache import ASTCache, CodeCache
+from interpreter.transpiler import TranspiledInterpreter
+from parsing.parser import Parser
+from parsing.scanner import Scanner, StreamScanner
+
+# The programs run by every engine, with their expected results: the value returned by main or the errors.
+# The whole output of the engines, the frames included, must be the same.
+PROGRAMS = {
+    "operations": ("""
+val g : Int = 3
+var h : Int = g * 2
+lateinit var u : Int
+func main() : Int {
+    var a : Int = -g + +h * (2 - 5)
+    a = a * a - h
+    u = a
+    var f : Float = 1.5 * 2.0 - -0.25
+    h = h + u
+    h - a
+}
+""", ["Main returned: 6"]),
+    "uninitialized variable": ("""
+lateinit var u : Int
+func main() : Int {
+    var a : Int = 1
+    a + u
+}
+""", ["Error: line 5, column 5: Try to compute a not initialized variable"]),
+    "forward references": ("""
+func main() : Int {
+    var a : Int = g
+    var b : Int = a * 3
+    b = b - a + h
+    b
+}
+val g : Int = 4
+var h : Int = g + 1
+""", ["Main returned: 13"]),
+    "unknown global": ("""
+func main() : Int -> g + k
+val g : Int = 4
+""", ["Error: line 2, column 26: Unknown symbol reference: k"]),
+    "signed zero": ("""
+func g(var x : Float) : Float -> (x * 0.0 + 1.0) * (x * -0.0)
+func main() : Float -> g(1.0) + 0.0 * g(2.0)
+""", ["Main returned: -0.0"]),
+    "integer division by zero": ("""
+val z : Int = 0
+func main() : Int {
+    var a : Int = 3
+    var b : Int = a + a / z
+    b
+}
+""", ["Error: line 5, column 23: ZeroDivisionError: division by zero"]),
+    "float division by zero": ("""
+func f(var x : Float) : Float -> 1.0 / x
+func main() : Float -> f(2.0) + f(0.0)
+""", ["Error: line 2, column 34: ZeroDivisionError: float division by zero"]),
+    "dead statements": ("""
+var h : Int = 1
+func main() : Int {
+    var a : Int = 2
+    var b : Int = a * 10
+    a = h + 1
+    h = a * 3
+    b = a
+    var c : Int = b - h
+    b
+}
+""", ["Main returned: 2"]),
+    "calls": ("""
+val base : Int = 10
+var counter : Int = 0
+func add(var a : Int, var b : Int = base * 2) : Int -> a + b
+func scale(val x : Float, val k : Float = 2.0) : Float -> x * k
+func bump() : Int {
+    counter = counter + 1
+    counter
+}
+func twice(var n : Int) : Int -> add(n, n)
+func main() : Int {
+    var x : Int = add(1) + add(1, 2) * -add(bump(), (4))
+    var f : Float = scale(1.5) + scale(1.0, 0.5)
+    bump()
+    var y : Int = bump() + counter
+    twice(x + y)
+}
+""", ["Main returned: 24"]),
+    "tail calls": ("\n".join(
+        "func f%d(var n : Int) : Int {\n    var m : Int = n + 1\n    f%d(m)\n}" % (i, i + 1) for i in range(1500)
+    ) + "\nfunc f1500(var n : Int) : Int -> n\nfunc main() : Int -> f0(0)\n", ["Main returned: 1500"]),
+    "nested calls": ("\n".join(
+        "func f%d(var n : Int) : Int -> f%d(n + 1) + 0" % (i, i + 1) for i in range(100)
+    ) + "\nfunc f100(var n : Int) : Int -> n\nfunc main() : Int -> f0(0)\n", ["Main returned: 100"]),
+    "call errors": ("""
+func add(var a : Int, var b : Int = 2) : Int -> a + b
+func main() : Int {
+    var x : Int = add(1, 2, 3)
+    x = add(1.5)
+    x = add()
+    y(x)
+}
+""", [
+        "Error: line 4, column 19: Too many arguments: add takes 2 arguments, 3 given.",
+        "Error: line 5, column 13: Types mismatch: the parameter a of add is of type Int.",
+        "Error: line 6, column 9: Missing argument: a of add.",
+        "Error: line 7, column 5: Unknown function: y.",
+    ]),
+    "return and default types": ("""
+func f(var n : Int) : Float -> n
+func g(var a : Int = 2.5) : Int -> a
+func h() : Float -> k()
+func k() : Int {
+    var x : Float = 1
+    x = 2.0
+}
+func main() : Int -> 1
+""", [
+        "Error: line 2, column 32: Types mismatch: the function f is of type Float.",
+        "Error: line 3, column 22: Types mismatch: the variable a is of type Int.",
+        "Error: line 6, column 21: Types mismatch: the variable x is of type Float.",
+        "Error: line 7, column 5: Types mismatch: the function k is of type Int.",
+        "Error: line 4, column 21: Types mismatch: the function h is of type Float.",
+    ]),
+    "annotations": ("""
+val base : Int = 3
+@pure
+func square(var a : Int) : Int -> a * a
+@inline
+func twice(var a : Int, var b : Int = base) : Int -> a * 2 + b
+@memoize
+func cube(var a : Int) : Int -> square(a) * a
+@memoize
+func m(var n : Int) : Int -> t(n + 1)
+@memoize
+func t(var n : Int) : Int -> n * 2 - 1
+func main() : Int {
+    var x : Int = twice(4) + twice(base, 1)
+    var y : Int = cube(3) + cube(3) + cube(x) + m(1) + m(1) + t(2)
+    x + y
+}
+""", [
+        "Main returned: 5913",
+        "Memoized cube: 1 hits, 2 misses, 2 values kept",
+        "Memoized m: 1 hits, 1 misses, 1 values kept",
+        "Memoized t: 1 hits, 1 misses, 1 values kept",
+    ]),
+    "memoized signed zero": ("""
+@memoize
+func f(var x : Float) : Float -> x * 5.0
+func main() : Float {
+    var a : Float = f(0.0)
+    f(-0.0) - a * f(0.0)
+}
+""", ["Main returned: -0.0", "Memoized f: 1 hits, 2 misses, 2 values kept"]),
+    "annotation errors": ("""
+var counter : Int = 0
+func bump() : Int {
+    counter = counter + 1
+    counter
+}
+@pure
+func f(var a : Int) : Int -> bump() + counter
+@memoize @inline
+func g(var a : Int) : Int -> a
+@fast
+func main() : Int -> 1
+""", [
+        "Error: line 8, column 30: The @pure function f cannot call the function bump, which is not pure.",
+        "Error: line 8, column 39: The @pure function f cannot read the global var counter.",
+        "Error: line 10, column 6: An @inline function cannot be memoized: g.",
+        "Error: line 11, column 1: Unknown annotation: @fast.",
+    ]),
+    "right nested expression": ("func f(var x : Int) : Int -> %s\nfunc main() : Int -> f(1)\n" % (
+        "x - (" * 300 + "x" + ")" * 300), ["Main returned: 1"]),
+    "deep operands": ("""
+var h : Int = 1
+func bump() : Int {
+    h = h + 1
+    h
+}
+func add(var a : Int, var b : Int, var c : Int) : Int -> a * 10000 + b * 100 + c
+func f(var x : Int) : Int -> h * 1000 + (%s) + h
+func main() : Int -> f(3) * 10 + add(h, %s, h)
+""" % ("x - (" * 150 + "bump()" + ")" * 150, "h - (" * 150 + "bump()" + ")" * 150), ["Main returned: 30343"]),
+    "deep expression error": ("""
+lateinit var u : Int
+func f(var x : Int) : Int -> x + (%s)
+func main() : Int -> f(1)
+""" % ("x - (" * 150 + "u" + ")" * 150), ["Error: line 3, column 780: Try to compute a not initialized variable"]),
+    "deep expression": ("func f(var x : Int) : Int -> %s\nfunc main() : Int -> f(1)\n" % " + ".join(["x"] * 300),
+                        ["Main returned: 300"]),
+    "generated": (generate_program(10, 5), ["Main returned: 11748.0"]),
+}
+
+# The options of the AnalysisPipeline leaving passes out, which must not change the results
+UNOPTIMIZED = (
+    {"optimize": False},
+    {"eliminate": False},
+    {"optimize": False, "eliminate": False},
+)
+
+
+def expression(rng, names, depth=0):
+    """
+    Generate a random expression of the given variables
+    """
+    choice = rng.random()
+    if depth > 4 or choice < 0.3:
+        return rng.choice(names) if names and rng.random() < 0.6 else str(rng.randint(0, 9))
+    if choice < 0.4:
+        return rng.choice("+-") + expression(rng, names, depth + 1)
+    if choice < 0.5:
+        return "(" + expression(rng, names, depth + 1) + ")"
+    return "%s %s %s" % (expression(rng, names, depth + 1), rng.choice("+-*/"), expression(rng, names, depth + 1))
+
+
+def random_program(rng):
+    """
+    Generate a random program of globals and functions assigning their variables, some of them failing
+    """
+    lines = ["lateinit var u : Int", "val g : Int = 3", "var h : Int = g * 2"]
+    for index in range(3):
+        lines.append("func %s() : Int {" % ("main" if index == 2 else "f%d" % index))
+        names = ["g", "h"] + (["u"] if rng.random() < 0.1 else [])
+        for statement in range(rng.randint(1, 6)):
+            if rng.random() < 0.5 or len(names) < 3:
+                lines.append("    var v%d : Int = %s" % (statement, expression(rng, names)))
+                names.append("v%d" % statement)
+            else:
+                lines.append("    %s = %s" % (rng.choice(names[1:]), expression(rng, names)))
+        if index < 2:
+            lines.append("    " + expression(rng, names))
+        else:
+            lines.append("    f0() + f1() * " + expression(rng, names))
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def output(function, *arguments):
+    """
+    Return what the function prints
+    """
+    stream = io.StringIO()
+    with contextlib.redirect_stdout(stream):
+        function(*arguments)
+    return stream.getvalue()
+
+
+def analyzed_output(text, engine, **options):
+    """
+    Return the output of the engine running the program analyzed by an AnalysisPipeline with the given options,
+    or None if the analysis finds errors
+    """
+    lexer = Scanner(text)
+    pipeline = AnalysisPipeline(**options)
+    if list(pipeline.analyze(Parser(lexer).declarations())):
+        return None
+    return output(main.interpret, lexer, pipeline.global_table, engine)
+
+
+def results(text):
+    """
+    Return the lines of the output giving the value returned by main, the use of the memoized values or the errors
+    """
+    return [line for line in text.splitlines() if line.startswith(("Main returned", "Memoized", "Error:"))]
+
+
+class EnginesTest(unittest.TestCase):
+    """
+    The five engines run the programs with the same output, and the expected results
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp(prefix="horilang-test-")
+        cls.default_cache = TranspiledInterpreter.default_cache
+        TranspiledInterpreter.default_cache = CodeCache(cls.directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        TranspiledInterpreter.default_cache = cls.default_cache
+        shutil.rmtree(cls.directory)
+
+    def outputs(self, text):
+        """
+        Return the output of each engine running the program
+        """
+        return {name: output(main.run, Scanner(text), engine) for name, engine in main.ENGINES.items()}
+
+    def assertSameOutputs(self, outputs):
+        reference = outputs["tree"]
+        for name, result in outputs.items():
+            self.assertEqual(result, reference, "the %s engine differs from the tree engine" % name)
+
+    def test_programs(self):
+        for name, (text, expected) in PROGRAMS.items():
+            with self.subTest(program=name):
+                outputs = self.outputs(text)
+                self.assertSameOutputs(outputs)
+                self.assertEqual(results(outputs["tree"]), expected)
+
+    def test_cached_programs(self):
+        for name, (text, expected) in PROGRAMS.items():
+            with self.subTest(program=name):
+                source = text.encode()
+                cache = ASTCache(tempfile.mkdtemp(dir=self.directory))
+                cold = output(main.run_cached, StreamScanner(io.BytesIO(source)), cache)
+                warm = {name: output(main.run_cached, StreamScanner(io.BytesIO(source)), cache, engine)
+                        for name, engine in main.ENGINES.items()}
+                self.assertSameOutputs(warm)
+                self.assertEqual(results(warm["tree"]), expected)
+                if "Start Interpreter" in cold:
+                    # Only the analysis is skipped on a hit
+                    self.assertEqual(warm["tree"].split("Start Interpreter")[1], cold.split("Start Interpreter")[1])
+                else:
+                    # The tree of a program with errors is not cached
+                    self.assertEqual(warm["tree"], cold)
+
+    def test_deep_expressions(self):
+        # The analysis and the IterativeInterpreter are not bounded by the recursion limit
+        for name, body, value in (("operations", " + ".join(["x"] * 2000), 2000),
+                                  ("parentheses", "(" * 2000 + "x" + ")" * 2000, 1),
+                                  ("negations", "-" * 2001 + "x", -1)):
+            with self.subTest(expression=name):
+                text = "func f(var x : Int) : Int -> %s\nfunc main() : Int -> f(1)\n" % body
+                self.assertEqual(results(output(main.run, Scanner(text), main.IterativeInterpreter)),
+                                 ["Main returned: %d" % value])
+
+    def test_deep_calls(self):
+        # The arguments are parsed without recursion, the engines computing them recursively report a located error
+        text = "func f(var x : Int) : Int -> x + 1\nfunc main() : Int -> %s1%s\n" % ("f(" * 1500, ")" * 1500)
+        for name, engine in main.ENGINES.items():
+            with self.subTest(engine=name):
+                self.assertIn(results(output(main.run, Scanner(text), engine)),
+                              (["Main returned: 1501"],
+                               ["Error: line 2, column 6: Too many nested calls, or too deep an expression in main"]))
+        self.assertEqual(results(output(main.run, Scanner(text), main.IterativeInterpreter)), ["Main returned: 1501"])
+
+    def test_python_compile_error(self):
+        # A body rejected by CPython is reported as an error of its function
+        text = "func f(var x : Int) : Int -> %s\nfunc main() : Int -> f(1)\n" % ("x - (" * 300 + "x" + ")" * 300)
+        with mock.patch("interpreter.transpiler.MAX_DEPTH", 1000):
+            self.assertEqual(results(output(main.run, Scanner(text), main.TranspiledInterpreter)),
+                             ["Error: line 1, column 6: The body of f is too deep to be compiled"])
+
+    def test_new_table(self):
+        # The CallSites kept by the Call nodes are looked up again in the table of the next run
+        text = "@memoize\nfunc sq(var n : Int) : Int -> n * n\nfunc main() : Int -> sq(3) + sq(3)\n"
+        lexer = Scanner(text)
+        declarations = list(Parser(lexer).declarations())
+        pipeline = AnalysisPipeline(optimize=False)
+        self.assertEqual(list(pipeline.analyze(declarations)), [])
+        expected = ["Main returned: 18", "Memoized sq: 1 hits, 1 misses, 1 values kept"]
+        for engine_name, engine in main.ENGINES.items():
+            with self.subTest(engine=engine_name):
+                self.assertEqual(results(output(main.interpret, lexer, pipeline.global_table, engine)), expected)
+                creator = GlobalSymbolTableCreator()
+                creator.visit(declarations)
+                self.assertEqual(results(output(main.interpret, lexer, creator.global_table, engine)), expected)
+
+    def test_random_programs(self):
+        rng = random.Random(1)
+        for index in range(60):
+            text = random_program(rng)
+            with self.subTest(program=text):
+                self.assertSameOutputs(self.outputs(text))
+
+    def test_unoptimized_programs(self):
+        for name, (text, expected) in PROGRAMS.items():
+            for options in UNOPTIMIZED:
+                for engine_name, engine in main.ENGINES.items():
+                    with self.subTest(program=name, engine=engine_name, **options):
+                        result = analyzed_output(text, engine, **options)
+                        if result is not None:
+                            self.assertEqual(results(result), expected)
+
+    def test_unoptimized_random_programs(self):
+        rng = random.Random(2)
+        for index in range(30):
+            text = random_program(rng)
+            expected = results(analyzed_output(text, main.Interpreter))
+            for options in UNOPTIMIZED:
+                for engine_name, engine in main.ENGINES.items():
+                    with self.subTest(program=text, engine=engine_name, **options):
+                        self.assertEqual(results(analyzed_output(text, engine, **options)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
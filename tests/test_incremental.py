@@ -0,0 +1,93 @@
+import random
+import unittest
+
+from benchmark.generator import generate_program
+from parsing.incremental import IncrementalParser
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from parsing.source import LineIndex
+from tests.support import SAMPLE, failure
+
+
+class IncrementalParserTest(unittest.TestCase):
+    """
+    After each edit, the IncrementalParser has the tree of a full parse of the edited source,
+    its nodes being located at the same lines and columns
+    """
+
+    def assertParsed(self, parser):
+        expected = Parser(Scanner(parser.source)).parse()
+        self.assertEqual(str(parser.tree), str(expected))
+        line_index = parser.line_index()
+        full_index = LineIndex.from_text(parser.source)
+        for root, expected_root in zip(parser.tree, expected):
+            self.assertEqual(line_index.location(root.start), full_index.location(expected_root.start))
+            self.assertEqual(line_index.location(root.end), full_index.location(expected_root.end))
+
+    def edit(self, parser, start, end, text):
+        """
+        Edit the source, check the new tree or that the edit fails as a full parse of the edited source does.
+        Return whether the edited source is valid.
+        """
+        source = parser.source[:start] + text + parser.source[end:]
+        expected = failure(lambda: Parser(Scanner(source)).parse())
+        self.assertEqual(failure(lambda: parser.edit(start, end, text)), expected)
+        self.assertEqual(parser.source, source)
+        if expected is None:
+            self.assertParsed(parser)
+        return expected is None
+
+    def test_edits(self):
+        text = generate_program(10)
+        parser = IncrementalParser(text)
+        self.assertParsed(parser)
+        line = "func func5() : Int {\n    var a : Int = "
+        offset = parser.source.index(line) + len(line)
+        # A same length edit, a longer one, then a shorter one
+        self.edit(parser, offset, offset + 1, "7")
+        self.edit(parser, offset, offset + 1, "42")
+        self.edit(parser, offset, offset + 2, "3")
+        # A new declaration, at the start, in the middle and at the end of the source
+        self.edit(parser, 0, 0, "val first : Int = 1\n")
+        middle = parser.source.index("func func4")
+        self.edit(parser, middle, middle, "func added() : Int -> first\n\n")
+        self.edit(parser, len(parser.source), len(parser.source), "\nvar last : Float = 2.5\n")
+        # Two declarations merged then split again
+        start = parser.source.index("}\n\nfunc func6") + 1
+        self.edit(parser, start, start + 2, "")
+        self.edit(parser, start, start, "\n")
+        # A declaration removed
+        start = parser.source.index("func func2")
+        self.edit(parser, start, parser.source.index("func func3"), "")
+
+    def test_comments(self):
+        parser = IncrementalParser("val a : Int = 1\nval b : Int = 2\nval c : Int = 3\n")
+        self.edit(parser, 15, 15, " # the end of a")
+        self.edit(parser, 16, 16, "#")
+        self.edit(parser, 16, 17, "")
+        self.edit(parser, 0, 0, "# a first line\n")
+
+    def test_syntax_error(self):
+        parser = IncrementalParser(SAMPLE)
+        start = SAMPLE.index("func scale(")
+        self.edit(parser, start, start + 4, "fun")
+        self.edit(parser, start, start + 3, "func")
+        self.edit(parser, 0, len(parser.source), "")
+        self.edit(parser, 0, 0, SAMPLE)
+
+    def test_random_edits(self):
+        rng = random.Random(5)
+        pieces = ("", " ", "\n", "\n\n", "1", "a", "+ 2", "(", ")", "}", "#", "val x : Int = 2\n")
+        parser = IncrementalParser(SAMPLE)
+        for _ in range(300):
+            start = rng.randint(0, len(parser.source))
+            end = min(len(parser.source), start + rng.choice((0, 0, 1, 2, 5)))
+            text = rng.choice(pieces)
+            removed = parser.source[start:end]
+            # An edit leaving the source invalid is undone, as is half of the others
+            if not self.edit(parser, start, end, text) or rng.random() < 0.5:
+                self.edit(parser, start, start + len(text), removed)
+
+
+if __name__ == "__main__":
+    unittest.main()
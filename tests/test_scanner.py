@@ -0,0 +1,119 @@
+import io
+import os
+import tempfile
+import unittest
+
+from benchmark.generator import generate_program
+from parsing.lexer import Lexer
+from parsing.scanner import Scanner, StreamScanner
+from parsing.source import LineIndex
+from parsing.tokens import EOF
+from parsing.tokenstream import TokenStream
+from tests.support import SAMPLE, failure
+
+
+def tokens(lexer):
+    """
+    Return the kind, the value and the span of every token of the lexer, the EOF token included
+    """
+    result = []
+    token = lexer.get_next_token()
+    while token.type != EOF:
+        result.append((token.type, token.value, token.start, token.end))
+        token = lexer.get_next_token()
+    result.append((token.type, token.value))
+    return result
+
+
+class ScannerTest(unittest.TestCase):
+    """
+    The Scanner produces the same tokens as the Lexer
+    """
+
+    def test_sample(self):
+        self.assertEqual(tokens(Scanner(SAMPLE)), tokens(Lexer(SAMPLE)))
+
+    def test_generated_program(self):
+        text = generate_program(20)
+        self.assertEqual(tokens(Scanner(text)), tokens(Lexer(text)))
+
+    def test_edge_cases(self):
+        for text in ("", "\n", "   ", "# only a comment", "a#b\n#c", "x->y<-z==w", "3 +\n\n 4 "):
+            with self.subTest(text=text):
+                self.assertEqual(tokens(Scanner(text)), tokens(Lexer(text)))
+
+    def test_unrecognized_character(self):
+        for text in ("var a : Int = 3 $ 4", "?", "1.5.2", "func f() : Int -> 1\n&"):
+            with self.subTest(text=text):
+                self.assertIsNotNone(failure(lambda: tokens(Lexer(text))))
+                self.assertEqual(failure(lambda: tokens(Scanner(text))), failure(lambda: tokens(Lexer(text))))
+
+
+class StreamScannerTest(unittest.TestCase):
+    """
+    The StreamScanner produces the tokens of the Scanner however small its buffer is
+    """
+
+    # The tokens and the comments cut by a small buffer, and multi-byte chars cut by a small read
+    TEXT = SAMPLE + "val \u00e9t\u00e9 : Float = 12.75 # commentaire \u00e0 la fin\n"
+
+    def test_buffer_sizes(self):
+        expected = tokens(Scanner(self.TEXT))
+        for buffer_size in (1, 2, 3, 7, 64, 1024):
+            with self.subTest(buffer_size=buffer_size):
+                self.assertEqual(tokens(StreamScanner(io.BytesIO(self.TEXT.encode()), buffer_size)), expected)
+                self.assertEqual(tokens(StreamScanner(io.StringIO(self.TEXT), buffer_size)), expected)
+
+    def test_open(self):
+        for text in (self.TEXT, ""):
+            with self.subTest(text=text):
+                descriptor, path = tempfile.mkstemp(suffix=".hl")
+                try:
+                    with os.fdopen(descriptor, "wb") as file:
+                        file.write(text.encode())
+                    with StreamScanner.open(path, 5) as scanner:
+                        self.assertEqual(tokens(scanner), tokens(Scanner(text)))
+                finally:
+                    os.unlink(path)
+
+    def test_line_index(self):
+        scanner = StreamScanner(io.BytesIO(self.TEXT.encode()), 4)
+        first = scanner.get_next_token()
+        line_index = scanner.line_index()
+        expected = LineIndex.from_text(self.TEXT)
+        for offset in range(len(self.TEXT) + 1):
+            self.assertEqual(line_index.location(offset), expected.location(offset))
+        # The tokens are still read after the line index is built
+        self.assertEqual([(first.type, first.value, first.start, first.end)] + tokens(scanner),
+                         tokens(Scanner(self.TEXT)))
+
+
+class TokenStreamTest(unittest.TestCase):
+    """
+    The TokenStream holds the tokens of the Scanner, its interned values keeping their types
+    """
+
+    def test_tokens(self):
+        for text in (SAMPLE, generate_program(20), "", "x = 1 + 1.0 + 1. + 10"):
+            with self.subTest(text=text[:20]):
+                stream = TokenStream.from_text(text)
+                expected = tokens(Scanner(text))
+                self.assertEqual(len(stream), len(expected))
+                self.assertEqual(tokens(stream), expected)
+                # The stream can be read once again
+                stream.rewind()
+                self.assertEqual(tokens(stream), expected)
+
+    def test_interned_values(self):
+        stream = TokenStream.from_text("1 + 1.0 + 1")
+        self.assertEqual([type(stream.token(index).value) for index in (0, 2, 4)], [int, float, int])
+        self.assertIs(stream.token(0).value, stream.token(4).value)
+
+    def test_unrecognized_character(self):
+        for text in ("var a : Int = 3 $ 4", "1.5.2"):
+            with self.subTest(text=text):
+                self.assertEqual(failure(lambda: TokenStream.from_text(text)), failure(lambda: tokens(Scanner(text))))
+
+
+if __name__ == "__main__":
+    unittest.main()
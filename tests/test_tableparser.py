@@ -0,0 +1,40 @@
+import unittest
+
+from benchmark.generator import generate_program
+from parsing.flatast import FlatAST
+from parsing.parser import Parser
+from parsing.scanner import Scanner
+from parsing.tableparser import TableParser
+from parsing.tokenstream import TokenStream
+from tests.support import SAMPLE, failure
+
+
+class TableParserTest(unittest.TestCase):
+    """
+    The TableParser builds the same tree as the Parser, with the same spans, and fails at the same token
+    """
+
+    def assertSameTree(self, text):
+        expected = FlatAST.from_tree(Parser(Scanner(text)).parse()).dumps()
+        self.assertEqual(FlatAST.from_tree(TableParser(Scanner(text)).parse()).dumps(), expected)
+        self.assertEqual(FlatAST.from_tree(TableParser(TokenStream.from_text(text)).parse()).dumps(), expected)
+
+    def test_sample(self):
+        self.assertSameTree(SAMPLE)
+
+    def test_generated_program(self):
+        self.assertSameTree(generate_program(20))
+
+    def test_syntax_errors(self):
+        for text in ("func f( : Int -> 1", "var a : Int = (1 + 2", "val a : Int = 1 val b : Int = 2",
+                     "func f() : Int {\n}", "@pure var a : Int = 1", "var a : Int = 1 +",
+                     "func main() : Int -> 3 = 4 +", "func main() : Int -> a + b = 4 +",
+                     "func main() : Int -> (a) = 4 ("):
+            with self.subTest(text=text):
+                expected = failure(lambda: Parser(Scanner(text)).parse())
+                self.assertIsNotNone(expected)
+                self.assertEqual(failure(lambda: TableParser(Scanner(text)).parse()), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()